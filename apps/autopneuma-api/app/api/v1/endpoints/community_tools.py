@@ -6,15 +6,19 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from supabase import Client
 from typing import Optional
 
+from app.core.rate_limit import rate_limit
 from app.core.supabase import get_db
 from app.schemas.community_tools import (
     CommunityToolRequest,
     CommunityToolResponse,
+    EndpointHealthStatus,
     ToolRegistration,
     RegisteredTool,
     ToolListResponse,
 )
 from app.services.community_tools import CommunityToolsService
+from app.services.tool_health import get_tool_health_monitor
+from app.services.tool_registry import get_tool_registry
 
 router = APIRouter()
 
@@ -70,6 +74,7 @@ async def register_community_tool(
 
 
 @router.post("/execute", response_model=CommunityToolResponse)
+@rate_limit(cost=2)
 async def execute_community_tool(
     request: CommunityToolRequest,
     user_id: str,  # TODO: Get from auth token
@@ -94,9 +99,7 @@ async def execute_community_tool(
     """
     try:
         service = CommunityToolsService(db)
-        result = await service.execute_tool(request=request, user_id=user_id)
-        await service.close()
-        return result
+        return await service.execute_tool(request=request, user_id=user_id)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -113,6 +116,8 @@ async def list_community_tools(
     status: str = Query("active", description="Filter by status"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Results per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: str = Query("full", pattern="^(full|summary)$", description="full or summary"),
     db: Client = Depends(get_db),
 ) -> ToolListResponse:
     """
@@ -128,6 +133,16 @@ async def list_community_tools(
     - Input/output schemas
     - Performance metrics (success rate, avg execution time)
     - Spiritual application explanation
+
+    **Pagination:**
+    - page/per_page for numbered pages
+    - cursor: pass the previous response's next_cursor for keyset paging,
+      which stays fast however deep you go (total is omitted after the
+      first page)
+
+    **Views:**
+    - full: every field (default)
+    - summary: name, description, category, status and metrics only
     """
     try:
         service = CommunityToolsService(db)
@@ -136,9 +151,13 @@ async def list_community_tools(
             status=status,
             page=page,
             per_page=per_page,
+            cursor=cursor,
+            view=view,
         )
         return ToolListResponse(**result)
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -146,6 +165,19 @@ async def list_community_tools(
         )
 
 
+@router.get("/health")
+@rate_limit(cost=0)
+async def community_tools_health() -> dict:
+    """Health check for community tools service."""
+    return {
+        "service": "community_tools",
+        "status": "healthy",
+        "enabled": True,
+        "registry": get_tool_registry().stats(),
+        "endpoints": get_tool_health_monitor().stats(),
+    }
+
+
 @router.get("/{tool_id}", response_model=RegisteredTool)
 async def get_tool_details(
     tool_id: str,
@@ -160,10 +192,15 @@ async def get_tool_details(
     - Performance metrics
     - Creator information
     - Usage statistics
+    - Endpoint circuit breaker state and recent error rate/latency
+      (as seen by the API worker serving the request)
     """
     try:
         service = CommunityToolsService(db)
         tool = await service._get_tool(tool_id)
+        health = get_tool_health_monitor().get(str(tool.api_endpoint))
+        if health is not None:
+            tool.endpoint_health = EndpointHealthStatus(**health.stats())
         return tool
 
     except ValueError as e:
@@ -173,13 +210,3 @@ async def get_tool_details(
             status_code=500,
             detail=f"Error fetching tool: {str(e)}",
         )
-
-
-@router.get("/health")
-async def community_tools_health() -> dict:
-    """Health check for community tools service."""
-    return {
-        "service": "community_tools",
-        "status": "healthy",
-        "enabled": True,
-    }
@@ -2,20 +2,39 @@
 API endpoints for AI-assisted content moderation.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from supabase import Client
 
+from app.core.llm import ClientDisconnectedError, cancel_on_disconnect
+from app.core.rate_limit import rate_limit
 from app.core.supabase import get_db
-from app.schemas.moderation import ModerationRequest, ModerationResponse
-from app.services.moderation import ModerationService
+from app.core.usage import get_usage_tracker
+from app.core.write_buffer import get_write_buffer
+from app.schemas.moderation import (
+    ModerationBatchRequest,
+    ModerationBatchResponse,
+    ModerationJobStatus,
+    ModerationJobSubmitRequest,
+    ModerationJobSubmitResponse,
+    ModerationQueueStats,
+    ModerationRequest,
+    ModerationResponse,
+)
+from app.services.moderation import (
+    ModerationService,
+    get_verdict_cache,
+    moderation_log_row,
+)
+from app.services.moderation_queue import ModerationQueue
 
 router = APIRouter()
 
 
 @router.post("/moderate", response_model=ModerationResponse)
+@rate_limit(cost=5)
 async def moderate_content(
     request: ModerationRequest,
-    db: Client = Depends(get_db),
+    http_request: Request,
 ) -> ModerationResponse:
     """
     Analyze content and flag potential concerns for moderator review.
@@ -40,16 +59,18 @@ async def moderate_content(
     """
     try:
         service = ModerationService()
-        result = await service.moderate_content(
-            content=request.content,
-            content_type=request.content_type,
-            author_id=request.author_id,
+        result = await cancel_on_disconnect(
+            http_request,
+            service.moderate_content(
+                content=request.content,
+                content_type=request.content_type,
+                author_id=request.author_id,
+            ),
         )
 
         # Optionally log moderation result to database
         if request.content_id and result.flagged:
             await _log_moderation_flag(
-                db=db,
                 content_id=request.content_id,
                 content_type=request.content_type,
                 result=result,
@@ -57,6 +78,54 @@ async def moderate_content(
 
         return result
 
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Moderation service error: {str(e)}",
+        )
+
+
+@router.post("/moderate/batch", response_model=ModerationBatchResponse)
+@rate_limit(cost=20)
+async def moderate_content_batch(
+    request: ModerationBatchRequest,
+    http_request: Request,
+) -> ModerationBatchResponse:
+    """
+    Analyze many items at once and flag potential concerns for moderator review.
+
+    Intended for short items (comments, prayer requests) and for backfilling
+    moderation over existing posts and comments. Several items are packed
+    into each AI call; results are returned in the same order as the
+    request items.
+
+    **Returns:**
+    - results: One moderation result per item, in request order
+
+    **Important:** Final moderation decisions are made by human moderators
+    using wisdom, discernment, and community context.
+    """
+    try:
+        service = ModerationService()
+        results = await cancel_on_disconnect(
+            http_request,
+            service.moderate_batch(request.items),
+        )
+
+        for item, result in zip(request.items, results):
+            if item.content_id and result.flagged:
+                await _log_moderation_flag(
+                    content_id=item.content_id,
+                    content_type=item.content_type,
+                    result=result,
+                )
+
+        return ModerationBatchResponse(results=results)
+
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="Client closed request")
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -64,8 +133,86 @@ async def moderate_content(
         )
 
 
+@router.post("/jobs", response_model=ModerationJobSubmitResponse, status_code=202)
+@rate_limit(cost=5)
+async def submit_moderation_jobs(
+    request: ModerationJobSubmitRequest,
+    db: Client = Depends(get_db),
+) -> ModerationJobSubmitResponse:
+    """
+    Queue content for asynchronous moderation.
+
+    Returns immediately with one job ID per item. Background workers
+    moderate the queued items at a controlled rate and write flagged
+    results to the moderation log.
+
+    **Getting results:**
+    - Poll `GET /moderation/jobs/{job_id}`, or
+    - Provide `webhook_url` to receive a POST with `{"jobs": [...]}` when
+      jobs complete
+    """
+    try:
+        queue = ModerationQueue(db)
+        job_ids = await queue.submit(
+            items=request.items,
+            webhook_url=str(request.webhook_url) if request.webhook_url else None,
+        )
+        return ModerationJobSubmitResponse(job_ids=job_ids)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Moderation queue error: {str(e)}",
+        )
+
+
+@router.get("/jobs/stats", response_model=ModerationQueueStats)
+async def moderation_queue_stats(
+    db: Client = Depends(get_db),
+) -> ModerationQueueStats:
+    """
+    Moderation queue depth and lag.
+
+    **Returns:**
+    - queued / processing: Current job counts
+    - lag_seconds: Age of the oldest job still waiting
+    - workers, processed, failed: Counters for this API process
+    """
+    try:
+        return await ModerationQueue(db).stats()
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Moderation queue error: {str(e)}",
+        )
+
+
+@router.get("/jobs/{job_id}", response_model=ModerationJobStatus)
+async def get_moderation_job(
+    job_id: str,
+    db: Client = Depends(get_db),
+) -> ModerationJobStatus:
+    """
+    Get the status and result of a queued moderation job.
+
+    **Status values:** queued, processing, completed, failed
+    """
+    try:
+        return await ModerationQueue(db).get_job(job_id)
+
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Moderation queue error: {str(e)}",
+        )
+
+
 async def _log_moderation_flag(
-    db: Client,
     content_id: str,
     content_type: str,
     result: ModerationResponse,
@@ -73,23 +220,13 @@ async def _log_moderation_flag(
     """
     Log moderation flag to database for moderator review.
 
-    Creates entry in moderation_log table for moderators to review.
+    Queues an entry for the moderation_log table; rows are written in
+    batches by the shared write buffer, off the request path.
     """
     try:
-        flag_data = {
-            "content_type": content_type,
-            "content_id": content_id,
-            "flagged_by": "ai_assistant",
-            "reason": result.recommendation,
-            "details": {
-                "flags": [flag.model_dump() for flag in result.flags],
-                "overall_score": result.overall_score,
-                "reasoning": result.reasoning,
-            },
-            "status": "pending",
-        }
-
-        db.table("moderation_log").insert(flag_data).execute()
+        flag_data = moderation_log_row(content_id, content_type, result)
+
+        await get_write_buffer("moderation_log").add(flag_data)
 
     except Exception as e:
         # Log error but don't fail the request
@@ -97,10 +234,15 @@ async def _log_moderation_flag(
 
 
 @router.get("/health")
+@rate_limit(cost=0)
 async def moderation_health() -> dict:
     """Health check for moderation service."""
+    cache = get_verdict_cache()
     return {
         "service": "moderation",
         "status": "healthy",
         "enabled": True,
+        "cache": cache.stats() if cache is not None else None,
+        "log_buffer": get_write_buffer("moderation_log").stats(),
+        "llm_usage": get_usage_tracker().stats("moderation"),
     }
@@ -2,20 +2,38 @@
 API endpoints for Scripture Context Assistant.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from supabase import Client
-
-from app.core.supabase import get_db
-from app.schemas.scripture import ScriptureContextRequest, ScriptureContextResponse
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.core.auth import require_service_role
+from app.core.llm import ClientDisconnectedError, cancel_on_disconnect
+from app.core.rate_limit import rate_limit
+from app.core.usage import get_usage_tracker
+from app.schemas.scripture import (
+    ScriptureCacheInvalidateRequest,
+    ScriptureContextRequest,
+    ScriptureContextResponse,
+)
 from app.services.scripture_assistant import ScriptureAssistant
+from app.services.scripture_analytics import (
+    get_scripture_analytics,
+    read_rollup,
+    record_scripture_query,
+)
+from app.services.scripture_cache import get_answer_cache
 
 router = APIRouter()
 
 
 @router.post("/context", response_model=ScriptureContextResponse)
+@rate_limit(cost=10)
 async def get_scripture_context(
     request: ScriptureContextRequest,
-    db: Client = Depends(get_db),
+    http_request: Request,
 ) -> ScriptureContextResponse:
     """
     Get biblical insights, scripture references, and theological guidance
@@ -43,52 +61,169 @@ async def get_scripture_context(
     """
     try:
         assistant = ScriptureAssistant()
-        result = await assistant.get_scripture_context(
+        result = await cancel_on_disconnect(
+            http_request,
+            assistant.get_scripture_context(
+                query=request.query,
+                context=request.context,
+                content_type=request.content_type,
+                bible_version=request.bible_version or "ESV",
+            ),
+        )
+
+        record_scripture_query(
             query=request.query,
-            context=request.context,
             content_type=request.content_type,
             bible_version=request.bible_version or "ESV",
+            context=request.context,
+            response=result,
         )
 
-        # Optionally log scripture queries for analytics
-        await _log_scripture_query(
-            db=db,
+        return result
+
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Scripture assistant error: {str(e)}",
+        )
+
+
+@router.post("/context/stream")
+@rate_limit(cost=10)
+async def stream_scripture_context(
+    request: ScriptureContextRequest,
+    format: str = Query("sse", pattern="^(sse|ndjson)$"),
+) -> StreamingResponse:
+    """
+    Streaming variant of /context.
+
+    Sections are sent as soon as they are generated instead of after the
+    whole answer, as Server-Sent Events (`format=sse`, default) or
+    newline-delimited JSON (`format=ndjson`, one `{"event", "data"}`
+    object per line).
+
+    **Events:** `summary`, `biblical_principle` (one per principle),
+    `scripture_reference` (one per reference), `theological_insights`,
+    `practical_application`, `further_study` (one per suggestion),
+    `related_content` (related community posts and projects, if any),
+    then `done` with the complete response, or `error`.
+    """
+    events = ScriptureAssistant().stream_scripture_context(
+        query=request.query,
+        context=request.context,
+        content_type=request.content_type,
+        bible_version=request.bible_version or "ESV",
+    )
+
+    return StreamingResponse(
+        _encode_events(_record_stream(events, request), format),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _record_stream(
+    events: AsyncIterator[tuple],
+    request: ScriptureContextRequest,
+) -> AsyncIterator[tuple]:
+    """Pass events through, recording the request once the stream ends."""
+    response = None
+    try:
+        async for event, data in events:
+            if event == "done":
+                response = data
+            yield event, data
+    finally:
+        record_scripture_query(
             query=request.query,
             content_type=request.content_type,
+            bible_version=request.bible_version or "ESV",
+            context=request.context,
+            response=response,
+            stream=True,
         )
 
-        return result
+
+async def _encode_events(
+    events: AsyncIterator[tuple],
+    format: str,
+) -> AsyncIterator[str]:
+    """Serialize assistant stream events as SSE or NDJSON."""
+    async for event, data in events:
+        if isinstance(data, BaseModel):
+            data = data.model_dump(mode="json")
+        payload = json.dumps(data)
+        if format == "sse":
+            yield f"event: {event}\ndata: {payload}\n\n"
+        else:
+            yield json.dumps({"event": event, "data": data}) + "\n"
+
+
+@router.post("/cache/invalidate", dependencies=[Depends(require_service_role)])
+@rate_limit(cost=5)
+async def invalidate_scripture_cache(
+    request: ScriptureCacheInvalidateRequest,
+) -> dict:
+    """
+    Invalidate cached assistant answers.
+
+    Requires the service role key as a bearer token.
+
+    With a `query`, removes the answer for that query (same normalization,
+    context, content type and Bible version as the original request).
+    Without one, clears every cached answer.
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        raise HTTPException(status_code=400, detail="Scripture answer cache is disabled")
+
+    try:
+        await cache.invalidate(
+            query=request.query,
+            context=request.context,
+            content_type=request.content_type,
+            bible_version=request.bible_version or "ESV",
+        )
+        return {"invalidated": "query" if request.query else "all"}
 
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Scripture assistant error: {str(e)}",
+            detail=f"Cache invalidation error: {str(e)}",
         )
 
 
+@router.get("/analytics", dependencies=[Depends(require_service_role)])
+@rate_limit(cost=1)
+async def scripture_analytics() -> dict:
+    """
+    Popular queries, topics and referenced passages.
+
+    Served from the latest periodic rollup over the last
+    SCRIPTURE_ANALYTICS_WINDOW_DAYS days. Requires the service role key
+    as a bearer token, since the questions people ask can be personal.
+    """
+    rollup = read_rollup()
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="No analytics rollup yet")
+    rollup.pop("warm_candidates", None)
+    return rollup
+
+
 @router.get("/health")
+@rate_limit(cost=0)
 async def scripture_health() -> dict:
     """Health check for scripture assistant service."""
+    cache = get_answer_cache()
+    analytics = get_scripture_analytics()
     return {
         "service": "scripture_assistant",
         "status": "healthy",
         "enabled": True,
+        "answer_cache": cache.stats() if cache is not None else None,
+        "llm_usage": get_usage_tracker().stats("scripture"),
+        "analytics": analytics.stats() if analytics is not None else None,
     }
 
-
-async def _log_scripture_query(
-    db: Client,
-    query: str,
-    content_type: str = None,
-) -> None:
-    """
-    Log scripture queries for analytics (optional).
-
-    Helps understand what topics the community is studying.
-    """
-    try:
-        # TODO: Implement analytics logging if desired
-        # Could track popular topics, frequently requested passages, etc.
-        pass
-    except Exception as e:
-        print(f"Error logging scripture query: {e}")
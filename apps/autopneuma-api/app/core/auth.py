@@ -0,0 +1,39 @@
+"""
+Authorization for administrative endpoints.
+
+Operational routes (cache invalidation, analytics) are not for public
+clients. They require the Supabase service role key as a bearer token,
+which only the backend and trusted operators hold.
+"""
+
+import secrets
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import settings
+
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def require_service_role(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> None:
+    """
+    Dependency rejecting requests without the service role key.
+
+    Raises:
+        HTTPException 401 if no bearer token is sent, 403 if it is wrong
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Service role authorization required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not secrets.compare_digest(
+        credentials.credentials.encode(), settings.SUPABASE_SERVICE_ROLE_KEY.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid service role key")
@@ -0,0 +1,242 @@
+"""
+Result caching utilities.
+
+Provides an in-memory LRU cache with TTL eviction and an optional
+Redis-backed shared tier so every worker process can reuse results.
+The shared tier is only enabled when REDIS_URL is set and the `redis`
+package is installed.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+from app.core.redis_client import get_redis_client
+
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Bounded in-memory LRU cache with per-entry expiry.
+
+    Not thread-safe; intended for use from the event loop.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[V]:
+        """Return a live entry and mark it most recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """Insert or replace an entry, evicting the least recently used."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SharedCache:
+    """
+    Redis-backed cache tier shared by all workers.
+
+    Errors are logged and treated as misses so an unavailable Redis never
+    fails a request.
+    """
+
+    def __init__(self, redis: Any, namespace: str):
+        self.namespace = namespace
+        self._redis = redis
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"autopneuma:{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        """Fetch a raw string value."""
+        try:
+            value = await self._redis.get(self._key(key))
+        except Exception as e:
+            self.errors += 1
+            print(f"Shared cache read error: {e}")
+            return None
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        """Store a raw string value with expiry."""
+        try:
+            await self._redis.set(self._key(key), value, ex=max(int(ttl_seconds), 1))
+        except Exception as e:
+            self.errors += 1
+            print(f"Shared cache write error: {e}")
+
+    async def delete(self, key: str) -> None:
+        """Remove a value."""
+        try:
+            await self._redis.delete(self._key(key))
+        except Exception as e:
+            self.errors += 1
+            print(f"Shared cache delete error: {e}")
+
+    async def clear(self) -> int:
+        """Remove every value in the namespace; returns the number removed."""
+        removed = 0
+        try:
+            async for key in self._redis.scan_iter(match=self._key("*"), count=500):
+                removed += await self._redis.delete(key)
+        except Exception as e:
+            self.errors += 1
+            print(f"Shared cache clear error: {e}")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/error counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+class TieredCache(Generic[V]):
+    """
+    Two-tier cache: local LRU in front of an optional shared tier.
+
+    Values are serialized with `dumps`/`loads` for the shared tier;
+    shared-tier hits are promoted into the local tier. A shorter
+    `local_ttl_seconds` bounds how long other workers can keep serving a
+    value after it was deleted from the shared tier.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int,
+        ttl_seconds: float,
+        dumps: Callable[[V], str],
+        loads: Callable[[str], V],
+        local_ttl_seconds: Optional[float] = None,
+    ):
+        self.local: TTLCache[V] = TTLCache(
+            max_entries, min(ttl_seconds, local_ttl_seconds or ttl_seconds)
+        )
+        self.shared = get_shared_cache(namespace)
+        self.ttl_seconds = ttl_seconds
+        self._dumps = dumps
+        self._loads = loads
+
+    async def get(self, key: str) -> Optional[V]:
+        """Look up a value, local tier first."""
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        raw = await self.shared.get(key)
+        if raw is None:
+            return None
+
+        try:
+            value = self._loads(raw)
+        except Exception as e:
+            print(f"Shared cache decode error: {e}")
+            return None
+
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: V) -> None:
+        """Store a value in both tiers."""
+        self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.set(key, self._dumps(value), self.ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        """Remove a value from both tiers."""
+        self.local.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(key)
+
+    async def clear(self) -> None:
+        """Remove every value from both tiers."""
+        self.local.clear()
+        if self.shared is not None:
+            await self.shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for both tiers."""
+        return {
+            "local": self.local.stats(),
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+
+_shared_caches: Dict[str, SharedCache] = {}
+
+
+def get_shared_cache(namespace: str) -> Optional[SharedCache]:
+    """
+    Return the shared cache tier for a namespace, or None if disabled.
+
+    The tier is enabled when REDIS_URL is configured and the optional
+    `redis` package is importable.
+    """
+    redis = get_redis_client()
+    if redis is None:
+        return None
+
+    if namespace not in _shared_caches:
+        _shared_caches[namespace] = SharedCache(redis, namespace)
+    return _shared_caches[namespace]
@@ -0,0 +1,103 @@
+"""
+Circuit breaker for calls to external services.
+
+A breaker counts consecutive failures of one dependency. After
+`failure_threshold` of them it opens and callers skip the dependency
+instead of waiting on it; after `reset_seconds` it lets a single trial
+call through (half-open). A successful trial closes the breaker, a failed
+one opens it again. Callers with richer signals (rolling error rates,
+latency percentiles) can also `trip` it directly.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one dependency."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.opened_count = 0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go ahead now.
+
+        In the half-open state only one trial call is let through until
+        its outcome is recorded.
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker."""
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker at the threshold."""
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_in_flight:
+                self.opened_count += 1
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def trip(self) -> None:
+        """Open a closed breaker now, e.g. on a rolling error rate."""
+        if self.opened_at is None:
+            self.opened_count += 1
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Give up a trial call whose outcome is unknown (e.g. cancelled)."""
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """State and counters for health endpoints."""
+        state = self.state
+        retry_in = None
+        if state == OPEN:
+            retry_in = round(self.reset_seconds - (time.monotonic() - self.opened_at), 1)
+        return {
+            "state": state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.opened_count,
+            "retry_in_seconds": retry_in,
+        }
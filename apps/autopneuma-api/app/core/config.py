@@ -27,23 +27,171 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_SERVICE_ROLE_KEY: str
+    SUPABASE_POOL_SIZE: int = 20
+    SUPABASE_KEEPALIVE_SECONDS: float = 30.0
+    SUPABASE_TIMEOUT_SECONDS: float = 10.0
 
     # AI Services
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
     OPENAI_MODERATION_MODEL: str = "gpt-4-turbo-preview"
 
+    # LLM Client
+    LLM_MAX_CONCURRENCY: int = 256
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_USAGE_LOG_ENABLED: bool = True  # one llm_usage row per call
+
+    # LLM Providers (routed by measured latency, error rate and cost)
+    LLM_PROVIDERS: list[str] = ["openai"]  # openai, anthropic, local, stub; order breaks ties
+    ANTHROPIC_API_KEY: Optional[str] = None
+    ANTHROPIC_MODEL: str = "claude-3-5-sonnet-latest"  # used when a request is routed to Anthropic
+    ANTHROPIC_MAX_TOKENS: int = 4096
+    LOCAL_LLM_BASE_URL: str = "http://localhost:11434/v1"  # OpenAI-compatible server
+    LOCAL_LLM_MODEL: str = "llama3.1"
+    LLM_COST_PER_1K_TOKENS: dict[str, float] = {"openai": 0.02, "anthropic": 0.01, "local": 0.0, "stub": 0.0}
+    LLM_ROUTER_INITIAL_LATENCY_SECONDS: float = 2.0  # estimate before a backend is measured
+    LLM_ROUTER_EWMA_ALPHA: float = 0.2
+    LLM_ROUTER_ERROR_PENALTY: float = 10.0  # seconds added at a 100% error rate
+    LLM_ROUTER_COST_WEIGHT: float = 10.0  # seconds added per dollar per 1k tokens
+    LLM_ROUTER_EXPLORE_RATE: float = 0.05  # share of calls sent to the runner-up
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_DELAY_MULTIPLIER: float = 2.0  # hedge after this multiple of the usual latency
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failures before skipping a backend
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Prompt Budgets (tokens; counted with tiktoken when installed)
+    CONTEXT_OVERFLOW_STRATEGY: str = "head_tail"  # head, head_tail, summarize
+    CONTEXT_SUMMARY_MODEL: Optional[str] = None  # defaults to OPENAI_MODEL
+
     # Moderation Settings
     MODERATION_CONFIDENCE_THRESHOLD: float = 0.7
     MODERATION_ENABLED: bool = True
+    MODERATION_CACHE_ENABLED: bool = True
+    MODERATION_CACHE_MAX_ENTRIES: int = 10000
+    MODERATION_CACHE_TTL_SECONDS: int = 86400
+    MODERATION_BATCH_SIZE: int = 20
+    MODERATION_BATCH_MAX_CHARS: int = 12000
+    MODERATION_BATCH_ITEM_MAX_CHARS: int = 2000
+    MODERATION_MAX_CONTENT_TOKENS: int = 3000  # longer content keeps its start and end
+    MODERATION_PREFILTER_ENABLED: bool = True
+    MODERATION_PREFILTER_SPAM_THRESHOLD: float = 0.95
+    MODERATION_PREFILTER_CLEAN_MAX_CHARS: int = 120  # only stock phrases are settled as clean
+    MODERATION_PREFILTER_MAX_LINK_DENSITY: float = 0.5
+
+    # Moderation Job Queue
+    MODERATION_QUEUE_ENABLED: bool = True
+    MODERATION_QUEUE_WORKERS: int = 4
+    MODERATION_QUEUE_BATCH_SIZE: int = 20
+    MODERATION_QUEUE_POLL_SECONDS: float = 2.0
+    MODERATION_QUEUE_MAX_ITEMS_PER_SECOND: float = 20.0
+    MODERATION_QUEUE_MAX_ATTEMPTS: int = 3
+    MODERATION_QUEUE_VISIBILITY_TIMEOUT_SECONDS: int = 300
+    MODERATION_WEBHOOK_ALLOWED_PREFIXES: list[str] = []  # empty: any public https URL
+    MODERATION_WEBHOOK_TIMEOUT_SECONDS: float = 10.0
 
     # Scripture Context Settings
     DEFAULT_BIBLE_VERSION: str = "ESV"
-    MAX_CONTEXT_LENGTH: int = 2000
+    MAX_CONTEXT_LENGTH: int = 1000  # tokens of request context sent to the model
+    BIBLE_DATA_DIR: str = "data/bible"  # compiled verse stores ({VERSION}.verses)
+
+    # Scripture Retrieval (offline BM25 + cross-reference indexes)
+    SCRIPTURE_RETRIEVAL_ENABLED: bool = True
+    SCRIPTURE_INDEX_VERSION: str = "KJV"  # translation the BM25 index is built over
+    SCRIPTURE_RETRIEVAL_TOP_K: int = 8
+    SCRIPTURE_RETRIEVAL_CROSSREFS: int = 3  # related passages per cited passage
+    SCRIPTURE_RETRIEVAL_MODEL: Optional[str] = None  # cheaper model when candidates are supplied
+
+    # Vector Search (local CPU embeddings; requires numpy)
+    VECTOR_SEARCH_ENABLED: bool = True
+    VECTOR_INDEX_DIR: str = "data/vectors"  # built indexes ({name}/vectors.npy, ...)
+    EMBEDDING_BACKEND: str = "auto"  # auto, sentence-transformers, hashing
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # local sentence-transformers model
+    EMBEDDING_DIMENSIONS: int = 384  # hashing backend only
+    VECTOR_INDEX_NLIST: int = 0  # IVF lists; 0 = automatic (flat below 20k vectors)
+    VECTOR_INDEX_NPROBE: int = 16  # IVF lists scanned per query
+    VECTOR_RELATED_PASSAGES: int = 4  # semantic matches added to candidate passages
+    VECTOR_RELATED_CONTENT: int = 3  # related posts, blog posts and projects per answer
+    VECTOR_MIN_SCORE: float = 0.25
+
+    # Precomputed Topical Answers
+    SCRIPTURE_TOPICS_ENABLED: bool = True
+    SCRIPTURE_TOPICS_DIR: str = "data/topics"  # {VERSION}/{topic}.json + manifest.json
+    SCRIPTURE_TOPIC_VERSIONS: list[str] = ["ESV", "KJV"]  # translations to precompute
+    SCRIPTURE_TOPIC_MIN_COVERAGE: float = 0.6  # share of query words matching the topic
+
+    # Scripture Answer Cache
+    SCRIPTURE_CACHE_ENABLED: bool = True
+    SCRIPTURE_CACHE_MAX_ENTRIES: int = 5000
+    SCRIPTURE_CACHE_TTL_SECONDS: int = 604800
+    SCRIPTURE_CACHE_LOCAL_TTL_SECONDS: int = 3600
+    SCRIPTURE_CACHE_PERSISTENT: bool = True  # scripture_answer_cache table
+    SCRIPTURE_CACHE_SEMANTIC_ENABLED: bool = False  # near-duplicate lookup via embeddings
+    SCRIPTURE_CACHE_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    SCRIPTURE_CACHE_EMBEDDING_DIMENSIONS: int = 256
+    SCRIPTURE_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    SCRIPTURE_CACHE_SEMANTIC_MAX_ENTRIES: int = 2000
+
+    # Scripture Query Analytics (local append-only event log)
+    SCRIPTURE_ANALYTICS_ENABLED: bool = True
+    SCRIPTURE_ANALYTICS_DIR: str = "data/analytics"
+    SCRIPTURE_ANALYTICS_MAX_PENDING: int = 10000  # events buffered before dropping
+    SCRIPTURE_ANALYTICS_FLUSH_SECONDS: float = 30.0
+    SCRIPTURE_ANALYTICS_ROLLUP_SECONDS: int = 900
+    SCRIPTURE_ANALYTICS_WINDOW_DAYS: int = 7  # rollup window
+    SCRIPTURE_ANALYTICS_RETENTION_DAYS: int = 90
+    SCRIPTURE_ANALYTICS_TOP_N: int = 50
+    SCRIPTURE_CACHE_WARMING_ENABLED: bool = True  # answer popular uncached questions after rollups
+    SCRIPTURE_CACHE_WARMING_TOP_N: int = 10  # per rollup
+    SCRIPTURE_CACHE_WARMING_MIN_COUNT: int = 3
+
+    # Community Tool Registry (cached tool configurations)
+    TOOL_REGISTRY_MAX_ENTRIES: int = 5000
+    TOOL_REGISTRY_TTL_SECONDS: int = 300
+    TOOL_REGISTRY_NEGATIVE_TTL_SECONDS: int = 30  # unknown tool ids
+    TOOL_REGISTRY_SYNC_SECONDS: float = 5.0  # change-feed poll interval; 0 disables
+    TOOL_REGISTRY_SYNC_BATCH: int = 500
+    TOOL_LIST_COUNT: str = "exact"  # exact, planned or estimated (planner-based; flat cost)
+    TOOL_LIST_CACHE_TTL_SECONDS: int = 15
+    TOOL_LIST_CACHE_MAX_ENTRIES: int = 500
+    TOOL_SCHEMA_VALIDATION_ENABLED: bool = True  # check input/output schemas (requires `jsonschema`)
+    TOOL_SCHEMA_MAX_ERRORS: int = 10  # violations reported per document
+
+    # Community Tool Endpoint Health (per-endpoint circuit breakers)
+    TOOL_HEALTH_WINDOW: int = 50  # recent calls kept per endpoint
+    TOOL_HEALTH_WINDOW_SECONDS: int = 300
+    TOOL_BREAKER_CONSECUTIVE_FAILURES: int = 5
+    TOOL_BREAKER_MIN_CALLS: int = 10  # before error rate and p95 are trusted
+    TOOL_BREAKER_ERROR_RATE: float = 0.5
+    TOOL_BREAKER_MAX_P95_SECONDS: float = 20.0
+    TOOL_BREAKER_RESET_SECONDS: float = 30.0  # open time before probing
+    TOOL_PROBE_INTERVAL_SECONDS: float = 5.0
+    TOOL_PROBE_TIMEOUT_SECONDS: float = 5.0
+
+    # Outbound HTTP (shared pooled client for tool calls and HTTP-based providers)
+    HTTP_TIMEOUT_SECONDS: float = 30.0  # default; tools use their registered timeout
+    HTTP_MAX_CONNECTIONS: int = 200
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    HTTP_KEEPALIVE_SECONDS: float = 30.0
+    HTTP2_ENABLED: bool = True  # used with servers that offer it; requires the `h2` package
+
+    # Buffered Log Writes
+    WRITE_BUFFER_BATCH_SIZE: int = 100
+    WRITE_BUFFER_FLUSH_SECONDS: float = 1.0
+    WRITE_BUFFER_MAX_ROWS: int = 10000
+
+    # Shared Cache (optional, requires the `redis` package)
+    REDIS_URL: Optional[str] = None
 
-    # Rate Limiting
+    # Rate Limiting (per client; routes declare costs with @rate_limit)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # key clients by X-Forwarded-For
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_PER_HOUR: int = 500
+    RATE_LIMIT_BACKEND: str = "memory"  # memory or redis (uses REDIS_URL)
+    RATE_LIMIT_MAX_KEYS: int = 100000
 
     # Feature Flags
     ENABLE_SCRIPTURE_ASSISTANT: bool = True
@@ -0,0 +1,133 @@
+"""
+Local CPU text embedders.
+
+Used by the vector indexes so embeddings can be computed offline, without
+calling a hosted API. Two backends are available:
+
+- `sentence-transformers` (optional dependency): a small local model such
+  as all-MiniLM-L6-v2, run on CPU
+- `hashing`: signed feature hashing of words and subwords; no model
+  download, deterministic, and good enough for lexical similarity
+
+EMBEDDING_BACKEND selects one ("auto" prefers sentence-transformers when
+installed). Both require NumPy.
+"""
+
+import asyncio
+import hashlib
+import re
+from typing import List, Optional
+
+from app.core.config import settings
+
+try:
+    import numpy as np
+except ImportError:  # optional: required for embeddings and vector search
+    np = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # optional: better embeddings when installed
+    SentenceTransformer = None
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    Feature-hashing embedder over words, word pairs and character
+    trigrams (so "love", "loved" and "loving" share features).
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD_RE.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            if len(word) > 3:
+                padded = f"<{word}>"
+                features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """L2-normalized float32 vectors, one row per text."""
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                vectors[row, (value >> 1) % self.dimensions] += sign
+
+        # Dampen repeated terms, then normalize
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model run on CPU."""
+
+    def __init__(self, model_name: str):
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.dimensions = self._model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """L2-normalized float32 vectors, one row per text."""
+        return self._model.encode(
+            texts,
+            batch_size=64,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        ).astype(np.float32)
+
+
+_embedder = None
+
+
+def get_embedder():
+    """
+    Return the process-wide local embedder, or None if NumPy is missing.
+
+    Raises:
+        ValueError if EMBEDDING_BACKEND names an unavailable backend
+    """
+    global _embedder
+    if np is None:
+        return None
+
+    if _embedder is None:
+        backend = settings.EMBEDDING_BACKEND
+        if backend == "auto":
+            backend = "sentence-transformers" if SentenceTransformer else "hashing"
+
+        if backend == "sentence-transformers":
+            if SentenceTransformer is None:
+                raise ValueError("sentence-transformers is not installed")
+            _embedder = SentenceTransformerEmbedder(settings.EMBEDDING_MODEL)
+        elif backend == "hashing":
+            _embedder = HashingEmbedder(settings.EMBEDDING_DIMENSIONS)
+        else:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+
+    return _embedder
+
+
+def embedder_name() -> Optional[str]:
+    """Name of the configured embedder, or None if unavailable."""
+    embedder = get_embedder()
+    return embedder.name if embedder is not None else None
+
+
+async def embed_texts(texts: List[str]) -> Optional["np.ndarray"]:
+    """Embed texts off the event loop; None if no embedder is available."""
+    embedder = get_embedder()
+    if embedder is None:
+        return None
+    return await asyncio.to_thread(embedder.embed, texts)
@@ -0,0 +1,91 @@
+"""
+Shared outbound HTTP client.
+
+One pooled `httpx.AsyncClient` serves every outbound call (community
+tool endpoints, LLM providers spoken to over plain HTTP), so repeat calls
+to the same host reuse warm keep-alive connections instead of paying a
+new TCP and TLS handshake each time. The client is created on startup
+and closed on shutdown.
+
+httpx keeps a separate connection pool per origin; HTTP_MAX_CONNECTIONS
+bounds them all together and HTTP_MAX_CONNECTIONS_PER_HOST stops one busy
+host from taking every connection. HTTP/2 is negotiated with servers that
+offer it when the `h2` package is installed.
+"""
+
+import asyncio
+import ipaddress
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # optional: HTTP/2 support for httpx
+    h2 = None
+
+
+_client: Optional[httpx.AsyncClient] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_SECONDS,
+            ),
+            http2=settings.HTTP2_ENABLED and h2 is not None,
+        )
+    return _client
+
+
+def host_slot(url: str) -> asyncio.Semaphore:
+    """Semaphore bounding concurrent requests to the host of a URL."""
+    host = urlsplit(url).netloc
+    if host not in _host_slots:
+        _host_slots[host] = asyncio.Semaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+    return _host_slots[host]
+
+
+async def ensure_public_url(url: str) -> None:
+    """
+    Check that a caller-supplied URL points at a public host.
+
+    Every address the host resolves to must be globally routable, so
+    loopback, private, link-local (cloud metadata) and reserved addresses
+    are refused.
+
+    Raises:
+        ValueError if the URL is malformed, does not resolve, or resolves
+        to a non-public address
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Not an http(s) URL: {url}")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Cannot resolve {parts.hostname}: {e}")
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"{parts.hostname} resolves to a non-public address")
+
+
+async def close_http_client() -> None:
+    """Close the process-wide HTTP client (called on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_slots.clear()
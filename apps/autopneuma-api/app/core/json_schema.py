@@ -0,0 +1,91 @@
+"""
+Compiled JSON Schema validation.
+
+Schemas are compiled once into validator objects (the draft is taken
+from the schema's `$schema`, defaulting to the latest) and reused, so
+checking a document costs a walk of the document rather than a parse of
+the schema. Valid documents take the fast `is_valid` path; the full
+error report is only built for invalid ones.
+
+Requires the `jsonschema` package. Without it `compile_schema` returns
+None and callers skip validation.
+"""
+
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+try:
+    import jsonschema
+except ImportError:  # optional: tool input/output validation
+    jsonschema = None
+
+
+class SchemaValidationError(ValueError):
+    """Raised when a document does not match its schema."""
+
+    def __init__(self, message: str, errors: List[Dict[str, str]]):
+        super().__init__(message)
+        self.errors = errors
+
+
+def available() -> bool:
+    """Whether schema validation is available."""
+    return jsonschema is not None
+
+
+def check_schema(schema: Dict[str, Any]) -> None:
+    """
+    Check that a schema is itself valid.
+
+    Raises:
+        ValueError describing the problem
+    """
+    if jsonschema is None:
+        return
+    cls = jsonschema.validators.validator_for(schema)
+    try:
+        cls.check_schema(schema)
+    except jsonschema.SchemaError as e:
+        location = "/".join(str(part) for part in e.absolute_path)
+        raise ValueError(f"Invalid JSON Schema at '/{location}': {e.message}")
+
+
+def compile_schema(schema: Dict[str, Any]) -> Optional[Any]:
+    """
+    Compile a schema into a reusable validator.
+
+    Returns:
+        The validator, or None if jsonschema is not installed or the
+        schema is invalid
+    """
+    if jsonschema is None:
+        return None
+    cls = jsonschema.validators.validator_for(schema)
+    try:
+        cls.check_schema(schema)
+    except jsonschema.SchemaError as e:
+        print(f"Skipping invalid JSON Schema: {e.message}")
+        return None
+    return cls(schema)
+
+
+def validate(validator: Any, instance: Any, max_errors: int = 10) -> List[Dict[str, str]]:
+    """
+    Validate a document with a compiled validator.
+
+    Returns:
+        Up to max_errors errors, each with the JSON pointer of the
+        offending value (`path`), the failing keyword (`validator`) and a
+        message; empty if the document is valid
+    """
+    if validator.is_valid(instance):
+        return []
+
+    return [
+        {
+            "path": "/" + "/".join(str(part) for part in error.absolute_path),
+            "validator": str(error.validator),
+            "message": error.message,
+        }
+        for error in islice(validator.iter_errors(instance), max_errors)
+    ]
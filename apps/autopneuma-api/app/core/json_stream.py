@@ -0,0 +1,159 @@
+"""
+Incremental parser for a streamed top-level JSON object.
+
+LLM output in JSON mode arrives a few characters at a time. This parser
+is fed those chunks and emits each top-level field as soon as its value
+is complete, and each element of a top-level array as soon as that
+element is complete, so callers can forward partial results without
+waiting for the closing brace. Every character is scanned once.
+"""
+
+import json
+from typing import Any, List, NamedTuple, Optional
+
+
+class JsonEvent(NamedTuple):
+    """A completed piece of the streamed object.
+
+    kind is "field" for a complete top-level value or "item" for one
+    element of a top-level array.
+    """
+
+    kind: str
+    key: str
+    value: Any
+
+
+# Positions within the top-level object
+_EXPECT_KEY = 0
+_IN_KEY = 1
+_EXPECT_COLON = 2
+_EXPECT_VALUE = 3
+_IN_VALUE = 4
+_IN_ARRAY = 5
+_DONE = 6
+
+
+class JsonStreamParser:
+    """
+    Feed chunks of a JSON object, collect completed fields and items.
+
+    Text before the opening brace (e.g. a stray code fence) is ignored.
+    A malformed value raises json.JSONDecodeError from feed().
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = _EXPECT_KEY
+        self._key: Optional[str] = None
+        self._start: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the closing brace of the object has been seen."""
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> List[JsonEvent]:
+        """Consume a chunk and return the events it completed."""
+        self._buf += chunk
+        events: List[JsonEvent] = []
+        buf = self._buf
+        i = self._pos
+
+        while i < len(buf) and self._state != _DONE:
+            c = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._state == _IN_KEY and self._depth == 1:
+                        self._key = json.loads(buf[self._start:i + 1])
+                        self._start = None
+                        self._state = _EXPECT_COLON
+                i += 1
+                continue
+
+            if self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+                i += 1
+                continue
+
+            if self._depth == 1:
+                if self._state == _EXPECT_KEY:
+                    if c == '"':
+                        self._state, self._start, self._in_string = _IN_KEY, i, True
+                    elif c == "}":
+                        self._depth, self._state = 0, _DONE
+                elif self._state == _EXPECT_COLON:
+                    if c == ":":
+                        self._state = _EXPECT_VALUE
+                elif self._state == _EXPECT_VALUE:
+                    if c == "[":
+                        self._depth, self._state = 2, _IN_ARRAY
+                    elif not c.isspace():
+                        self._state, self._start = _IN_VALUE, i
+                        self._open(c)
+                elif self._state == _IN_VALUE:
+                    if c in ",}":
+                        events.append(JsonEvent("field", self._key, self._value(buf, i)))
+                        self._state = _EXPECT_KEY
+                        if c == "}":
+                            self._depth, self._state = 0, _DONE
+                    else:
+                        self._open(c)
+                elif self._state == _IN_ARRAY:
+                    # Back at depth 1 after the array closed
+                    if c in ",}":
+                        self._state = _EXPECT_KEY
+                        if c == "}":
+                            self._depth, self._state = 0, _DONE
+                i += 1
+                continue
+
+            # Inside a value: nested object, or an array at depth 2
+            if self._state == _IN_ARRAY and self._depth == 2:
+                if c in ",]":
+                    if self._start is not None:
+                        events.append(JsonEvent("item", self._key, self._value(buf, i)))
+                    if c == "]":
+                        self._depth = 1
+                elif self._start is None and not c.isspace():
+                    self._start = i
+                    self._open(c)
+                else:
+                    self._open(c)
+            else:
+                self._open(c)
+                if c in "}]":
+                    self._depth -= 1
+            i += 1
+
+        # Drop consumed text that no pending value refers to
+        keep = self._start if self._start is not None else i
+        self._buf = buf[keep:]
+        self._pos = i - keep
+        if self._start is not None:
+            self._start = 0
+        return events
+
+    def _open(self, c: str) -> None:
+        """Track strings and nesting inside a value."""
+        if c == '"':
+            self._in_string = True
+        elif c in "{[":
+            self._depth += 1
+
+    def _value(self, buf: str, end: int) -> Any:
+        """Decode the pending value ending before `end`."""
+        value = json.loads(buf[self._start:end])
+        self._start = None
+        return value
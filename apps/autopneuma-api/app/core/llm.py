@@ -0,0 +1,506 @@
+"""
+Shared asynchronous LLM client.
+
+Completions never block the event loop. A process-wide semaphore bounds
+the number of in-flight completions and every call carries its own
+timeout. Token usage and latency of every call are recorded per calling
+feature (see app.core.usage).
+
+Calls are routed across the backends in LLM_PROVIDERS (see
+app.core.llm_providers). Each backend keeps an exponentially weighted
+moving average of its latency and error rate; requests go to the backend
+with the best score (latency, plus penalties for errors and cost) and
+fail over to the next one when it errors. Every backend sits behind a
+circuit breaker, so one that keeps failing is skipped until it recovers.
+With LLM_HEDGE_ENABLED, a completion that runs well past the chosen
+backend's usual latency is also sent to the next backend and the first
+answer wins.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, TypeVar
+
+from fastapi import Request
+
+from app.core.circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError
+from app.core.config import settings
+from app.core.llm_providers import LLMCompletion, LLMProvider, build_provider
+from app.core.tokens import count_message_tokens, count_tokens
+from app.core.usage import get_usage_tracker
+
+
+T = TypeVar("T")
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the HTTP client went away before the LLM call finished."""
+
+
+class ProviderRoute:
+    """Measured latency, error rate and breaker state of one backend."""
+
+    def __init__(self, provider: LLMProvider):
+        self.provider = provider
+        self.latency = settings.LLM_ROUTER_INITIAL_LATENCY_SECONDS
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.breaker = CircuitBreaker(
+            provider.name,
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_seconds=settings.LLM_BREAKER_RESET_SECONDS,
+        )
+
+    def observe(self, latency: float, failed: bool) -> None:
+        """Fold one call's outcome into the moving averages."""
+        alpha = settings.LLM_ROUTER_EWMA_ALPHA
+        self.calls += 1
+        self.error_rate = (1 - alpha) * self.error_rate + alpha * float(failed)
+        if failed:
+            self.errors += 1
+            self.breaker.record_failure()
+        else:
+            self.latency = (1 - alpha) * self.latency + alpha * latency
+            self.breaker.record_success()
+
+    def observe_latency(self, latency: float) -> None:
+        """Fold in a lower bound on latency from a call that was abandoned."""
+        alpha = settings.LLM_ROUTER_EWMA_ALPHA
+        self.latency = (1 - alpha) * self.latency + alpha * max(latency, self.latency)
+
+    def score(self) -> float:
+        """Expected cost of a call in seconds; lower is better."""
+        return (
+            self.latency
+            + settings.LLM_ROUTER_ERROR_PENALTY * self.error_rate
+            + settings.LLM_ROUTER_COST_WEIGHT * self.provider.cost_per_1k_tokens
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider.name,
+            "model": self.provider.default_model,
+            "latency_ms": round(self.latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "calls": self.calls,
+            "errors": self.errors,
+            "hedges": self.hedges,
+            "circuit": self.breaker.stats(),
+        }
+
+
+class LLMClient:
+    """
+    Non-blocking chat completion client shared by all services.
+
+    Concurrency is bounded by LLM_MAX_CONCURRENCY; callers beyond that
+    limit wait for a free slot instead of piling requests on the provider.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        providers: Optional[List[LLMProvider]] = None,
+    ):
+        self.timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        if providers is None:
+            providers = [build_provider(name) for name in settings.LLM_PROVIDERS]
+        self.routes = [ProviderRoute(provider) for provider in providers]
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+
+    def _candidates(self, embeddings: bool = False) -> List[ProviderRoute]:
+        """
+        Backends to try, best first.
+
+        Backends with an open circuit are left out. Occasionally the
+        runner-up goes first so a backend's latency estimate recovers
+        after a slow spell.
+        """
+        routes = [
+            route for route in self.routes
+            if route.breaker.state != OPEN
+            and (route.provider.supports_embeddings or not embeddings)
+        ]
+        if not routes:
+            raise CircuitOpenError("All LLM providers are unavailable")
+        # sorted() is stable, so LLM_PROVIDERS order breaks ties
+        routes = sorted(routes, key=lambda route: route.score())
+        if len(routes) > 1 and random.random() < settings.LLM_ROUTER_EXPLORE_RATE:
+            routes[0], routes[1] = routes[1], routes[0]
+        return routes
+
+    async def chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        feature: str = "other",
+    ) -> LLMCompletion:
+        """
+        Run a chat completion without blocking the event loop.
+
+        Args:
+            model: Model name to call; backends that do not serve it use
+                their own default model
+            messages: Chat messages
+            temperature: Sampling temperature
+            response_format: Optional response format (e.g. JSON mode)
+            timeout: Per-call timeout in seconds, including time spent
+                waiting for a concurrency slot and on failover
+            feature: Calling feature, for usage accounting
+
+        Returns:
+            LLMCompletion with the message content and token usage
+
+        Raises:
+            asyncio.TimeoutError if the call does not finish in time, or
+            the last backend's error if every backend failed
+        """
+        return await asyncio.wait_for(
+            self._bounded_completion(
+                model, messages, temperature, response_format, feature
+            ),
+            timeout=timeout or self.timeout,
+        )
+
+    async def _bounded_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[Dict[str, Any]],
+        feature: str,
+    ) -> LLMCompletion:
+        """Acquire a concurrency slot and route the call."""
+        queued_at = time.perf_counter()
+        async with self._semaphore:
+            self.in_flight += 1
+            queue_ms = (time.perf_counter() - queued_at) * 1000
+            try:
+                return await self._routed_completion(
+                    model, messages, temperature, response_format, feature, queue_ms
+                )
+            finally:
+                self.in_flight -= 1
+
+    async def _routed_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[Dict[str, Any]],
+        feature: str,
+        queue_ms: float,
+    ) -> LLMCompletion:
+        """Try backends in order, hedging slow calls, until one answers."""
+        candidates = iter(self._candidates())
+        pending: Dict[asyncio.Task, ProviderRoute] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> bool:
+            route = next(candidates, None)
+            if route is None:
+                return False
+            task = asyncio.ensure_future(self._attempt(
+                route, model, messages, temperature, response_format, feature, queue_ms
+            ))
+            pending[task] = route
+            return True
+
+        launch()
+        hedging = settings.LLM_HEDGE_ENABLED
+        try:
+            while pending:
+                hedge_delay = None
+                if hedging and len(pending) == 1:
+                    primary = next(iter(pending.values()))
+                    hedge_delay = max(
+                        settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+                        settings.LLM_HEDGE_DELAY_MULTIPLIER * primary.latency,
+                    )
+                done, _ = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Primary is running long: race the next backend against it
+                    if launch():
+                        list(pending.values())[-1].hedges += 1
+                    else:
+                        hedging = False
+                    continue
+                winner = None
+                for task in done:
+                    pending.pop(task)
+                    if task.exception() is None:
+                        winner = task
+                    else:
+                        last_error = task.exception()
+                if winner is not None:
+                    return winner.result()
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error or CircuitOpenError("All LLM providers are unavailable")
+
+    async def _attempt(
+        self,
+        route: ProviderRoute,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[Dict[str, Any]],
+        feature: str,
+        queue_ms: float,
+    ) -> LLMCompletion:
+        """One call to one backend, recorded in its route and usage."""
+        if not route.breaker.allow():
+            raise CircuitOpenError(f"{route.provider.name} circuit is open")
+        provider_model = route.provider.resolve_model(model)
+        started_at = time.perf_counter()
+        try:
+            completion = await route.provider.complete(
+                provider_model, messages, temperature, response_format
+            )
+        except asyncio.CancelledError:
+            # Lost a hedge race or timed out overall: slow, but not an error
+            route.observe_latency(time.perf_counter() - started_at)
+            route.breaker.release()
+            raise
+        except Exception as e:
+            latency = time.perf_counter() - started_at
+            route.observe(latency, failed=True)
+            print(f"LLM provider {route.provider.name} error: {e}")
+            await get_usage_tracker().record(
+                feature, provider_model, 0, 0,
+                latency_ms=latency * 1000, queue_ms=queue_ms, error=True,
+            )
+            raise
+        latency = time.perf_counter() - started_at
+        route.observe(latency, failed=False)
+        await get_usage_tracker().record(
+            feature,
+            completion.model,
+            completion.prompt_tokens,
+            completion.completion_tokens,
+            latency_ms=latency * 1000,
+            queue_ms=queue_ms,
+        )
+        return completion
+
+    async def stream_chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        feature: str = "other",
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion as content deltas.
+
+        The concurrency slot is held until the stream is exhausted or the
+        consumer stops iterating, which closes the provider connection.
+        A backend that fails before its first delta is failed over; once
+        content has been yielded, errors are raised to the caller. Token
+        usage is estimated locally since streams do not report it.
+
+        Args:
+            model: Model name to call
+            messages: Chat messages
+            temperature: Sampling temperature
+            response_format: Optional response format (e.g. JSON mode)
+            timeout: Time limit in seconds for the whole stream
+            feature: Calling feature, for usage accounting
+
+        Yields:
+            Content fragments in order
+
+        Raises:
+            asyncio.TimeoutError if the stream does not finish in time
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+
+        queued_at = time.perf_counter()
+        await asyncio.wait_for(self._semaphore.acquire(), deadline - loop.time())
+        self.in_flight += 1
+        queue_ms = (time.perf_counter() - queued_at) * 1000
+        try:
+            last_error: Optional[BaseException] = None
+            for route in self._candidates():
+                if not route.breaker.allow():
+                    continue
+                provider_model = route.provider.resolve_model(model)
+                started_at = time.perf_counter()
+                stream = route.provider.stream(
+                    provider_model, messages, temperature, response_format
+                )
+                parts: List[str] = []
+                failed = abandoned = False
+                try:
+                    while True:
+                        try:
+                            delta = await asyncio.wait_for(
+                                stream.__anext__(), deadline - loop.time()
+                            )
+                        except StopAsyncIteration:
+                            break
+                        parts.append(delta)
+                        yield delta
+                except (GeneratorExit, asyncio.CancelledError):
+                    abandoned = True
+                    raise
+                except Exception as e:
+                    failed = True
+                    last_error = e
+                    print(f"LLM provider {route.provider.name} stream error: {e}")
+                    # Content already sent cannot be retracted
+                    if parts or isinstance(e, asyncio.TimeoutError):
+                        raise
+                finally:
+                    await stream.aclose()
+                    latency = time.perf_counter() - started_at
+                    if abandoned and not parts:
+                        route.breaker.release()
+                    else:
+                        route.observe(latency, failed)
+                    await get_usage_tracker().record(
+                        feature,
+                        provider_model,
+                        count_message_tokens(messages, model),
+                        count_tokens("".join(parts), model),
+                        latency_ms=latency * 1000,
+                        queue_ms=queue_ms,
+                        estimated=True,
+                        error=failed,
+                    )
+                if not failed:
+                    return
+            raise last_error or CircuitOpenError("All LLM providers are unavailable")
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def embed(
+        self,
+        texts: List[str],
+        model: str,
+        dimensions: Optional[int] = None,
+        timeout: Optional[float] = None,
+        feature: str = "other",
+    ) -> List[List[float]]:
+        """
+        Embed texts, sharing the completion concurrency limit.
+
+        Only backends that serve embeddings are used; vectors from
+        different models are not comparable, so there is no failover to
+        another model.
+
+        Args:
+            texts: Texts to embed
+            model: Embedding model name
+            dimensions: Optional reduced vector size (text-embedding-3 models)
+            timeout: Per-call timeout in seconds
+            feature: Calling feature, for usage accounting
+
+        Returns:
+            One vector per input text, in order
+        """
+        route = self._candidates(embeddings=True)[0]
+
+        async def bounded() -> List[List[float]]:
+            queued_at = time.perf_counter()
+            async with self._semaphore:
+                self.in_flight += 1
+                started_at = time.perf_counter()
+                try:
+                    vectors, tokens = await route.provider.embed(texts, model, dimensions)
+                finally:
+                    self.in_flight -= 1
+            await get_usage_tracker().record(
+                feature,
+                model,
+                tokens,
+                0,
+                latency_ms=(time.perf_counter() - started_at) * 1000,
+                queue_ms=(started_at - queued_at) * 1000,
+            )
+            return vectors
+
+        return await asyncio.wait_for(bounded(), timeout=timeout or self.timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current concurrency usage and per-backend routing state."""
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "providers": [route.stats() for route in self.routes],
+        }
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connections."""
+        for route in self.routes:
+            await route.provider.close()
+
+
+_llm_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use."""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient()
+    return _llm_client
+
+
+async def close_llm_client() -> None:
+    """Close the process-wide LLM client (called on shutdown)."""
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
+
+
+async def cancel_on_disconnect(
+    request: Request,
+    awaitable: Awaitable[T],
+    poll_interval: float = 0.5,
+) -> T:
+    """
+    Await a coroutine, cancelling it if the HTTP client disconnects.
+
+    Args:
+        request: Incoming request to watch
+        awaitable: Work to run (typically a service call)
+        poll_interval: Seconds between disconnect checks
+
+    Returns:
+        The awaitable's result
+
+    Raises:
+        ClientDisconnectedError if the client went away first
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnectedError("Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
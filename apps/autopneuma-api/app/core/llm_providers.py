@@ -0,0 +1,331 @@
+"""
+LLM provider backends.
+
+Each provider turns a chat request into a completion (or a stream of
+content deltas) for one backend:
+
+- `openai`: OpenAI API (also serves embeddings)
+- `anthropic`: Anthropic Messages API over the shared HTTP client
+- `local`: any OpenAI-compatible server (Ollama, vLLM, llama.cpp, ...)
+  at LOCAL_LLM_BASE_URL
+- `stub`: canned responses without network access, for tests and
+  offline development
+
+Callers name a model; a provider serves that model when it owns it and
+its own default model otherwise, so requests can fail over between
+backends without the services knowing which one answered.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import openai
+
+from app.core.config import settings
+from app.core.http import get_http_client
+
+
+class LLMCompletion:
+    """Result of a single chat completion call."""
+
+    def __init__(
+        self,
+        content: str,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ):
+        self.content = content
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class LLMProvider:
+    """Base class for chat completion backends."""
+
+    name = "base"
+    supports_embeddings = False
+
+    def __init__(self, default_model: str, cost_per_1k_tokens: float = 0.0):
+        self.default_model = default_model
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+
+    def owns(self, model: str) -> bool:
+        """Whether a requested model name belongs to this backend."""
+        return model == self.default_model
+
+    def resolve_model(self, model: str) -> str:
+        """Model to call for a requested model name."""
+        return model if self.owns(model) else self.default_model
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[Dict[str, Any]],
+    ) -> LLMCompletion:
+        raise NotImplementedError
+
+    def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[Dict[str, Any]],
+    ) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def embed(
+        self,
+        texts: List[str],
+        model: str,
+        dimensions: Optional[int],
+    ) -> Tuple[List[List[float]], int]:
+        raise NotImplementedError(f"{self.name} does not serve embeddings")
+
+    async def close(self) -> None:
+        """Release network resources."""
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI, or any server speaking the OpenAI API when base_url is set."""
+
+    name = "openai"
+    supports_embeddings = True
+
+    def __init__(
+        self,
+        api_key: str,
+        default_model: str,
+        cost_per_1k_tokens: float = 0.0,
+        base_url: Optional[str] = None,
+        name: Optional[str] = None,
+    ):
+        super().__init__(default_model, cost_per_1k_tokens)
+        if name:
+            self.name = name
+            self.supports_embeddings = False
+        self._client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            # Retries across backends are the router's job
+            max_retries=0 if len(settings.LLM_PROVIDERS) > 1 else settings.LLM_MAX_RETRIES,
+        )
+
+    def owns(self, model: str) -> bool:
+        if self.name != "openai":
+            return model == self.default_model
+        return model.startswith(("gpt-", "o1", "o3", "chatgpt-"))
+
+    async def complete(self, model, messages, temperature, response_format):
+        kwargs: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if response_format:
+            kwargs["response_format"] = response_format
+        response = await self._client.chat.completions.create(**kwargs)
+        usage = response.usage
+        return LLMCompletion(
+            content=response.choices[0].message.content or "",
+            model=response.model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    async def stream(self, model, messages, temperature, response_format):
+        kwargs: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True,
+        }
+        if response_format:
+            kwargs["response_format"] = response_format
+        stream = await self._client.chat.completions.create(**kwargs)
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    async def embed(self, texts, model, dimensions):
+        kwargs: Dict[str, Any] = {"model": model, "input": texts}
+        if dimensions:
+            kwargs["dimensions"] = dimensions
+        response = await self._client.embeddings.create(**kwargs)
+        ordered = sorted(response.data, key=lambda item: item.index)
+        tokens = response.usage.prompt_tokens if response.usage else 0
+        return [item.embedding for item in ordered], tokens
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+class AnthropicProvider(LLMProvider):
+    """Anthropic Messages API."""
+
+    name = "anthropic"
+    API_URL = "https://api.anthropic.com/v1/messages"
+    API_VERSION = "2023-06-01"
+
+    def __init__(self, api_key: str, default_model: str, cost_per_1k_tokens: float = 0.0):
+        super().__init__(default_model, cost_per_1k_tokens)
+        self._headers = {
+            "x-api-key": api_key,
+            "anthropic-version": self.API_VERSION,
+            "content-type": "application/json",
+        }
+
+    def owns(self, model: str) -> bool:
+        return model.startswith("claude")
+
+    def _payload(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[Dict[str, Any]],
+        stream: bool,
+    ) -> Tuple[Dict[str, Any], str]:
+        """Request body, and the prefix prefilled for JSON mode."""
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        turns = [
+            {"role": m["role"], "content": m["content"]}
+            for m in messages
+            if m["role"] != "system"
+        ]
+        prefix = ""
+        if response_format and response_format.get("type") == "json_object":
+            # No JSON mode here; starting the reply with "{" has the same effect
+            system = f"{system}\n\nRespond with a single JSON object only.".strip()
+            prefix = "{"
+            turns.append({"role": "assistant", "content": prefix})
+
+        payload: Dict[str, Any] = {
+            "model": model,
+            "max_tokens": settings.ANTHROPIC_MAX_TOKENS,
+            "messages": turns,
+            "temperature": min(temperature, 1.0),
+        }
+        if system:
+            payload["system"] = system
+        if stream:
+            payload["stream"] = True
+        return payload, prefix
+
+    async def complete(self, model, messages, temperature, response_format):
+        payload, prefix = self._payload(model, messages, temperature, response_format, False)
+        response = await get_http_client().post(
+            self.API_URL, json=payload, headers=self._headers,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        data = response.json()
+        text = "".join(
+            block.get("text", "") for block in data.get("content", []) if block.get("type") == "text"
+        )
+        usage = data.get("usage") or {}
+        return LLMCompletion(
+            content=prefix + text,
+            model=data.get("model", model),
+            prompt_tokens=usage.get("input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0),
+        )
+
+    async def stream(self, model, messages, temperature, response_format):
+        payload, prefix = self._payload(model, messages, temperature, response_format, True)
+        async with get_http_client().stream(
+            "POST", self.API_URL, json=payload, headers=self._headers,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+        ) as response:
+            response.raise_for_status()
+            if prefix:
+                yield prefix
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                if event.get("type") == "content_block_delta":
+                    text = event.get("delta", {}).get("text")
+                    if text:
+                        yield text
+                elif event.get("type") == "error":
+                    raise RuntimeError(event.get("error", {}).get("message", "stream error"))
+
+
+class StubProvider(LLMProvider):
+    """
+    Offline provider returning canned content.
+
+    JSON requests get `json_content` ("{}" by default), others `content`.
+    `error` makes every call raise it, to exercise failover.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        content: str = "",
+        json_content: str = "{}",
+        latency_seconds: float = 0.0,
+        error: Optional[Exception] = None,
+        default_model: str = "stub",
+    ):
+        super().__init__(default_model, 0.0)
+        self.content = content
+        self.json_content = json_content
+        self.latency_seconds = latency_seconds
+        self.error = error
+        self.calls = 0
+
+    def owns(self, model: str) -> bool:
+        return True
+
+    def resolve_model(self, model: str) -> str:
+        return model
+
+    async def _respond(self, messages, response_format) -> str:
+        self.calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.error is not None:
+            raise self.error
+        if response_format and response_format.get("type") == "json_object":
+            return self.json_content
+        return self.content
+
+    async def complete(self, model, messages, temperature, response_format):
+        content = await self._respond(messages, response_format)
+        prompt_tokens = sum(len((m.get("content") or "").split()) for m in messages)
+        return LLMCompletion(content, model, prompt_tokens, len(content.split()))
+
+    async def stream(self, model, messages, temperature, response_format):
+        content = await self._respond(messages, response_format)
+        for start in range(0, len(content), 16):
+            yield content[start:start + 16]
+
+
+def build_provider(name: str) -> LLMProvider:
+    """Create a provider from settings by name."""
+    cost = settings.LLM_COST_PER_1K_TOKENS.get(name, 0.0)
+    if name == "openai":
+        return OpenAIProvider(settings.OPENAI_API_KEY, settings.OPENAI_MODEL, cost)
+    if name == "anthropic":
+        if not settings.ANTHROPIC_API_KEY:
+            raise ValueError("ANTHROPIC_API_KEY is required for the anthropic provider")
+        return AnthropicProvider(settings.ANTHROPIC_API_KEY, settings.ANTHROPIC_MODEL, cost)
+    if name == "local":
+        return OpenAIProvider(
+            "local", settings.LOCAL_LLM_MODEL, cost,
+            base_url=settings.LOCAL_LLM_BASE_URL, name="local",
+        )
+    if name == "stub":
+        return StubProvider()
+    raise ValueError(f"Unknown LLM provider: {name}")
@@ -0,0 +1,115 @@
+"""
+ASGI middleware.
+
+RateLimitMiddleware enforces RATE_LIMIT_PER_MINUTE and RATE_LIMIT_PER_HOUR
+per client, weighted by the cost each route declares with
+`app.core.rate_limit.rate_limit`, plus any per-route quota.
+"""
+
+import math
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.rate_limit import DEFAULT_ROUTE_LIMIT, RouteLimit, get_rate_limiter
+
+
+class RateLimitMiddleware:
+    """
+    Per-client, per-route token-bucket quotas.
+
+    Rejected requests get 429 with a Retry-After header. Routes are
+    resolved once per (method, path) and remembered in a small LRU map.
+    """
+
+    def __init__(self, app: ASGIApp, max_cached_paths: int = 2048):
+        self.app = app
+        self.max_cached_paths = max_cached_paths
+        self._route_limits: "OrderedDict[Tuple[str, str], Tuple[str, RouteLimit]]" = (
+            OrderedDict()
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route_path, limit = self._resolve_route(scope)
+        if limit.cost <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        client = self._client_id(scope)
+        limiter = get_rate_limiter()
+
+        quotas = [
+            (f"client:{client}:minute", settings.RATE_LIMIT_PER_MINUTE, 60),
+            (f"client:{client}:hour", settings.RATE_LIMIT_PER_HOUR, 3600),
+        ]
+        if limit.per_minute:
+            quotas.append(
+                (f"client:{client}:route:{route_path}:minute", limit.per_minute, 60)
+            )
+
+        for key, capacity, period in quotas:
+            result = await limiter.hit(key, capacity, period, cost=limit.cost)
+            if not result.allowed:
+                retry_after = max(math.ceil(result.retry_after), 1)
+                response = JSONResponse(
+                    status_code=429,
+                    content={
+                        "detail": "Rate limit exceeded. Please slow down and try again shortly.",
+                        "retry_after": retry_after,
+                    },
+                    headers={"Retry-After": str(retry_after)},
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+    def _resolve_route(self, scope: Scope) -> Tuple[str, RouteLimit]:
+        """Find the matching route and its declared limit."""
+        cache_key = (scope["method"], scope["path"])
+        cached = self._route_limits.get(cache_key)
+        if cached is not None:
+            self._route_limits.move_to_end(cache_key)
+            return cached
+
+        resolved = (scope["path"], DEFAULT_ROUTE_LIMIT)
+        app = scope.get("app")
+        for route in getattr(app, "routes", []):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                endpoint = getattr(route, "endpoint", None)
+                resolved = (
+                    getattr(route, "path", scope["path"]),
+                    getattr(endpoint, "__rate_limit__", DEFAULT_ROUTE_LIMIT),
+                )
+                break
+
+        self._route_limits[cache_key] = resolved
+        while len(self._route_limits) > self.max_cached_paths:
+            self._route_limits.popitem(last=False)
+        return resolved
+
+    def _client_id(self, scope: Scope) -> str:
+        """Identify the client by address (or X-Forwarded-For when trusted)."""
+        if settings.RATE_LIMIT_TRUST_FORWARDED:
+            forwarded = self._header(scope, b"x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    def _header(scope: Scope, name: bytes) -> Optional[str]:
+        for key, value in scope.get("headers", []):
+            if key == name:
+                return value.decode("latin-1")
+        return None
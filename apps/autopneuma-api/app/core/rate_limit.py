@@ -0,0 +1,214 @@
+"""
+Token-bucket rate limiting.
+
+Each key (e.g. tool + user, or client + route) owns a bucket holding up to
+`capacity` tokens that refills continuously over `period_seconds`. A check
+is O(1) and never touches the database. Buckets live in process memory by
+default; when RATE_LIMIT_BACKEND is "redis" and REDIS_URL is configured,
+buckets are shared by all workers through an atomic Lua script.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class RouteLimit:
+    """Rate limit settings declared by a route."""
+
+    def __init__(self, cost: float = 1.0, per_minute: Optional[int] = None):
+        self.cost = cost
+        self.per_minute = per_minute
+
+
+DEFAULT_ROUTE_LIMIT = RouteLimit()
+
+
+def rate_limit(cost: float = 1.0, per_minute: Optional[int] = None) -> Callable[[F], F]:
+    """
+    Declare how a route counts against the API rate limits.
+
+    Args:
+        cost: Tokens each request takes from the client's per-minute and
+            per-hour quotas (0 exempts the route)
+        per_minute: Optional extra per-client quota for this route alone
+
+    Example:
+        @router.post("/context")
+        @rate_limit(cost=10)
+        async def get_scripture_context(...): ...
+    """
+
+    def decorator(endpoint: F) -> F:
+        endpoint.__rate_limit__ = RouteLimit(cost, per_minute)
+        return endpoint
+
+    return decorator
+
+
+class RateLimitResult:
+    """Outcome of a rate limit check."""
+
+    def __init__(self, allowed: bool, remaining: float, retry_after: float):
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+
+class MemoryTokenBuckets:
+    """
+    In-process token buckets.
+
+    Buckets are kept in LRU order and the least recently used are evicted
+    beyond `max_keys`; an evicted bucket simply starts full again.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def hit(
+        self,
+        key: str,
+        capacity: float,
+        refill_per_second: float,
+        cost: float = 1.0,
+    ) -> RateLimitResult:
+        """Take `cost` tokens from a bucket if available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+
+        if tokens >= cost:
+            tokens -= cost
+            result = RateLimitResult(True, tokens, 0.0)
+        else:
+            result = RateLimitResult(False, tokens, (cost - tokens) / refill_per_second)
+
+        self._buckets[key] = [tokens, now]
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return result
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# KEYS[1] = bucket key; ARGV = capacity, refill_per_second, now, cost
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter with an optional shared Redis backend.
+
+    If the shared backend errors, the check falls back to the in-process
+    buckets so an unavailable Redis never blocks requests.
+    """
+
+    def __init__(self):
+        self.memory = MemoryTokenBuckets(settings.RATE_LIMIT_MAX_KEYS)
+        self._redis: Optional[Any] = (
+            get_redis_client() if settings.RATE_LIMIT_BACKEND == "redis" else None
+        )
+        self._script = (
+            self._redis.register_script(_REDIS_TOKEN_BUCKET) if self._redis else None
+        )
+        self.allowed = 0
+        self.rejected = 0
+
+    async def hit(
+        self,
+        key: str,
+        capacity: float,
+        period_seconds: float,
+        cost: float = 1.0,
+    ) -> RateLimitResult:
+        """
+        Consume `cost` from the bucket for `key`.
+
+        Args:
+            key: Bucket identifier
+            capacity: Maximum requests (tokens) per period
+            period_seconds: Time for an empty bucket to refill completely
+            cost: Tokens this request consumes
+
+        Returns:
+            RateLimitResult with allowed flag, remaining tokens and the
+            seconds to wait before retrying when rejected
+        """
+        refill_per_second = capacity / period_seconds
+        result = None
+
+        if self._script is not None:
+            try:
+                allowed, remaining, retry_after = await self._script(
+                    keys=[f"autopneuma:ratelimit:{key}"],
+                    args=[capacity, refill_per_second, time.time(), cost],
+                )
+                result = RateLimitResult(
+                    bool(int(allowed)), float(remaining), float(retry_after)
+                )
+            except Exception as e:
+                print(f"Shared rate limiter error, using local buckets: {e}")
+
+        if result is None:
+            result = self.memory.hit(key, capacity, refill_per_second, cost)
+
+        if result.allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and backend in use."""
+        return {
+            "backend": "redis" if self._script is not None else "memory",
+            "local_buckets": len(self.memory),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
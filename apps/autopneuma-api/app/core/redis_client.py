@@ -0,0 +1,41 @@
+"""
+Optional shared Redis connection.
+
+Used by cross-worker features (shared cache tier, shared rate limits).
+Enabled only when REDIS_URL is set and the `redis` package is installed;
+otherwise every caller falls back to its in-process implementation.
+"""
+
+from typing import Any, Optional
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - optional dependency
+    redis_asyncio = None
+
+
+_redis: Optional[Any] = None
+
+
+def get_redis_client() -> Optional[Any]:
+    """Return the process-wide Redis client, or None if not configured."""
+    global _redis
+    if not settings.REDIS_URL or redis_asyncio is None:
+        return None
+
+    if _redis is None:
+        _redis = redis_asyncio.from_url(settings.REDIS_URL)
+    return _redis
+
+
+async def close_redis_client() -> None:
+    """Close the Redis connection pool (called on shutdown)."""
+    global _redis
+    if _redis is not None:
+        try:
+            await _redis.close()
+        except Exception as e:
+            print(f"Error closing Redis client: {e}")
+        _redis = None
@@ -1,31 +1,86 @@
 """
 Supabase client configuration and utilities.
+
+A single pooled client is created at application startup and shared by
+every request, so PostgREST calls reuse warm keep-alive connections
+instead of rebuilding HTTP sessions per request.
 """
 
+from typing import Optional
+
+import httpx
+from postgrest.utils import SyncClient
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+
 from app.core.config import settings
 
 
+_client: Optional[Client] = None
+
+
 def get_supabase_client() -> Client:
     """
-    Create and return a Supabase client instance.
+    Create and return a new Supabase client instance.
     Uses service role key for backend operations.
+
+    The PostgREST session is replaced with one that uses a bounded
+    keep-alive connection pool sized by SUPABASE_POOL_SIZE.
     """
-    return create_client(
+    client = create_client(
         supabase_url=settings.SUPABASE_URL,
         supabase_key=settings.SUPABASE_SERVICE_ROLE_KEY,
+        options=ClientOptions(
+            auto_refresh_token=False,
+            persist_session=False,
+            postgrest_client_timeout=settings.SUPABASE_TIMEOUT_SECONDS,
+        ),
+    )
+
+    postgrest = client.postgrest
+    default_session = postgrest.session
+    postgrest.session = SyncClient(
+        base_url=default_session.base_url,
+        headers=default_session.headers,
+        timeout=default_session.timeout,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_POOL_SIZE,
+            max_keepalive_connections=settings.SUPABASE_POOL_SIZE,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_SECONDS,
+        ),
     )
+    default_session.close()
+
+    return client
+
+
+def init_supabase_client() -> Client:
+    """Create the process-wide Supabase client (called on startup)."""
+    global _client
+    if _client is None:
+        _client = get_supabase_client()
+    return _client
+
+
+def close_supabase_client() -> None:
+    """Close the process-wide Supabase client (called on shutdown)."""
+    global _client
+    if _client is None:
+        return
+
+    try:
+        _client.postgrest.aclose()
+        _client.auth.close()
+    except Exception as e:
+        print(f"Error closing Supabase client: {e}")
+    finally:
+        _client = None
 
 
 # Dependency for FastAPI routes
 def get_db() -> Client:
     """
-    Dependency that yields a Supabase client.
+    Dependency that returns the shared Supabase client.
     Can be used in FastAPI route dependencies.
     """
-    client = get_supabase_client()
-    try:
-        yield client
-    finally:
-        # Cleanup if needed
-        pass
+    return init_supabase_client()
@@ -0,0 +1,171 @@
+"""
+Local token counting and prompt budgeting.
+
+Token counts use tiktoken when it is installed and otherwise a
+conservative estimate from character and word counts, so budgets are
+enforced without a network call. Oversized text is fitted to a budget by
+one of three strategies:
+
+- `head`: keep the beginning
+- `head_tail`: keep the beginning and the end, dropping the middle
+- `summarize`: ask the model for a shorter version (falls back to
+  `head_tail` if the call fails)
+"""
+
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # optional: exact counts when installed
+    tiktoken = None
+
+
+# Chat format overhead per message and per reply (OpenAI cookbook figures)
+_MESSAGE_OVERHEAD = 4
+_REPLY_OVERHEAD = 2
+
+_ELLIPSIS = "\n[...]\n"
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens in text for a model (OPENAI_MODEL by default)."""
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_encoding(model or settings.OPENAI_MODEL).encode(text))
+    # ~4 characters or ~0.75 words per token for English; take the larger
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 4 / 3))
+
+
+def count_message_tokens(
+    messages: List[Dict[str, str]], model: Optional[str] = None
+) -> int:
+    """Prompt tokens for a list of chat messages."""
+    return _REPLY_OVERHEAD + sum(
+        _MESSAGE_OVERHEAD + count_tokens(message.get("content") or "", model)
+        for message in messages
+    )
+
+
+def _head(text: str, max_tokens: int, model: Optional[str]) -> str:
+    """Longest prefix of text within max_tokens, cut at a word boundary."""
+    if tiktoken is not None:
+        encoding = _encoding(model or settings.OPENAI_MODEL)
+        return encoding.decode(encoding.encode(text)[:max_tokens])
+
+    end = min(len(text), max_tokens * 4)
+    while end > 0:
+        cut = text[:end]
+        if end < len(text) and " " in cut:
+            cut = cut.rsplit(" ", 1)[0]
+        if count_tokens(cut, model) <= max_tokens:
+            return cut
+        end = int(end * 0.9)
+    return ""
+
+
+def _tail(text: str, max_tokens: int, model: Optional[str]) -> str:
+    """Longest suffix of text within max_tokens."""
+    if tiktoken is not None:
+        encoding = _encoding(model or settings.OPENAI_MODEL)
+        tokens = encoding.encode(text)
+        return encoding.decode(tokens[-max_tokens:]) if max_tokens > 0 else ""
+    reversed_head = _head(" ".join(reversed(text.split(" "))), max_tokens, model)
+    return " ".join(reversed(reversed_head.split(" "))) if reversed_head else ""
+
+
+def truncate_tokens(
+    text: str,
+    max_tokens: int,
+    model: Optional[str] = None,
+    keep_tail: bool = False,
+) -> str:
+    """
+    Cut text to at most max_tokens.
+
+    With keep_tail, about a third of the budget keeps the end of the text
+    and a marker shows where the middle was dropped.
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    if not keep_tail:
+        return _head(text, max_tokens, model)
+
+    budget = max_tokens - count_tokens(_ELLIPSIS, model)
+    tail_budget = budget // 3
+    return (
+        _head(text, budget - tail_budget, model)
+        + _ELLIPSIS
+        + _tail(text, tail_budget, model)
+    )
+
+
+async def fit_to_budget(
+    text: Optional[str],
+    max_tokens: int,
+    strategy: Optional[str] = None,
+    model: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Fit text to a token budget.
+
+    Args:
+        text: Text to fit (None and empty text are returned unchanged)
+        max_tokens: Token budget
+        strategy: head, head_tail or summarize (CONTEXT_OVERFLOW_STRATEGY
+            by default)
+        model: Model whose tokenizer to count with
+
+    Returns:
+        The text unchanged if it fits, otherwise a shortened version
+    """
+    if not text or count_tokens(text, model) <= max_tokens:
+        return text
+
+    strategy = strategy or settings.CONTEXT_OVERFLOW_STRATEGY
+    if strategy == "summarize":
+        try:
+            summary = await _summarize(text, max_tokens)
+            return truncate_tokens(summary, max_tokens, model)
+        except Exception as e:
+            print(f"Context summarization error: {e}")
+            strategy = "head_tail"
+
+    return truncate_tokens(text, max_tokens, model, keep_tail=strategy == "head_tail")
+
+
+async def _summarize(text: str, max_tokens: int) -> str:
+    """Condense text with the LLM to roughly max_tokens."""
+    from app.core.llm import get_llm_client
+
+    words = max(20, int(max_tokens * 0.6))
+    completion = await get_llm_client().chat_completion(
+        model=settings.CONTEXT_SUMMARY_MODEL or settings.OPENAI_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    f"Condense the user's text to at most {words} words. Keep names, "
+                    "questions, Scripture references and technical details; drop "
+                    "repetition. Reply with the condensed text only."
+                ),
+            },
+            # Bound what is sent for summarizing, too
+            {"role": "user", "content": truncate_tokens(text, max_tokens * 8, keep_tail=True)},
+        ],
+        temperature=0.2,
+        feature="context_summary",
+    )
+    return completion.content.strip()
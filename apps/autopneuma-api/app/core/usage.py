@@ -0,0 +1,118 @@
+"""
+LLM token usage accounting.
+
+Every completion and embedding call is recorded with the feature that
+made it (scripture, moderation, ...), the model, token counts and
+latency. Totals per (feature, model) are kept in memory for the health
+endpoints, and one row per call is appended to the `llm_usage` table
+through the buffered writer when LLM_USAGE_LOG_ENABLED is set.
+
+Streamed completions do not report usage in this SDK version, so their
+counts are estimated locally and marked as such.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from app.core.config import settings
+from app.core.write_buffer import get_write_buffer
+
+
+class UsageTracker:
+    """In-memory usage totals plus per-call log rows."""
+
+    def __init__(self):
+        self._totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    async def record(
+        self,
+        feature: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_ms: float,
+        queue_ms: float = 0.0,
+        estimated: bool = False,
+        error: bool = False,
+    ) -> None:
+        """
+        Record one call.
+
+        Args:
+            feature: Calling feature, e.g. "scripture" or "moderation"
+            model: Model that served the call
+            prompt_tokens: Input tokens
+            completion_tokens: Output tokens
+            latency_ms: Time spent in the provider call
+            queue_ms: Time spent waiting for a concurrency slot
+            estimated: Whether token counts were estimated locally
+            error: Whether the call failed
+        """
+        totals = self._totals.setdefault(
+            (feature, model),
+            {
+                "calls": 0,
+                "errors": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "latency_ms": 0.0,
+                "queue_ms": 0.0,
+            },
+        )
+        totals["calls"] += 1
+        totals["errors"] += int(error)
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["latency_ms"] += latency_ms
+        totals["queue_ms"] += queue_ms
+
+        if not settings.LLM_USAGE_LOG_ENABLED:
+            return
+        try:
+            await get_write_buffer("llm_usage").add({
+                "feature": feature,
+                "model": model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_ms": round(latency_ms),
+                "queue_ms": round(queue_ms),
+                "estimated": estimated,
+                "error": error,
+            })
+        except Exception as e:
+            print(f"Error recording LLM usage: {e}")
+
+    def stats(self, prefix: str = "") -> List[Dict[str, Any]]:
+        """
+        Totals and averages per (feature, model), most tokens first.
+
+        Args:
+            prefix: Only include features starting with this
+        """
+        rows = []
+        for (feature, model), totals in self._totals.items():
+            if not feature.startswith(prefix):
+                continue
+            calls = totals["calls"]
+            rows.append({
+                "feature": feature,
+                "model": model,
+                "calls": calls,
+                "errors": totals["errors"],
+                "prompt_tokens": totals["prompt_tokens"],
+                "completion_tokens": totals["completion_tokens"],
+                "avg_latency_ms": round(totals["latency_ms"] / calls, 1),
+                "avg_queue_ms": round(totals["queue_ms"] / calls, 1),
+            })
+        return sorted(
+            rows,
+            key=lambda row: row["prompt_tokens"] + row["completion_tokens"],
+            reverse=True,
+        )
+
+
+_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Return the process-wide usage tracker."""
+    return _tracker
@@ -0,0 +1,166 @@
+"""
+Buffered bulk writer for append-only tables.
+
+Rows such as moderation_log flags and tool_executions logs are queued in
+memory and flushed by a background task as multi-row inserts, either when
+WRITE_BUFFER_BATCH_SIZE rows are waiting or WRITE_BUFFER_FLUSH_SECONDS
+have passed. The queue is bounded by WRITE_BUFFER_MAX_ROWS; producers wait
+when it is full so a slow database applies backpressure instead of
+growing memory without limit. Remaining rows are flushed on shutdown.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from supabase import Client
+
+from app.core.config import settings
+from app.core.supabase import init_supabase_client
+
+
+class BufferedWriter:
+    """Background multi-row inserter for a single table."""
+
+    def __init__(
+        self,
+        db: Client,
+        table: str,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.db = db
+        self.table = table
+        self.batch_size = batch_size or settings.WRITE_BUFFER_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.WRITE_BUFFER_FLUSH_SECONDS
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=max_rows or settings.WRITE_BUFFER_MAX_ROWS
+        )
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.failed = 0
+
+    async def add(self, row: Dict[str, Any]) -> None:
+        """Queue a row, waiting if the buffer is full."""
+        self._ensure_started()
+        await self._queue.put(row)
+
+    async def add_many(self, rows: List[Dict[str, Any]]) -> None:
+        """Queue several rows, waiting if the buffer is full."""
+        for row in rows:
+            await self.add(row)
+
+    def _ensure_started(self) -> None:
+        """Start the flush task on first use."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Collect rows into batches and flush them."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Insert a batch with a single request.
+
+        A failed batch is retried once (the error may be transient). If
+        it fails again it is split in halves and each half inserted on its
+        own, down to single rows, so one bad row (e.g. a foreign key to a
+        deleted tool) costs only itself rather than the whole batch.
+        """
+        try:
+            await self._insert(batch)
+            return
+        except Exception as e:
+            print(f"Error flushing {len(batch)} rows to {self.table}, retrying: {e}")
+
+        await asyncio.sleep(self.flush_interval)
+        await self._insert_splitting(batch)
+
+    async def _insert_splitting(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert rows, halving the batch on failure to isolate bad rows."""
+        try:
+            await self._insert(rows)
+        except Exception as e:
+            if len(rows) == 1:
+                self.failed += 1
+                print(f"Dropping row for {self.table}: {e}")
+                return
+            middle = len(rows) // 2
+            await self._insert_splitting(rows[:middle])
+            await self._insert_splitting(rows[middle:])
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert rows with one request and count them as flushed."""
+        await asyncio.to_thread(
+            lambda: self.db.table(self.table).insert(rows).execute()
+        )
+        self.flushed += len(rows)
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Flush everything still buffered and stop the flush task."""
+        if self._task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(
+                f"Timed out flushing {self.table}; "
+                f"{self._queue.qsize()} rows not written"
+            )
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer depth and flush counters."""
+        return {
+            "table": self.table,
+            "pending": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "flushed": self.flushed,
+            "failed": self.failed,
+        }
+
+
+_writers: Dict[str, BufferedWriter] = {}
+
+
+def get_write_buffer(table: str) -> BufferedWriter:
+    """Return the process-wide buffered writer for a table."""
+    if table not in _writers:
+        _writers[table] = BufferedWriter(init_supabase_client(), table)
+    return _writers[table]
+
+
+def write_buffer_stats() -> List[Dict[str, Any]]:
+    """Stats for every active buffered writer."""
+    return [writer.stats() for writer in _writers.values()]
+
+
+async def close_write_buffers() -> None:
+    """Flush and stop all buffered writers (called on shutdown)."""
+    for writer in _writers.values():
+        await writer.close()
+    _writers.clear()
@@ -11,6 +11,42 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.core.http import close_http_client, get_http_client
+from app.core.llm import close_llm_client, get_llm_client
+from app.core.middleware import RateLimitMiddleware
+from app.core.rate_limit import rate_limit
+from app.core.redis_client import close_redis_client
+from app.core.supabase import close_supabase_client, init_supabase_client
+from app.core.write_buffer import close_write_buffers
+from app.services.bible_store import close_verse_stores
+from app.services.vector_index import (
+    COMMUNITY_INDEX,
+    VERSES_INDEX,
+    close_vector_indexes,
+    get_vector_index,
+    vector_search_available,
+)
+from app.services.scripture_index import (
+    close_scripture_indexes,
+    get_bm25_index,
+    get_cross_references,
+)
+from app.services.scripture_analytics import (
+    start_scripture_analytics,
+    stop_scripture_analytics,
+)
+from app.services.tool_health import (
+    start_tool_health_probes,
+    stop_tool_health_probes,
+)
+from app.services.tool_registry import (
+    start_tool_registry_sync,
+    stop_tool_registry_sync,
+)
+from app.services.moderation_queue import (
+    start_moderation_workers,
+    stop_moderation_workers,
+)
 from app.api.v1.api import api_router
 
 
@@ -50,6 +86,10 @@ app = FastAPI(
 )
 
 
+# Per-client rate limiting (added before CORS so 429s still carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -87,6 +127,7 @@ async def root():
 
 # Health check endpoint
 @app.get("/health")
+@rate_limit(cost=0)
 async def health_check():
     """
     Health check endpoint for monitoring.
@@ -95,6 +136,7 @@ async def health_check():
         "status": "healthy",
         "service": "autopneuma-api",
         "version": settings.VERSION,
+        "llm": get_llm_client().stats(),
     }
 
 
@@ -123,6 +165,30 @@ async def startup_event():
     print(f"Moderation enabled: {settings.ENABLE_AI_MODERATION}")
     print(f"Scripture Assistant enabled: {settings.ENABLE_SCRIPTURE_ASSISTANT}")
     print(f"Community Tools enabled: {settings.ENABLE_COMMUNITY_AI_TOOLS}")
+    db = init_supabase_client()
+    get_http_client()
+
+    if settings.ENABLE_AI_MODERATION and settings.MODERATION_QUEUE_ENABLED:
+        await start_moderation_workers(db)
+
+    if settings.ENABLE_COMMUNITY_AI_TOOLS:
+        await start_tool_registry_sync(db)
+        await start_tool_health_probes()
+
+    if settings.ENABLE_SCRIPTURE_ASSISTANT and settings.SCRIPTURE_ANALYTICS_ENABLED:
+        await start_scripture_analytics()
+
+    # Map the offline scripture indexes now so the first query is fast
+    if settings.ENABLE_SCRIPTURE_ASSISTANT and settings.SCRIPTURE_RETRIEVAL_ENABLED:
+        print(f"Scripture BM25 index loaded: {get_bm25_index() is not None}")
+        print(f"Scripture cross references loaded: {get_cross_references() is not None}")
+
+    # Load the embedder and map vector indexes (model load can take seconds)
+    if settings.ENABLE_SCRIPTURE_ASSISTANT and settings.VECTOR_SEARCH_ENABLED:
+        if not vector_search_available():
+            print("WARNING: VECTOR_SEARCH_ENABLED is set but numpy is not installed; vector search is off")
+        print(f"Verse vector index loaded: {get_vector_index(VERSES_INDEX) is not None}")
+        print(f"Community vector index loaded: {get_vector_index(COMMUNITY_INDEX) is not None}")
 
 
 # Shutdown event
@@ -132,6 +198,18 @@ async def shutdown_event():
     Application shutdown tasks.
     """
     print(f"Shutting down {settings.PROJECT_NAME}")
+    await stop_moderation_workers()
+    await stop_scripture_analytics()
+    await stop_tool_registry_sync()
+    await stop_tool_health_probes()
+    await close_write_buffers()
+    await close_llm_client()
+    await close_http_client()
+    await close_redis_client()
+    close_supabase_client()
+    close_verse_stores()
+    close_scripture_indexes()
+    close_vector_indexes()
 
 
 if __name__ == "__main__":
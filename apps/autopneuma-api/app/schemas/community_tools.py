@@ -3,7 +3,7 @@ Pydantic schemas for Community AI Tools extensibility layer.
 """
 
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 
 
@@ -15,6 +15,14 @@ class CommunityToolRequest(BaseModel):
     user_id: Optional[str] = Field(None, description="User executing the tool")
 
 
+class SchemaErrorDetail(BaseModel):
+    """One JSON Schema violation in tool input or output."""
+
+    path: str = Field(..., description="JSON pointer to the offending value")
+    validator: str = Field(..., description="Failing schema keyword, e.g. type or required")
+    message: str
+
+
 class CommunityToolResponse(BaseModel):
     """Response from a community AI tool execution."""
 
@@ -24,6 +32,10 @@ class CommunityToolResponse(BaseModel):
     execution_time_ms: float
     credits_used: Optional[int] = Field(None, description="API credits consumed")
     error_message: Optional[str] = None
+    validation_errors: Optional[List[SchemaErrorDetail]] = Field(
+        None,
+        description="Schema violations when the input or output did not match the tool's schemas",
+    )
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -54,6 +66,12 @@ class ToolRegistration(BaseModel):
         default=100,
         description="Max requests per user per hour",
     )
+    timeout_seconds: float = Field(
+        default=30.0,
+        gt=0,
+        le=120,
+        description="Seconds to wait for the tool endpoint per call",
+    )
     requires_approval: bool = Field(
         default=True,
         description="Whether tool requires admin approval before use",
@@ -64,6 +82,21 @@ class ToolRegistration(BaseModel):
     )
 
 
+class EndpointHealthStatus(BaseModel):
+    """Circuit breaker state and rolling health of a tool endpoint (this API worker)."""
+
+    state: str = Field(..., description="closed, open or half_open")
+    consecutive_failures: int = 0
+    times_opened: int = 0
+    retry_in_seconds: Optional[float] = None
+    window_calls: int = 0
+    error_rate: Optional[float] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    rejected: int = Field(0, description="Executions failed fast while not closed")
+    probes: int = 0
+
+
 class RegisteredTool(ToolRegistration):
     """A registered community AI tool with metadata."""
 
@@ -74,8 +107,14 @@ class RegisteredTool(ToolRegistration):
         description="pending_approval, active, suspended, deprecated",
     )
     total_executions: int = Field(default=0)
+    successful_executions: int = Field(default=0)
     success_rate: float = Field(default=1.0, ge=0.0, le=1.0)
     average_execution_time_ms: float = Field(default=0.0)
+    config_version: int = Field(default=1, description="Bumped when configuration changes")
+    endpoint_health: Optional[EndpointHealthStatus] = Field(
+        None,
+        description="Circuit breaker state of the tool's endpoint (tool details only)",
+    )
     created_at: datetime
     updated_at: datetime
     approved_at: Optional[datetime] = None
@@ -95,12 +134,15 @@ class RegisteredTool(ToolRegistration):
                 "input_schema": {"type": "object", "properties": {"transcript": {"type": "string"}}},
                 "output_schema": {"type": "object", "properties": {"summary": {"type": "string"}}},
                 "rate_limit": 50,
+                "timeout_seconds": 20,
                 "requires_approval": True,
                 "spiritual_application": "Helps congregations engage more deeply with teaching",
                 "status": "active",
                 "total_executions": 245,
+                "successful_executions": 240,
                 "success_rate": 0.98,
                 "average_execution_time_ms": 1500,
+                "config_version": 3,
                 "created_at": "2024-01-15T10:00:00Z",
                 "updated_at": "2024-01-20T14:30:00Z",
                 "approved_at": "2024-01-16T09:00:00Z",
@@ -109,10 +151,35 @@ class RegisteredTool(ToolRegistration):
         }
 
 
+class ToolSummary(BaseModel):
+    """Compact listing view of a tool (no schemas or approval details)."""
+
+    id: str
+    creator_id: str
+    project_id: str
+    tool_name: str
+    description: str
+    category: str
+    status: str
+    rate_limit: int = 100
+    total_executions: int = 0
+    success_rate: float = 1.0
+    average_execution_time_ms: float = 0.0
+    created_at: datetime
+
+
 class ToolListResponse(BaseModel):
     """Response for listing available community tools."""
 
-    tools: List[RegisteredTool]
-    total: int
+    tools: List[Union[RegisteredTool, ToolSummary]]
+    total: Optional[int] = Field(
+        None,
+        description="Matching tools; omitted on cursor pages after the first",
+    )
+    total_estimated: bool = Field(False, description="Whether total is a planner estimate")
     page: int = 1
     per_page: int = 20
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Pass as cursor to fetch the next page; null on the last page",
+    )
@@ -2,7 +2,7 @@
 Pydantic schemas for content moderation.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List
 from datetime import datetime
 
@@ -36,6 +36,10 @@ class ModerationResponse(BaseModel):
         description="approve, flag_for_review, flag_high_priority",
     )
     reasoning: str = Field(..., description="Summary of moderation reasoning")
+    decided_by: str = Field(
+        default="llm",
+        description="Pipeline tier that decided: prefilter, cache, llm, disabled",
+    )
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -53,6 +57,61 @@ class ModerationResponse(BaseModel):
                 "overall_score": 0.75,
                 "recommendation": "flag_for_review",
                 "reasoning": "Content should be reviewed by moderators for tone and theological appropriateness",
+                "decided_by": "llm",
                 "timestamp": "2024-01-15T10:30:00Z",
             }
         }
+
+
+class ModerationBatchRequest(BaseModel):
+    """Request schema for moderating several items in one call."""
+
+    items: List[ModerationRequest] = Field(..., min_length=1, max_length=200)
+
+
+class ModerationBatchResponse(BaseModel):
+    """Response schema for batch moderation, one result per request item."""
+
+    results: List[ModerationResponse] = Field(default_factory=list)
+
+
+class ModerationJobSubmitRequest(BaseModel):
+    """Request schema for queueing content for asynchronous moderation."""
+
+    items: List[ModerationRequest] = Field(..., min_length=1, max_length=1000)
+    webhook_url: Optional[HttpUrl] = Field(
+        None,
+        description="URL to POST results to when the jobs complete",
+    )
+
+
+class ModerationJobSubmitResponse(BaseModel):
+    """Response schema for queued moderation jobs."""
+
+    job_ids: List[str] = Field(..., description="One job ID per submitted item")
+    status: str = Field(default="queued")
+
+
+class ModerationJobStatus(BaseModel):
+    """Status and result of an asynchronous moderation job."""
+
+    id: str
+    status: str = Field(..., description="queued, processing, completed, failed")
+    content_id: Optional[str] = None
+    result: Optional[ModerationResponse] = None
+    error_message: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+
+class ModerationQueueStats(BaseModel):
+    """Moderation queue depth, lag and worker counters."""
+
+    queued: int = Field(..., description="Jobs waiting to be claimed")
+    processing: int = Field(..., description="Jobs claimed by a worker")
+    lag_seconds: float = Field(..., description="Age of the oldest queued job")
+    workers: int = Field(..., description="Background workers in this process")
+    running: bool = Field(..., description="Whether workers are running in this process")
+    processed: int = Field(default=0, description="Jobs completed by this process")
+    failed: int = Field(default=0, description="Jobs failed by this process")
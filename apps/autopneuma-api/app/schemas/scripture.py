@@ -24,6 +24,16 @@ class ScriptureReference(BaseModel):
         return f"{self.book} {self.chapter}:{self.verse_start}"
 
 
+class RelatedContent(BaseModel):
+    """Community content related to a query."""
+
+    kind: str = Field(..., description="post, blog_post or project")
+    id: str
+    title: str = ""
+    slug: Optional[str] = None
+    score: float = Field(..., description="Cosine similarity to the query")
+
+
 class ScriptureContextRequest(BaseModel):
     """Request schema for Scripture Context Assistant."""
 
@@ -48,6 +58,18 @@ class ScriptureContextRequest(BaseModel):
     )
 
 
+class ScriptureCacheInvalidateRequest(BaseModel):
+    """Request schema for invalidating cached assistant answers."""
+
+    query: Optional[str] = Field(
+        None,
+        description="Query whose answer to invalidate; omit to clear the whole cache",
+    )
+    context: Optional[str] = Field(None, max_length=5000)
+    content_type: Optional[str] = None
+    bible_version: Optional[str] = Field(default="ESV")
+
+
 class ScriptureContextResponse(BaseModel):
     """Response schema for Scripture Context Assistant."""
 
@@ -73,6 +95,18 @@ class ScriptureContextResponse(BaseModel):
         default_factory=list,
         description="Suggestions for deeper study",
     )
+    related_content: List[RelatedContent] = Field(
+        default_factory=list,
+        description="Related community posts, blog posts and projects",
+    )
+    cached: bool = Field(
+        default=False,
+        description="Whether the answer was served from the answer cache",
+    )
+    topic: Optional[str] = Field(
+        None,
+        description="Curated topic whose precomputed answer was served, if any",
+    )
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -98,6 +132,9 @@ class ScriptureContextResponse(BaseModel):
                 "theological_insights": "Detailed reflection on biblical principles...",
                 "practical_application": "Practical steps for AI ethics...",
                 "further_study": ["Romans 12:1-2", "Philippians 4:8"],
+                "related_content": [],
+                "cached": False,
+                "topic": None,
                 "timestamp": "2024-01-15T10:30:00Z",
             }
         }
@@ -0,0 +1,116 @@
+"""
+Canonical Bible book table.
+
+Books are numbered 1-66 in Protestant canonical order. Each entry lists
+the canonical display name followed by accepted abbreviations and
+aliases; lookups ignore case, periods and extra whitespace.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+BOOKS: List[Tuple[str, ...]] = [
+    # Old Testament
+    ("Genesis", "Gen", "Ge", "Gn"),
+    ("Exodus", "Exod", "Exo", "Ex"),
+    ("Leviticus", "Lev", "Le", "Lv"),
+    ("Numbers", "Num", "Nu", "Nm", "Nb"),
+    ("Deuteronomy", "Deut", "Dt", "De"),
+    ("Joshua", "Josh", "Jos", "Jsh"),
+    ("Judges", "Judg", "Jdg", "Jg", "Jdgs"),
+    ("Ruth", "Rth", "Ru"),
+    ("1 Samuel", "1 Sam", "1 Sa", "1Sam", "1Sa", "1 Sm", "I Samuel", "I Sam", "First Samuel"),
+    ("2 Samuel", "2 Sam", "2 Sa", "2Sam", "2Sa", "2 Sm", "II Samuel", "II Sam", "Second Samuel"),
+    ("1 Kings", "1 Kgs", "1 Ki", "1Kgs", "1Ki", "I Kings", "I Kgs", "First Kings"),
+    ("2 Kings", "2 Kgs", "2 Ki", "2Kgs", "2Ki", "II Kings", "II Kgs", "Second Kings"),
+    ("1 Chronicles", "1 Chron", "1 Chr", "1 Ch", "1Chr", "1Ch", "I Chronicles", "I Chron", "First Chronicles"),
+    ("2 Chronicles", "2 Chron", "2 Chr", "2 Ch", "2Chr", "2Ch", "II Chronicles", "II Chron", "Second Chronicles"),
+    ("Ezra", "Ezr", "Ez"),
+    ("Nehemiah", "Neh", "Ne"),
+    ("Esther", "Esth", "Est", "Es"),
+    ("Job", "Jb"),
+    ("Psalms", "Psalm", "Ps", "Psa", "Pss", "Psm"),
+    ("Proverbs", "Prov", "Pro", "Prv", "Pr"),
+    ("Ecclesiastes", "Eccles", "Eccl", "Ecc", "Ec", "Qoh"),
+    ("Song of Solomon", "Song of Songs", "Song", "Sng", "SOS", "So", "Canticles", "Cant"),
+    ("Isaiah", "Isa", "Is"),
+    ("Jeremiah", "Jer", "Je", "Jr"),
+    ("Lamentations", "Lam", "La"),
+    ("Ezekiel", "Ezek", "Eze", "Ezk"),
+    ("Daniel", "Dan", "Da", "Dn"),
+    ("Hosea", "Hos", "Ho"),
+    ("Joel", "Jl"),
+    ("Amos", "Am"),
+    ("Obadiah", "Obad", "Ob"),
+    ("Jonah", "Jnh", "Jon"),
+    ("Micah", "Mic", "Mc"),
+    ("Nahum", "Nah", "Na"),
+    ("Habakkuk", "Hab", "Hb"),
+    ("Zephaniah", "Zeph", "Zep", "Zp"),
+    ("Haggai", "Hag", "Hg"),
+    ("Zechariah", "Zech", "Zec", "Zc"),
+    ("Malachi", "Mal", "Ml"),
+    # New Testament
+    ("Matthew", "Matt", "Mt"),
+    ("Mark", "Mrk", "Mar", "Mk", "Mr"),
+    ("Luke", "Luk", "Lk"),
+    ("John", "Jhn", "Jn"),
+    ("Acts", "Act", "Ac"),
+    ("Romans", "Rom", "Ro", "Rm"),
+    ("1 Corinthians", "1 Cor", "1 Co", "1Cor", "1Co", "I Corinthians", "I Cor", "First Corinthians"),
+    ("2 Corinthians", "2 Cor", "2 Co", "2Cor", "2Co", "II Corinthians", "II Cor", "Second Corinthians"),
+    ("Galatians", "Gal", "Ga"),
+    ("Ephesians", "Eph", "Ephes"),
+    ("Philippians", "Phil", "Php", "Pp"),
+    ("Colossians", "Col", "Co"),
+    ("1 Thessalonians", "1 Thess", "1 Thes", "1 Th", "1Thess", "1Th", "I Thessalonians", "I Thess", "First Thessalonians"),
+    ("2 Thessalonians", "2 Thess", "2 Thes", "2 Th", "2Thess", "2Th", "II Thessalonians", "II Thess", "Second Thessalonians"),
+    ("1 Timothy", "1 Tim", "1 Ti", "1Tim", "1Ti", "I Timothy", "I Tim", "First Timothy"),
+    ("2 Timothy", "2 Tim", "2 Ti", "2Tim", "2Ti", "II Timothy", "II Tim", "Second Timothy"),
+    ("Titus", "Tit", "Ti"),
+    ("Philemon", "Philem", "Phlm", "Phm", "Pm"),
+    ("Hebrews", "Heb"),
+    ("James", "Jas", "Jm"),
+    ("1 Peter", "1 Pet", "1 Pe", "1 Pt", "1Pet", "1Pe", "I Peter", "I Pet", "First Peter"),
+    ("2 Peter", "2 Pet", "2 Pe", "2 Pt", "2Pet", "2Pe", "II Peter", "II Pet", "Second Peter"),
+    ("1 John", "1 Jn", "1 Jhn", "1Jn", "1Jhn", "I John", "I Jn", "First John"),
+    ("2 John", "2 Jn", "2 Jhn", "2Jn", "2Jhn", "II John", "II Jn", "Second John"),
+    ("3 John", "3 Jn", "3 Jhn", "3Jn", "3Jhn", "III John", "III Jn", "Third John"),
+    ("Jude", "Jud", "Jd"),
+    ("Revelation", "Rev", "Re", "Revelations", "The Revelation", "Apocalypse"),
+]
+
+
+def _normalize(name: str) -> str:
+    """Lowercase, drop periods and collapse whitespace."""
+    return " ".join(name.replace(".", " ").lower().split())
+
+
+_BOOK_IDS: Dict[str, int] = {}
+for _book_id, _names in enumerate(BOOKS, start=1):
+    for _name in _names:
+        _BOOK_IDS.setdefault(_normalize(_name), _book_id)
+        # Accept "1Cor" style without the space after the number too
+        _BOOK_IDS.setdefault(_normalize(re.sub(r"^(\d)\s+", r"\1", _name)), _book_id)
+
+
+def book_id(name: str) -> Optional[int]:
+    """Return the 1-based book number for a name or alias, or None."""
+    return _BOOK_IDS.get(_normalize(name))
+
+
+def book_name(book: int) -> str:
+    """Return the canonical name for a 1-based book number."""
+    return BOOKS[book - 1][0]
+
+
+def canonical_book_name(name: str) -> Optional[str]:
+    """Return the canonical name for a name or alias, or None."""
+    book = book_id(name)
+    return book_name(book) if book else None
+
+
+def book_aliases() -> Dict[str, int]:
+    """All normalized names and aliases mapped to book numbers."""
+    return dict(_BOOK_IDS)
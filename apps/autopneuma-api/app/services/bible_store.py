@@ -0,0 +1,278 @@
+"""
+Local read-only Bible verse store.
+
+Each translation is compiled once into a compact binary file
+(`{BIBLE_DATA_DIR}/{VERSION}.verses`) and memory-mapped at runtime, so
+verse lookups are a binary search over a fixed-width index with no
+parsing, network calls or per-verse Python objects held in memory.
+
+File layout (little-endian):
+    header   magic "APVS", format u16, reserved u16, verse count u32,
+             text offset u32
+    index    one (key u32, offset u32, length u32) record per verse,
+             sorted by key = book << 16 | chapter << 8 | verse
+    text     UTF-8 verse text, concatenated in index order
+
+Build a store from a public-domain source (KJV, WEB, ASV, ...) with one
+verse per line as `book<TAB>chapter<TAB>verse<TAB>text`:
+
+    python -m app.services.bible_store build KJV kjv.tsv
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.bible_books import book_id
+
+
+MAGIC = b"APVS"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHII")
+_RECORD = struct.Struct("<III")
+
+
+# Chapters and verses are packed into 8 bits each (Psalm 150 and Psalm
+# 119:176 are the largest in the canon)
+MAX_NUMBER = 255
+
+
+def verse_key(book: int, chapter: int, verse: int) -> int:
+    """Pack a (book, chapter, verse) triple into a sortable index key."""
+    return (book << 16) | (chapter << 8) | verse
+
+
+def _in_range(*numbers: int) -> bool:
+    """Whether chapter/verse numbers fit their key fields (1-255)."""
+    return all(1 <= number <= MAX_NUMBER for number in numbers)
+
+
+class VerseStore:
+    """Memory-mapped verse store for a single translation."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, _, count, text_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a verse store (format {FORMAT_VERSION}): {path}")
+
+        self.count = count
+        self._index_offset = _HEADER.size
+        self._text_offset = text_offset
+
+    def _record(self, i: int) -> Tuple[int, int, int]:
+        return _RECORD.unpack_from(self._mm, self._index_offset + i * _RECORD.size)
+
+    def _search(self, key: int) -> int:
+        """Index of the first record with a key >= `key`."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _text(self, offset: int, length: int) -> str:
+        start = self._text_offset + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def get(self, book: int, chapter: int, verse: int) -> Optional[str]:
+        """Text of a single verse, or None if it does not exist."""
+        if not _in_range(chapter, verse):
+            return None
+        key = verse_key(book, chapter, verse)
+        i = self._search(key)
+        if i < self.count:
+            found, offset, length = self._record(i)
+            if found == key:
+                return self._text(offset, length)
+        return None
+
+    def get_range(
+        self,
+        book: int,
+        chapter: int,
+        verse_start: int,
+        verse_end: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Text of a verse range within one chapter, joined with spaces.
+
+        Returns None if the starting verse does not exist; a range running
+        past the end of the chapter is truncated at the last verse.
+        """
+        if verse_end is None or verse_end <= verse_start:
+            return self.get(book, chapter, verse_start)
+        if not _in_range(chapter, verse_start):
+            return None
+        verse_end = min(verse_end, MAX_NUMBER)
+
+        start_key = verse_key(book, chapter, verse_start)
+        end_key = verse_key(book, chapter, verse_end)
+        i = self._search(start_key)
+
+        parts: List[str] = []
+        while i < self.count:
+            key, offset, length = self._record(i)
+            if key > end_key:
+                break
+            if not parts and key != start_key:
+                return None
+            parts.append(self._text(offset, length))
+            i += 1
+
+        return " ".join(parts) if parts else None
+
+    def items(self) -> Iterator[Tuple[int, str]]:
+        """All (verse key, text) pairs in canonical order."""
+        for i in range(self.count):
+            key, offset, length = self._record(i)
+            yield key, self._text(offset, length)
+
+    def verse_count(self, book: int, chapter: int) -> int:
+        """Number of verses in a chapter (0 if the chapter does not exist)."""
+        if not _in_range(chapter):
+            return 0
+        first = self._search(verse_key(book, chapter, 0))
+        last = self._search(verse_key(book, chapter + 1, 0))
+        return last - first
+
+    def close(self) -> None:
+        """Release the memory map and file handle."""
+        self._mm.close()
+        self._file.close()
+
+
+def build_store(
+    verses: Iterable[Tuple[int, int, int, str]],
+    path: str,
+) -> int:
+    """
+    Compile verses into a store file.
+
+    Args:
+        verses: (book, chapter, verse, text) tuples in any order
+        path: Output file path
+
+    Returns:
+        Number of verses written
+
+    Raises:
+        ValueError if a chapter or verse number is outside 1-255
+    """
+    entries: Dict[int, bytes] = {}
+    for book, chapter, verse, text in verses:
+        if not _in_range(chapter, verse):
+            raise ValueError(f"Chapter/verse out of range: {book} {chapter}:{verse}")
+        entries[verse_key(book, chapter, verse)] = " ".join(text.split()).encode("utf-8")
+
+    keys = sorted(entries)
+    text_offset = _HEADER.size + len(keys) * _RECORD.size
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(keys), text_offset))
+        offset = 0
+        for key in keys:
+            f.write(_RECORD.pack(key, offset, len(entries[key])))
+            offset += len(entries[key])
+        for key in keys:
+            f.write(entries[key])
+
+    # Atomic swap so running processes never map a half-written file
+    os.replace(tmp_path, path)
+    return len(keys)
+
+
+def read_tsv(path: str) -> Iterable[Tuple[int, int, int, str]]:
+    """
+    Read `book<TAB>chapter<TAB>verse<TAB>text` lines.
+
+    Books may be names, common abbreviations or numbers (1-66). Blank
+    lines, `#` comments and lines with unknown books (e.g. headers) are
+    skipped.
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+
+            fields = line.rstrip("\n").split("\t", 3)
+            if len(fields) != 4:
+                continue
+
+            book, chapter, verse, text = fields
+            number = int(book) if book.isdigit() else book_id(book)
+            if not number or not chapter.isdigit() or not verse.isdigit():
+                continue
+
+            yield number, int(chapter), int(verse), text
+
+
+def store_path(version: str) -> str:
+    """Path of the store file for a translation."""
+    return os.path.join(settings.BIBLE_DATA_DIR, f"{version.upper()}.verses")
+
+
+_stores: Dict[str, Optional[VerseStore]] = {}
+
+
+def get_verse_store(version: str) -> Optional[VerseStore]:
+    """
+    Return the store for a translation, or None if it is not installed.
+
+    Stores are opened on first use and shared by the whole process; a
+    missing translation is remembered so it is not re-checked per request.
+    """
+    version = version.upper()
+    if version not in _stores:
+        path = store_path(version)
+        store = None
+        if os.path.exists(path):
+            try:
+                store = VerseStore(path)
+            except Exception as e:
+                print(f"Error opening verse store {path}: {e}")
+        _stores[version] = store
+    return _stores[version]
+
+
+def close_verse_stores() -> None:
+    """Close all open stores (called on shutdown)."""
+    for store in _stores.values():
+        if store is not None:
+            store.close()
+    _stores.clear()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage local Bible verse stores")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Compile a TSV source into a store")
+    build.add_argument("version", help="Translation code, e.g. KJV")
+    build.add_argument("source", help="TSV file: book, chapter, verse, text")
+    build.add_argument("--output", help="Output path (default: BIBLE_DATA_DIR)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        path = args.output or store_path(args.version)
+        count = build_store(read_tsv(args.source), path)
+        print(f"Wrote {count} verses to {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,19 +5,59 @@ Enables members to register and execute their own AI tools/gifts,
 creating an extensible ecosystem of Kingdom-focused AI capabilities.
 """
 
-import httpx
+import asyncio
+import base64
+import json
 import time
-from typing import Dict, Any, Optional
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from uuid import UUID
 from supabase import Client
 
+from app.core.config import settings
+from app.core.http import get_http_client, host_slot
+from app.core.json_schema import SchemaValidationError, check_schema, validate
+from app.core.rate_limit import get_rate_limiter
+from app.core.write_buffer import get_write_buffer
+from app.services.tool_health import (
+    ToolUnavailableError,
+    counts_as_failure,
+    get_tool_health_monitor,
+)
+from app.services.tool_registry import get_tool_registry
 from app.schemas.community_tools import (
     CommunityToolRequest,
     CommunityToolResponse,
     ToolRegistration,
     RegisteredTool,
+    ToolSummary,
 )
 
 
+# Columns for the summary listing view (see ToolSummary)
+TOOL_SUMMARY_COLUMNS = ",".join(ToolSummary.model_fields)
+
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor for the position after a row."""
+    raw = json.dumps([row["created_at"], row["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """(created_at, id) from a keyset cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, tool_id = json.loads(raw)
+        created_at = datetime.fromisoformat(created_at)
+        tool_id = UUID(tool_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if created_at.tzinfo is None:
+        raise ValueError("Invalid cursor")
+    return created_at, tool_id
+
+
 class CommunityToolsService:
     """
     Service for managing and executing community-contributed AI tools.
@@ -31,7 +71,6 @@ class CommunityToolsService:
 
     def __init__(self, db: Client):
         self.db = db
-        self.http_client = httpx.AsyncClient(timeout=30.0)
 
     async def register_tool(
         self,
@@ -49,8 +88,8 @@ class CommunityToolsService:
             RegisteredTool with metadata
         """
         # Verify project exists and belongs to creator
-        project = (
-            self.db.table("projects")
+        project = await asyncio.to_thread(
+            lambda: self.db.table("projects")
             .select("*")
             .eq("id", registration.project_id)
             .eq("creator_id", creator_id)
@@ -61,6 +100,9 @@ class CommunityToolsService:
         if not project.data:
             raise ValueError("Project not found or you don't have permission")
 
+        check_schema(registration.input_schema)
+        check_schema(registration.output_schema)
+
         # Insert tool registration
         tool_data = {
             **registration.model_dump(),
@@ -71,9 +113,13 @@ class CommunityToolsService:
             "average_execution_time_ms": 0.0,
         }
 
-        result = self.db.table("community_tools").insert(tool_data).execute()
+        result = await asyncio.to_thread(
+            lambda: self.db.table("community_tools").insert(tool_data).execute()
+        )
 
-        return RegisteredTool(**result.data[0])
+        tool = RegisteredTool(**result.data[0])
+        get_tool_registry().put(tool)
+        return tool
 
     async def execute_tool(
         self,
@@ -91,34 +137,53 @@ class CommunityToolsService:
             CommunityToolResponse with results
         """
         start_time = time.time()
+        dispatched_tool: Optional[RegisteredTool] = None
 
         try:
-            # Fetch tool details
-            tool = await self._get_tool(request.tool_id)
+            # Tool configuration (cached; no database read when warm)
+            tool = await get_tool_registry().get(request.tool_id, self._fetch_tool)
+            if tool is None:
+                raise ValueError(f"Tool not found: {request.tool_id}")
 
             if tool.status != "active":
                 raise ValueError(f"Tool is not active. Status: {tool.status}")
 
+            # Reject bad input before it costs a round-trip or rate-limit budget
+            validators = get_tool_registry().validators(tool)
+            if settings.TOOL_SCHEMA_VALIDATION_ENABLED and validators.input is not None:
+                errors = validate(validators.input, request.input_data, settings.TOOL_SCHEMA_MAX_ERRORS)
+                if errors:
+                    raise SchemaValidationError("Input does not match the tool's input_schema", errors)
+
+            # Fail fast while the endpoint's circuit is open
+            health = get_tool_health_monitor().endpoint(str(tool.api_endpoint))
+            if not health.allow():
+                retry_in = health.breaker.stats()["retry_in_seconds"]
+                raise ToolUnavailableError(
+                    "Tool endpoint is temporarily unavailable"
+                    + (f"; retry in {int(retry_in) + 1} seconds" if retry_in else "")
+                )
+
             # Check rate limits
             await self._check_rate_limit(tool.id, user_id, tool.rate_limit)
 
             # Execute tool via HTTP request
+            dispatched_tool = tool
             output_data = await self._call_tool_endpoint(
                 endpoint=str(tool.api_endpoint),
                 input_data=request.input_data,
                 auth_method=tool.authentication_method,
+                timeout=tool.timeout_seconds,
             )
 
-            execution_time = (time.time() - start_time) * 1000
+            if settings.TOOL_SCHEMA_VALIDATION_ENABLED and validators.output is not None:
+                errors = validate(validators.output, output_data, settings.TOOL_SCHEMA_MAX_ERRORS)
+                if errors:
+                    raise SchemaValidationError("Tool output does not match its output_schema", errors)
 
-            # Update metrics
-            await self._update_tool_metrics(
-                tool_id=tool.id,
-                execution_time=execution_time,
-                success=True,
-            )
+            execution_time = (time.time() - start_time) * 1000
 
-            # Log execution
+            # Log execution (tool metrics are updated by a database trigger)
             await self._log_tool_execution(
                 tool_id=tool.id,
                 user_id=user_id,
@@ -138,12 +203,17 @@ class CommunityToolsService:
         except Exception as e:
             execution_time = (time.time() - start_time) * 1000
 
-            # Update metrics for failure
-            await self._update_tool_metrics(
-                tool_id=request.tool_id,
-                execution_time=execution_time,
-                success=False,
-            )
+            # Log failed calls so tool metrics reflect them
+            if dispatched_tool is not None:
+                await self._log_tool_execution(
+                    tool_id=dispatched_tool.id,
+                    user_id=user_id,
+                    input_data=request.input_data,
+                    output_data={},
+                    execution_time=execution_time,
+                    success=False,
+                    error_message=str(e),
+                )
 
             return CommunityToolResponse(
                 tool_id=request.tool_id,
@@ -151,6 +221,7 @@ class CommunityToolsService:
                 output_data={},
                 execution_time_ms=execution_time,
                 error_message=str(e),
+                validation_errors=e.errors if isinstance(e, SchemaValidationError) else None,
             )
 
     async def list_tools(
@@ -159,57 +230,103 @@ class CommunityToolsService:
         status: str = "active",
         page: int = 1,
         per_page: int = 20,
+        cursor: Optional[str] = None,
+        view: str = "full",
     ) -> Dict[str, Any]:
         """
-        List available community tools.
+        List available community tools, newest first.
+
+        One query returns the page and a server-side count (TOOL_LIST_COUNT:
+        exact, planned or estimated). Pages can be addressed by number or,
+        with flat cost however deep, by the keyset cursor returned as
+        next_cursor. Results are cached briefly per filter and page.
 
         Args:
             category: Filter by category
             status: Filter by status (default: active)
-            page: Page number
+            page: Page number (ignored when cursor is given)
             per_page: Results per page
+            cursor: next_cursor from a previous page
+            view: full (all columns) or summary (no schemas)
 
         Returns:
-            Dict with tools, total, page info
+            Dict with tools, total, page info and next_cursor
+
+        Raises:
+            ValueError if the cursor is malformed
         """
-        query = self.db.table("community_tools").select("*").eq("status", status)
+        listings = get_tool_registry().listings
+        cache_key = json.dumps([status, category, page, per_page, cursor, view])
+        cached = listings.get(cache_key)
+        if cached is not None:
+            return cached
+
+        count = settings.TOOL_LIST_COUNT if cursor is None else None
+        columns = "*" if view == "full" else TOOL_SUMMARY_COLUMNS
+        query = self.db.table("community_tools").select(columns, count=count).eq("status", status)
 
         if category:
             query = query.eq("category", category)
 
-        # Get total count
-        count_result = query.execute()
-        total = len(count_result.data)
-
-        # Apply pagination
-        offset = (page - 1) * per_page
-        query = query.range(offset, offset + per_page - 1)
-
-        result = query.execute()
-
-        tools = [RegisteredTool(**tool) for tool in result.data]
-
-        return {
-            "tools": tools,
-            "total": total,
+        # Keyset order; (status, category, created_at, id) is indexed. The
+        # pinned postgrest client (0.13) has no or_() and sends each
+        # .order() as its own parameter, so both are set as single
+        # parameters here, built only from a parsed datetime and UUID.
+        query.params = query.params.set("order", "created_at.desc,id.desc")
+
+        # One extra row tells whether there is a next page
+        if cursor:
+            created_at, tool_id = _decode_cursor(cursor)
+            after = created_at.isoformat()
+            query.params = query.params.set(
+                "or",
+                f'(created_at.lt."{after}",'
+                f'and(created_at.eq."{after}",id.lt."{tool_id}"))',
+            )
+            query = query.limit(per_page + 1)
+        else:
+            offset = (page - 1) * per_page
+            # postgrest's range() excludes the end; this asks for per_page + 1
+            query = query.range(offset, offset + per_page + 1)
+
+        result = await asyncio.to_thread(query.execute)
+
+        rows = result.data[:per_page]
+        model = RegisteredTool if view == "full" else ToolSummary
+        listing = {
+            "tools": [model(**row) for row in rows],
+            "total": result.count,
+            "total_estimated": count is not None and count != "exact",
             "page": page,
             "per_page": per_page,
+            "next_cursor": _encode_cursor(rows[-1]) if len(result.data) > per_page else None,
         }
+        listings.set(cache_key, listing)
+        return listing
 
     async def _get_tool(self, tool_id: str) -> RegisteredTool:
-        """Fetch tool details from database."""
-        result = (
-            self.db.table("community_tools")
+        """Fetch current tool details (including metrics) from database."""
+        tool = await self._fetch_tool(tool_id)
+
+        if tool is None:
+            raise ValueError(f"Tool not found: {tool_id}")
+
+        return tool
+
+    async def _fetch_tool(self, tool_id: str) -> Optional[RegisteredTool]:
+        """Fetch a tool row, or None if there is no tool with this id."""
+        result = await asyncio.to_thread(
+            lambda: self.db.table("community_tools")
             .select("*")
             .eq("id", tool_id)
-            .single()
+            .limit(1)
             .execute()
         )
 
         if not result.data:
-            raise ValueError(f"Tool not found: {tool_id}")
+            return None
 
-        return RegisteredTool(**result.data)
+        return RegisteredTool(**result.data[0])
 
     async def _check_rate_limit(
         self,
@@ -220,6 +337,9 @@ class CommunityToolsService:
         """
         Check if user has exceeded rate limit for this tool.
 
+        Uses an in-memory (or shared Redis) token bucket per tool and
+        user, so the check is O(1) and never queries the database.
+
         Args:
             tool_id: Tool ID
             user_id: User ID
@@ -228,19 +348,16 @@ class CommunityToolsService:
         Raises:
             ValueError if rate limit exceeded
         """
-        # Query executions in last hour
-        result = (
-            self.db.table("tool_executions")
-            .select("id")
-            .eq("tool_id", tool_id)
-            .eq("user_id", user_id)
-            .gte("executed_at", "now() - interval '1 hour'")
-            .execute()
+        result = await get_rate_limiter().hit(
+            key=f"tool:{tool_id}:{user_id}",
+            capacity=rate_limit,
+            period_seconds=3600,
         )
 
-        if len(result.data) >= rate_limit:
+        if not result.allowed:
             raise ValueError(
-                f"Rate limit exceeded. Max {rate_limit} requests per hour."
+                f"Rate limit exceeded. Max {rate_limit} requests per hour. "
+                f"Retry in {int(result.retry_after) + 1} seconds."
             )
 
     async def _call_tool_endpoint(
@@ -248,14 +365,20 @@ class CommunityToolsService:
         endpoint: str,
         input_data: Dict[str, Any],
         auth_method: str,
+        timeout: float,
     ) -> Dict[str, Any]:
         """
         Call the external tool endpoint.
 
+        Uses the shared pooled HTTP client, so repeat calls to a tool reuse
+        warm connections. Outcomes and latency feed the endpoint's circuit
+        breaker.
+
         Args:
             endpoint: Tool API endpoint
             input_data: Input parameters
             auth_method: Authentication method
+            timeout: Seconds to wait for the tool (from its registration)
 
         Returns:
             Tool response data
@@ -265,49 +388,23 @@ class CommunityToolsService:
         # TODO: Implement authentication based on auth_method
         # For now, simple POST request
 
-        response = await self.http_client.post(
-            endpoint,
-            json=input_data,
-            headers=headers,
-        )
-
-        response.raise_for_status()
-        return response.json()
-
-    async def _update_tool_metrics(
-        self,
-        tool_id: str,
-        execution_time: float,
-        success: bool,
-    ) -> None:
-        """Update tool performance metrics."""
+        health = get_tool_health_monitor().endpoint(endpoint)
+        started_at = time.perf_counter()
         try:
-            # Fetch current metrics
-            tool = await self._get_tool(tool_id)
-
-            # Calculate new metrics
-            total_executions = tool.total_executions + 1
-            successes = int(tool.success_rate * tool.total_executions)
-            if success:
-                successes += 1
-
-            new_success_rate = successes / total_executions
-
-            # Calculate new average execution time
-            total_time = tool.average_execution_time_ms * tool.total_executions
-            new_avg_time = (total_time + execution_time) / total_executions
-
-            # Update in database
-            self.db.table("community_tools").update(
-                {
-                    "total_executions": total_executions,
-                    "success_rate": new_success_rate,
-                    "average_execution_time_ms": new_avg_time,
-                }
-            ).eq("id", tool_id).execute()
-
+            async with host_slot(endpoint):
+                response = await get_http_client().post(
+                    endpoint,
+                    json=input_data,
+                    headers=headers,
+                    timeout=timeout,
+                )
+            response.raise_for_status()
         except Exception as e:
-            print(f"Error updating tool metrics: {e}")
+            health.record(time.perf_counter() - started_at, ok=not counts_as_failure(e))
+            raise
+        health.record(time.perf_counter() - started_at, ok=True)
+
+        return response.json()
 
     async def _log_tool_execution(
         self,
@@ -317,8 +414,15 @@ class CommunityToolsService:
         output_data: Dict[str, Any],
         execution_time: float,
         success: bool,
+        error_message: Optional[str] = None,
     ) -> None:
-        """Log tool execution for analytics."""
+        """
+        Log tool execution for analytics (buffered, written in batches).
+
+        The record_tool_execution_metrics trigger on tool_executions keeps
+        community_tools.total_executions, success_rate and
+        average_execution_time_ms up to date atomically.
+        """
         try:
             log_data = {
                 "tool_id": tool_id,
@@ -327,13 +431,10 @@ class CommunityToolsService:
                 "output_data": output_data,
                 "execution_time_ms": execution_time,
                 "success": success,
+                "error_message": error_message,
             }
 
-            self.db.table("tool_executions").insert(log_data).execute()
+            await get_write_buffer("tool_executions").add(log_data)
 
         except Exception as e:
             print(f"Error logging tool execution: {e}")
-
-    async def close(self):
-        """Clean up HTTP client."""
-        await self.http_client.aclose()
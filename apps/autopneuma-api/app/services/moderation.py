@@ -6,10 +6,146 @@ It assists human moderators by identifying potential concerns based on biblical
 principles and community guidelines.
 """
 
-from typing import List
-import openai
+import asyncio
+import hashlib
+import json
+import unicodedata
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.core.cache import TieredCache
 from app.core.config import settings
-from app.schemas.moderation import ModerationFlag, ModerationResponse
+from app.core.llm import get_llm_client
+from app.core.tokens import truncate_tokens
+from app.schemas.moderation import (
+    ModerationFlag,
+    ModerationRequest,
+    ModerationResponse,
+)
+from app.services.moderation_prefilter import ModerationPrefilter, PrefilterResult
+
+
+# Bump whenever _build_system_prompt or _build_user_prompt change meaning,
+# so cached verdicts from the old prompt are no longer served.
+MODERATION_PROMPT_VERSION = "1"
+
+
+MODERATION_GUIDELINES = """You are an AI assistant helping moderate content for Auto Pneuma, a Christian AI technology community. Your role is to FLAG content that may need human moderator attention, NOT to censor or remove content.
+
+Our community values:
+- Christ-centered discussion and mutual edification (Ephesians 4:29)
+- Speaking truth in love with respect and humility (Ephesians 4:15)
+- Building up the body of Christ through our diverse gifts (1 Corinthians 12)
+- Excellence and integrity in technical work
+- Unity in essential beliefs, freedom in non-essentials
+
+FLAG content if it contains:
+1. **Personal attacks or disrespect**: Content that attacks individuals rather than discusses ideas
+2. **Divisive behavior**: Unnecessarily contentious or inflammatory theological arguments that divide rather than edify
+3. **Spam or promotional**: Unsolicited advertising or off-topic promotion
+4. **Theological concerns**: Teachings that clearly contradict Bible-based Christian doctrine (not denominational disputes)
+5. **Inappropriate content**: Explicit content, profanity, or vulgar language
+
+DO NOT FLAG:
+- Respectful disagreement on non-essential theological matters
+- Technical discussions of AI ethics from various Christian perspectives
+- Genuine questions about faith, even if they reveal doubt or struggle
+- Different denominational perspectives (Reformed, Charismatic, etc.)
+- Different approaches to AI development within biblical bounds"""
+
+
+@lru_cache(maxsize=64)
+def _system_prompt(content_type: str) -> str:
+    """Single-item system prompt, built once per content type."""
+    return f"""{MODERATION_GUIDELINES}
+
+Content type being moderated: {content_type}
+
+Respond ONLY with JSON in this format:
+{{
+  "flags": [
+    {{
+      "category": "category_name",
+      "confidence": 0.0-1.0,
+      "explanation": "clear explanation",
+      "severity": "low|medium|high"
+    }}
+  ]
+}}
+
+If no concerns, return: {{"flags": []}}"""
+
+
+@lru_cache(maxsize=1)
+def _batch_system_prompt() -> str:
+    """Batch system prompt, built once."""
+    return f"""{MODERATION_GUIDELINES}
+
+You will receive several numbered items. Judge each item independently.
+
+Respond ONLY with JSON in this format, with one entry per item id:
+{{
+  "results": [
+    {{
+      "id": 0,
+      "flags": [
+        {{
+          "category": "category_name",
+          "confidence": 0.0-1.0,
+          "explanation": "clear explanation",
+          "severity": "low|medium|high"
+        }}
+      ]
+    }}
+  ]
+}}
+
+Items with no concerns must still be listed with "flags": []."""
+
+
+_verdict_cache: Optional[TieredCache[ModerationResponse]] = None
+
+
+def is_system_error(response: ModerationResponse) -> bool:
+    """Whether a response stands in for a failed moderation call."""
+    return any(flag.category == "system_error" for flag in response.flags)
+
+
+def get_verdict_cache() -> Optional[TieredCache[ModerationResponse]]:
+    """Return the process-wide moderation verdict cache, or None if disabled."""
+    global _verdict_cache
+    if not settings.MODERATION_CACHE_ENABLED:
+        return None
+
+    if _verdict_cache is None:
+        _verdict_cache = TieredCache(
+            namespace="moderation",
+            max_entries=settings.MODERATION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.MODERATION_CACHE_TTL_SECONDS,
+            dumps=lambda response: response.model_dump_json(),
+            loads=ModerationResponse.model_validate_json,
+        )
+    return _verdict_cache
+
+
+def moderation_log_row(
+    content_id: str,
+    content_type: str,
+    result: ModerationResponse,
+) -> Dict[str, Any]:
+    """Build a moderation_log row for a flagged result."""
+    return {
+        "content_type": content_type,
+        "content_id": content_id,
+        "flagged_by": "ai_assistant",
+        "reason": result.recommendation,
+        "details": {
+            "flags": [flag.model_dump() for flag in result.flags],
+            "overall_score": result.overall_score,
+            "reasoning": result.reasoning,
+        },
+        "status": "pending",
+    }
 
 
 class ModerationService:
@@ -27,8 +163,12 @@ class ModerationService:
     """
 
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_client()
         self.threshold = settings.MODERATION_CONFIDENCE_THRESHOLD
+        self.cache = get_verdict_cache()
+        self.prefilter = (
+            ModerationPrefilter() if settings.MODERATION_PREFILTER_ENABLED else None
+        )
 
     async def moderate_content(
         self,
@@ -50,13 +190,25 @@ class ModerationService:
         if not settings.ENABLE_AI_MODERATION:
             return self._create_approved_response()
 
+        # Obviously clean or obviously spammy content is settled locally
+        prefiltered = self._apply_prefilter(content)
+        if prefiltered is not None:
+            return prefiltered
+
+        # Identical (or whitespace-only edited) content reuses a prior verdict
+        cache_key = self._cache_key(content, content_type)
+        if self.cache is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return self._from_cache(cached)
+
         try:
             # Build moderation prompt based on biblical principles
             system_prompt = self._build_system_prompt(content_type)
             user_prompt = self._build_user_prompt(content, content_type)
 
-            # Call OpenAI for analysis
-            response = self.client.chat.completions.create(
+            # Call the LLM for analysis
+            completion = await self.llm.chat_completion(
                 model=settings.OPENAI_MODERATION_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -64,118 +216,323 @@ class ModerationService:
                 ],
                 temperature=0.3,  # Lower temperature for consistent moderation
                 response_format={"type": "json_object"},
+                feature="moderation",
             )
 
             # Parse AI response
-            result = response.choices[0].message.content
+            result = completion.content
             flags = self._parse_moderation_result(result)
+            response = self._build_response(flags)
 
-            # Calculate overall score and recommendation
-            overall_score = self._calculate_overall_score(flags)
-            recommendation = self._determine_recommendation(overall_score, flags)
-            reasoning = self._generate_reasoning(flags, overall_score)
+            if self.cache is not None:
+                await self.cache.set(cache_key, response)
 
-            return ModerationResponse(
-                flagged=len(flags) > 0,
-                flags=flags,
-                overall_score=overall_score,
-                recommendation=recommendation,
-                reasoning=reasoning,
-            )
+            return response
 
         except Exception as e:
             # On error, default to flagging for manual review
             print(f"Moderation error: {e}")
-            return ModerationResponse(
-                flagged=True,
-                flags=[
-                    ModerationFlag(
-                        category="system_error",
-                        confidence=1.0,
-                        explanation="Moderation system encountered an error. Manual review recommended.",
-                        severity="medium",
-                    )
+            return self._create_error_response()
+
+    async def moderate_batch(
+        self,
+        items: List[ModerationRequest],
+    ) -> List[ModerationResponse]:
+        """
+        Moderate many items, packing short ones into shared completions.
+
+        Identical items are moderated once; the local pre-filter and cached
+        verdicts settle what they can.
+        Remaining short items are grouped into chunks of up to
+        MODERATION_BATCH_SIZE items (and MODERATION_BATCH_MAX_CHARS
+        characters); each chunk is sent as a single JSON-mode completion so
+        the system prompt is paid once per chunk. Long items fall back to
+        moderate_content.
+
+        Args:
+            items: Moderation requests, in order
+
+        Returns:
+            One ModerationResponse per item, in the same order
+        """
+        if not settings.ENABLE_AI_MODERATION:
+            return [self._create_approved_response() for _ in items]
+
+        results: List[Optional[ModerationResponse]] = [None] * len(items)
+        cache_keys = [
+            self._cache_key(item.content, item.content_type) for item in items
+        ]
+
+        # Coalesce identical items (spam waves, reposts) onto one verdict
+        pending: List[int] = []
+        duplicates: Dict[int, int] = {}
+        first_index: Dict[str, int] = {}
+        for index, key in enumerate(cache_keys):
+            if key in first_index:
+                duplicates[index] = first_index[key]
+                continue
+            first_index[key] = index
+
+            prefiltered = self._apply_prefilter(items[index].content)
+            if prefiltered is not None:
+                results[index] = prefiltered
+                continue
+
+            cached = await self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                results[index] = self._from_cache(cached)
+            else:
+                pending.append(index)
+
+        chunks: List[List[int]] = []
+        singles: List[int] = []
+        chunk: List[int] = []
+        chunk_chars = 0
+        for index in pending:
+            length = len(items[index].content)
+            if length > settings.MODERATION_BATCH_ITEM_MAX_CHARS:
+                singles.append(index)
+                continue
+
+            if chunk and (
+                len(chunk) >= settings.MODERATION_BATCH_SIZE
+                or chunk_chars + length > settings.MODERATION_BATCH_MAX_CHARS
+            ):
+                chunks.append(chunk)
+                chunk, chunk_chars = [], 0
+
+            chunk.append(index)
+            chunk_chars += length
+
+        if chunk:
+            chunks.append(chunk)
+
+        async def run_chunk(indices: List[int]) -> None:
+            verdicts = await self._moderate_chunk([items[i] for i in indices])
+            for index, verdict in zip(indices, verdicts):
+                if verdict is None:
+                    # Item missing from the batch output; moderate it alone
+                    singles.append(index)
+                    continue
+                results[index] = verdict
+                # Failed calls are not verdicts; let the next request retry
+                if self.cache is not None and not is_system_error(verdict):
+                    await self.cache.set(cache_keys[index], verdict)
+
+        await asyncio.gather(*(run_chunk(indices) for indices in chunks))
+
+        async def run_single(index: int) -> None:
+            item = items[index]
+            results[index] = await self.moderate_content(
+                content=item.content,
+                content_type=item.content_type,
+                author_id=item.author_id,
+            )
+
+        await asyncio.gather(*(run_single(index) for index in singles))
+
+        for index, original in duplicates.items():
+            results[index] = results[original]
+
+        return results
+
+    async def _moderate_chunk(
+        self,
+        chunk: List[ModerationRequest],
+    ) -> List[Optional[ModerationResponse]]:
+        """
+        Moderate a chunk of items with a single completion.
+
+        Returns one entry per item; None marks an item the model omitted.
+        On a failed call every item gets the system error response.
+        """
+        try:
+            completion = await self.llm.chat_completion(
+                model=settings.OPENAI_MODERATION_MODEL,
+                messages=[
+                    {"role": "system", "content": self._build_batch_system_prompt()},
+                    {"role": "user", "content": self._build_batch_user_prompt(chunk)},
                 ],
-                overall_score=0.5,
-                recommendation="flag_for_review",
-                reasoning="System error during automated moderation. Please review manually.",
+                temperature=0.3,  # Lower temperature for consistent moderation
+                response_format={"type": "json_object"},
+                feature="moderation_batch",
             )
+            flags_by_id = self._parse_batch_result(completion.content)
 
-    def _build_system_prompt(self, content_type: str) -> str:
-        """Build the system prompt for moderation based on biblical principles."""
-        return f"""You are an AI assistant helping moderate content for Auto Pneuma, a Christian AI technology community. Your role is to FLAG content that may need human moderator attention, NOT to censor or remove content.
+        except Exception as e:
+            print(f"Batch moderation error: {e}")
+            return [self._create_error_response() for _ in chunk]
 
-Our community values:
-- Christ-centered discussion and mutual edification (Ephesians 4:29)
-- Speaking truth in love with respect and humility (Ephesians 4:15)
-- Building up the body of Christ through our diverse gifts (1 Corinthians 12)
-- Excellence and integrity in technical work
-- Unity in essential beliefs, freedom in non-essentials
+        return [
+            self._build_response(flags_by_id[index]) if index in flags_by_id else None
+            for index in range(len(chunk))
+        ]
 
-FLAG content if it contains:
-1. **Personal attacks or disrespect**: Content that attacks individuals rather than discusses ideas
-2. **Divisive behavior**: Unnecessarily contentious or inflammatory theological arguments that divide rather than edify
-3. **Spam or promotional**: Unsolicited advertising or off-topic promotion
-4. **Theological concerns**: Teachings that clearly contradict Bible-based Christian doctrine (not denominational disputes)
-5. **Inappropriate content**: Explicit content, profanity, or vulgar language
+    def _apply_prefilter(self, content: str) -> Optional[ModerationResponse]:
+        """
+        Run the local pre-filter stage.
 
-DO NOT FLAG:
-- Respectful disagreement on non-essential theological matters
-- Technical discussions of AI ethics from various Christian perspectives
-- Genuine questions about faith, even if they reveal doubt or struggle
-- Different denominational perspectives (Reformed, Charismatic, etc.)
-- Different approaches to AI development within biblical bounds
+        Returns a response for obviously clean or obviously spammy content,
+        or None when the content is ambiguous and needs the LLM.
+        """
+        if self.prefilter is None:
+            return None
 
-Content type being moderated: {content_type}
+        result = self.prefilter.evaluate(content)
 
-Respond ONLY with JSON in this format:
-{{
-  "flags": [
-    {{
-      "category": "category_name",
-      "confidence": 0.0-1.0,
-      "explanation": "clear explanation",
-      "severity": "low|medium|high"
-    }}
-  ]
-}}
+        if result.decision == PrefilterResult.CLEAN:
+            return ModerationResponse(
+                flagged=False,
+                flags=[],
+                overall_score=0.0,
+                recommendation="approve",
+                reasoning="Content passed the local pre-filter. No concerns identified.",
+                decided_by="prefilter",
+            )
 
-If no concerns, return: {{"flags": []}}"""
+        if result.decision == PrefilterResult.SPAM:
+            flag = ModerationFlag(
+                category="spam",
+                confidence=round(result.spam_score, 3),
+                explanation="Local spam pre-filter: " + "; ".join(result.reasons),
+                severity="high",
+            )
+            response = self._build_response([flag])
+            response.decided_by = "prefilter"
+            return response
+
+        return None
+
+    def _from_cache(self, cached: ModerationResponse) -> ModerationResponse:
+        """Return a fresh copy of a cached verdict."""
+        return cached.model_copy(
+            update={"timestamp": datetime.utcnow(), "decided_by": "cache"}
+        )
+
+    def _cache_key(self, content: str, content_type: str) -> str:
+        """
+        Build the verdict cache key.
+
+        Content is Unicode-normalized and whitespace-collapsed so reposts and
+        whitespace-only edits share a key. The prompt version, model and
+        threshold are included so config changes never serve stale verdicts.
+        """
+        normalized = " ".join(unicodedata.normalize("NFKC", content).split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return ":".join(
+            [
+                MODERATION_PROMPT_VERSION,
+                settings.OPENAI_MODERATION_MODEL,
+                f"{self.threshold:g}",
+                content_type,
+                digest,
+            ]
+        )
+
+    def _build_system_prompt(self, content_type: str) -> str:
+        """Build the system prompt for moderation based on biblical principles."""
+        return _system_prompt(content_type)
+
+    def _build_batch_system_prompt(self) -> str:
+        """Build the system prompt for moderating several items at once."""
+        return _batch_system_prompt()
 
     def _build_user_prompt(self, content: str, content_type: str) -> str:
         """Build the user prompt with content to moderate."""
+        # Keep both ends of oversized content so neither is hidden from review
+        content = truncate_tokens(
+            content,
+            settings.MODERATION_MAX_CONTENT_TOKENS,
+            settings.OPENAI_MODERATION_MODEL,
+            keep_tail=True,
+        )
         return f"""Please analyze this {content_type} content and flag any concerns:
 
 Content:
 {content}
 
+Remember: Flag for human review if genuinely concerning, but err on the side of freedom when content is within biblical bounds even if imperfect in tone."""
+
+    def _build_batch_user_prompt(self, chunk: List[ModerationRequest]) -> str:
+        """Build the user prompt listing every item in a batch."""
+        items = json.dumps(
+            [
+                {"id": index, "content_type": item.content_type, "content": item.content}
+                for index, item in enumerate(chunk)
+            ],
+            ensure_ascii=False,
+        )
+        return f"""Please analyze each of these items and flag any concerns:
+
+Items:
+{items}
+
 Remember: Flag for human review if genuinely concerning, but err on the side of freedom when content is within biblical bounds even if imperfect in tone."""
 
     def _parse_moderation_result(self, result: str) -> List[ModerationFlag]:
-        """Parse the AI response into ModerationFlag objects."""
-        import json
+        """
+        Parse the AI response into ModerationFlag objects.
 
+        Raises:
+            ValueError if the response is not the expected JSON, so a
+            malformed reply is never mistaken for "no concerns"
+        """
         try:
             data = json.loads(result)
-            flags = []
-
-            for flag_data in data.get("flags", []):
-                flag = ModerationFlag(
-                    category=flag_data["category"],
-                    confidence=float(flag_data["confidence"]),
-                    explanation=flag_data["explanation"],
-                    severity=flag_data["severity"],
+            flags = data["flags"]
+            if not isinstance(flags, list):
+                raise TypeError("flags is not a list")
+            return self._parse_flags(flags)
+
+        except Exception as e:
+            raise ValueError(f"Malformed moderation result: {e}")
+
+    def _parse_batch_result(self, result: str) -> Dict[int, List[ModerationFlag]]:
+        """Parse a batch AI response into flags keyed by item id."""
+        data = json.loads(result)
+        flags_by_id = {}
+
+        for entry in data.get("results", []):
+            try:
+                flags_by_id[int(entry["id"])] = self._parse_flags(
+                    entry.get("flags", [])
                 )
+            except Exception as e:
+                print(f"Error parsing batch moderation entry: {e}")
 
-                # Only include flags above threshold
-                if flag.confidence >= self.threshold:
-                    flags.append(flag)
+        return flags_by_id
 
-            return flags
+    def _parse_flags(self, flag_list: List[Dict[str, Any]]) -> List[ModerationFlag]:
+        """Convert raw flag dicts into ModerationFlag objects above threshold."""
+        flags = []
 
-        except Exception as e:
-            print(f"Error parsing moderation result: {e}")
-            return []
+        for flag_data in flag_list:
+            flag = ModerationFlag(
+                category=flag_data["category"],
+                confidence=float(flag_data["confidence"]),
+                explanation=flag_data["explanation"],
+                severity=flag_data["severity"],
+            )
+
+            # Only include flags above threshold
+            if flag.confidence >= self.threshold:
+                flags.append(flag)
+
+        return flags
+
+    def _build_response(self, flags: List[ModerationFlag]) -> ModerationResponse:
+        """Score flags and assemble the moderation response."""
+        overall_score = self._calculate_overall_score(flags)
+        recommendation = self._determine_recommendation(overall_score, flags)
+        reasoning = self._generate_reasoning(flags, overall_score)
+
+        return ModerationResponse(
+            flagged=len(flags) > 0,
+            flags=flags,
+            overall_score=overall_score,
+            recommendation=recommendation,
+            reasoning=reasoning,
+        )
 
     def _calculate_overall_score(self, flags: List[ModerationFlag]) -> float:
         """Calculate overall concern score from flags."""
@@ -245,4 +602,22 @@ Remember: Flag for human review if genuinely concerning, but err on the side of
             overall_score=0.0,
             recommendation="approve",
             reasoning="AI moderation is currently disabled. Content approved by default.",
+            decided_by="disabled",
+        )
+
+    def _create_error_response(self) -> ModerationResponse:
+        """Create a flag-for-review response when moderation fails."""
+        return ModerationResponse(
+            flagged=True,
+            flags=[
+                ModerationFlag(
+                    category="system_error",
+                    confidence=1.0,
+                    explanation="Moderation system encountered an error. Manual review recommended.",
+                    severity="medium",
+                )
+            ],
+            overall_score=0.5,
+            recommendation="flag_for_review",
+            reasoning="System error during automated moderation. Please review manually.",
         )
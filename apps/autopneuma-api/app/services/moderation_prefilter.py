@@ -0,0 +1,232 @@
+"""
+Local moderation pre-filter.
+
+Cheap, CPU-only first stage of the moderation pipeline. It settles content
+that is obviously spam, or made up only of short stock phrases ("Amen",
+"Praying for you", "God bless"), in microseconds. Everything else goes to
+the LLM: a low spam score says nothing about abuse or theological
+concerns, so it is never taken as evidence that content is clean. Like
+the LLM stage, it only flags content for human review; it never removes
+anything.
+"""
+
+import math
+import re
+from typing import List
+
+from app.core.config import settings
+
+
+URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+
+# Strong promotional / scam signals
+SPAM_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in [
+        r"\b(?:buy|order|shop)\s+now\b",
+        r"\bclick\s+(?:here|the\s+link|below)\b",
+        r"\b(?:limited|special)\s+(?:time\s+)?offer\b",
+        r"\b(?:free|cheap)\s+(?:money|followers|likes|crypto|bitcoin)\b",
+        r"\b(?:earn|make)\s+\$?\d[\d,]*\s*(?:k|dollars|usd)?\s*(?:per|a|/)\s*(?:day|week|hour)\b",
+        r"\b(?:casino|viagra|cialis|forex\s+signals|payday\s+loans?)\b",
+        r"\b(?:dm|whatsapp|telegram)\s+me\b",
+        r"\bguaranteed\s+(?:income|returns?|profit)\b",
+        r"\b(?:promo|discount|coupon)\s+code\b",
+    ]
+]
+
+# Words that need human or LLM judgement; content containing them is
+# never settled as clean locally.
+SENSITIVE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in [
+        r"\b(?:idiot|stupid|moron|dumb|fool|loser|pathetic|disgusting)\b",
+        r"\b(?:shut\s+up|hate\s+you|go\s+to\s+hell)\b",
+        r"\b(?:heretic|heresy|apostate|false\s+teacher|cult)\b",
+        r"\b(?:damn|hell|crap|sh[i1!]t|f[u*]ck|b[i1!]tch|bastard|ass(?:hole)?)\b",
+        r"\b(?:kill|suicide|self[-\s]?harm|abuse)\b",
+        r"\b(?:porn|nsfw|nude|sex)\b",
+    ]
+]
+
+# Stock replies settled as clean without an LLM call. Content is clean
+# only when every sentence in it is one of these.
+BENIGN_PHRASES = frozenset([
+    "amen",
+    "amen amen",
+    "and also with you",
+    "alleluia",
+    "bless you",
+    "beautiful",
+    "glory to god",
+    "god bless",
+    "god bless you",
+    "god is good",
+    "hallelujah",
+    "i'm praying for you",
+    "i am praying for you",
+    "in jesus name",
+    "in jesus name amen",
+    "lord have mercy",
+    "lord hear our prayer",
+    "me too",
+    "peace be with you",
+    "praise god",
+    "praise the lord",
+    "praying",
+    "praying for you",
+    "praying for you all",
+    "praying with you",
+    "so true",
+    "thank god",
+    "thank you",
+    "thank you jesus",
+    "thank you lord",
+    "thank you so much",
+    "thanks",
+    "thanks for sharing",
+    "well said",
+    "will be praying",
+    "will pray",
+])
+
+# Letters, spaces and sentence punctuation only; anything else (digits,
+# emoji, symbols) needs a closer look
+PLAIN_TEXT_PATTERN = re.compile(r"[A-Za-z'’\s.,!?;:]+")
+SENTENCE_SPLIT_PATTERN = re.compile(r"[.,!?;:\n]+")
+
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{8,}\d")
+REPEATED_CHAR_PATTERN = re.compile(r"(.)\1{5,}")
+
+# Weights for the small logistic spam classifier below. Features are
+# scaled to roughly 0-1 so the weights are directly comparable.
+SPAM_MODEL_BIAS = -4.0
+SPAM_MODEL_WEIGHTS = {
+    "spam_phrases": 3.0,
+    "url_count": 1.5,
+    "link_density": 4.0,
+    "uppercase_ratio": 2.5,
+    "exclamation_density": 2.0,
+    "phone_numbers": 1.5,
+    "repeated_chars": 1.0,
+    "money_symbols": 1.0,
+}
+
+
+class PrefilterResult:
+    """Outcome of the local pre-filter for one item."""
+
+    CLEAN = "clean"
+    SPAM = "spam"
+    AMBIGUOUS = "ambiguous"
+
+    def __init__(self, decision: str, spam_score: float, reasons: List[str]):
+        self.decision = decision
+        self.spam_score = spam_score
+        self.reasons = reasons
+
+
+class ModerationPrefilter:
+    """
+    Keyword, regex and link-density heuristics plus a tiny logistic
+    spam classifier.
+
+    Thresholds come from Settings:
+    - MODERATION_PREFILTER_SPAM_THRESHOLD: spam score at or above which
+      content is flagged as spam without an LLM call
+    - MODERATION_PREFILTER_CLEAN_MAX_CHARS: longest content that may be
+      settled as clean locally (only stock phrases are, see
+      BENIGN_PHRASES)
+    - MODERATION_PREFILTER_MAX_LINK_DENSITY: share of characters inside
+      links above which content is treated as link spam
+    """
+
+    def __init__(self):
+        self.spam_threshold = settings.MODERATION_PREFILTER_SPAM_THRESHOLD
+        self.clean_max_chars = settings.MODERATION_PREFILTER_CLEAN_MAX_CHARS
+        self.max_link_density = settings.MODERATION_PREFILTER_MAX_LINK_DENSITY
+
+    def evaluate(self, content: str) -> PrefilterResult:
+        """
+        Classify content as clean, spam, or ambiguous.
+
+        Args:
+            content: The text content to check
+
+        Returns:
+            PrefilterResult with decision, spam score and reasons
+        """
+        text = content.strip()
+        if not text:
+            return PrefilterResult(PrefilterResult.CLEAN, 0.0, ["empty content"])
+
+        urls = URL_PATTERN.findall(text)
+        link_chars = sum(len(url) for url in urls)
+        link_density = link_chars / len(text)
+        spam_phrases = sum(1 for pattern in SPAM_PATTERNS if pattern.search(text))
+        sensitive = [p.pattern for p in SENSITIVE_PATTERNS if p.search(text)]
+
+        reasons = []
+        if spam_phrases:
+            reasons.append(f"{spam_phrases} promotional phrase(s)")
+        if urls:
+            reasons.append(f"{len(urls)} link(s), {link_density:.0%} link density")
+
+        spam_score = self._spam_score(text, urls, link_density, spam_phrases)
+
+        if link_density >= self.max_link_density and len(urls) >= 2:
+            reasons.append("link-only content")
+            return PrefilterResult(PrefilterResult.SPAM, max(spam_score, 0.99), reasons)
+
+        if spam_score >= self.spam_threshold:
+            return PrefilterResult(PrefilterResult.SPAM, spam_score, reasons)
+
+        if not urls and not sensitive and self._is_benign(text):
+            reasons.append("stock phrase")
+            return PrefilterResult(PrefilterResult.CLEAN, spam_score, reasons)
+
+        if sensitive:
+            reasons.append("contains terms needing review")
+        return PrefilterResult(PrefilterResult.AMBIGUOUS, spam_score, reasons)
+
+    def _is_benign(self, text: str) -> bool:
+        """Whether short content consists only of stock benign phrases."""
+        if len(text) > self.clean_max_chars or not PLAIN_TEXT_PATTERN.fullmatch(text):
+            return False
+        sentences = [
+            " ".join(sentence.replace("’", "'").lower().split())
+            for sentence in SENTENCE_SPLIT_PATTERN.split(text)
+        ]
+        sentences = [sentence for sentence in sentences if sentence]
+        return bool(sentences) and all(sentence in BENIGN_PHRASES for sentence in sentences)
+
+    def _spam_score(
+        self,
+        text: str,
+        urls: List[str],
+        link_density: float,
+        spam_phrases: int,
+    ) -> float:
+        """Logistic spam probability from cheap text features."""
+        letters = [c for c in text if c.isalpha()]
+        uppercase_ratio = (
+            sum(1 for c in letters if c.isupper()) / len(letters)
+            if len(letters) >= 20
+            else 0.0
+        )
+
+        features = {
+            "spam_phrases": min(spam_phrases / 2, 1.0),
+            "url_count": min(len(urls) / 3, 1.0),
+            "link_density": link_density,
+            "uppercase_ratio": uppercase_ratio,
+            "exclamation_density": min(text.count("!") / max(len(text) / 100, 1) / 3, 1.0),
+            "phone_numbers": min(len(PHONE_PATTERN.findall(text)), 1),
+            "repeated_chars": 1.0 if REPEATED_CHAR_PATTERN.search(text) else 0.0,
+            "money_symbols": min((text.count("$") + text.count("€") + text.count("£")) / 3, 1.0),
+        }
+
+        z = SPAM_MODEL_BIAS + sum(
+            SPAM_MODEL_WEIGHTS[name] * value for name, value in features.items()
+        )
+        return 1.0 / (1.0 + math.exp(-z))
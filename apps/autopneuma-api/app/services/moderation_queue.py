@@ -0,0 +1,358 @@
+"""
+Asynchronous moderation job queue.
+
+Content is queued in the durable `moderation_jobs` table and drained by a
+pool of background workers running inside the API process. Workers claim
+jobs in batches, moderate them through ModerationService.moderate_batch,
+write results back in bulk (flags go through the shared moderation_log
+write buffer) and optionally notify a webhook. This keeps the HTTP tier
+responsive during traffic spikes.
+
+Webhook URLs come from callers, so they must be https, match
+MODERATION_WEBHOOK_ALLOWED_PREFIXES when it is set, and resolve to public
+addresses; they are checked on submission and again before each POST.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from supabase import Client
+
+from app.core.config import settings
+from app.core.http import ensure_public_url, get_http_client
+from app.core.write_buffer import get_write_buffer
+from app.schemas.moderation import (
+    ModerationJobStatus,
+    ModerationQueueStats,
+    ModerationRequest,
+    ModerationResponse,
+)
+from app.services.moderation import ModerationService, is_system_error, moderation_log_row
+
+
+async def check_webhook_url(url: str) -> None:
+    """
+    Check that moderation results may be sent to a webhook URL.
+
+    Raises:
+        ValueError if the URL is not https, is outside
+        MODERATION_WEBHOOK_ALLOWED_PREFIXES, or resolves to a non-public
+        address
+    """
+    if not url.startswith("https://"):
+        raise ValueError("webhook_url must use https")
+    prefixes = settings.MODERATION_WEBHOOK_ALLOWED_PREFIXES
+    if prefixes and not any(url.startswith(prefix) for prefix in prefixes):
+        raise ValueError("webhook_url is not in MODERATION_WEBHOOK_ALLOWED_PREFIXES")
+    await ensure_public_url(url)
+
+
+class ModerationQueue:
+    """Submit, inspect and measure queued moderation jobs."""
+
+    def __init__(self, db: Client):
+        self.db = db
+
+    async def submit(
+        self,
+        items: List[ModerationRequest],
+        webhook_url: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Queue items for moderation.
+
+        Args:
+            items: Content to moderate
+            webhook_url: Optional URL notified when jobs complete
+
+        Returns:
+            Job IDs, one per item, in order
+
+        Raises:
+            ValueError if the webhook URL is not allowed
+        """
+        if webhook_url:
+            await check_webhook_url(webhook_url)
+
+        rows = [
+            {
+                "content": item.content,
+                "content_type": item.content_type,
+                "content_id": item.content_id,
+                "author_id": item.author_id,
+                "webhook_url": webhook_url,
+                "status": "queued",
+            }
+            for item in items
+        ]
+
+        result = await asyncio.to_thread(
+            lambda: self.db.table("moderation_jobs").insert(rows).execute()
+        )
+        return [row["id"] for row in result.data]
+
+    async def get_job(self, job_id: str) -> ModerationJobStatus:
+        """
+        Fetch a job's status and result.
+
+        Raises:
+            ValueError if the job does not exist
+        """
+        result = await asyncio.to_thread(
+            lambda: self.db.table("moderation_jobs")
+            .select("id, status, content_id, result, error_message, attempts, created_at, completed_at")
+            .eq("id", job_id)
+            .limit(1)
+            .execute()
+        )
+
+        if not result.data:
+            raise ValueError(f"Moderation job not found: {job_id}")
+
+        return ModerationJobStatus(**result.data[0])
+
+    async def stats(self) -> ModerationQueueStats:
+        """Queue depth and lag, plus this process's worker counters."""
+        result = await asyncio.to_thread(
+            lambda: self.db.rpc("moderation_queue_stats", {}).execute()
+        )
+        row = result.data[0] if result.data else {}
+
+        lag_seconds = 0.0
+        if row.get("oldest_queued_at"):
+            oldest = datetime.fromisoformat(row["oldest_queued_at"])
+            lag_seconds = max(
+                (datetime.now(timezone.utc) - oldest).total_seconds(), 0.0
+            )
+
+        workers = get_moderation_workers()
+        return ModerationQueueStats(
+            queued=row.get("queued") or 0,
+            processing=row.get("processing") or 0,
+            lag_seconds=lag_seconds,
+            workers=workers.concurrency if workers else 0,
+            running=workers is not None and workers.running,
+            processed=workers.processed if workers else 0,
+            failed=workers.failed if workers else 0,
+        )
+
+
+class ModerationWorkerPool:
+    """
+    Background workers that drain the moderation queue.
+
+    Each worker claims up to MODERATION_QUEUE_BATCH_SIZE jobs at a time.
+    Throughput across all workers is capped at
+    MODERATION_QUEUE_MAX_ITEMS_PER_SECOND so spikes are smoothed rather
+    than forwarded to the LLM provider.
+    """
+
+    def __init__(self, db: Client):
+        self.db = db
+        self.concurrency = settings.MODERATION_QUEUE_WORKERS
+        self.batch_size = settings.MODERATION_QUEUE_BATCH_SIZE
+        self.poll_interval = settings.MODERATION_QUEUE_POLL_SECONDS
+        self.max_items_per_second = settings.MODERATION_QUEUE_MAX_ITEMS_PER_SECOND
+        self.max_attempts = settings.MODERATION_QUEUE_MAX_ATTEMPTS
+        self.running = False
+        self.processed = 0
+        self.failed = 0
+        self._tasks: List[asyncio.Task] = []
+        self._next_slot = 0.0
+
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        if self.running:
+            return
+
+        self.running = True
+        self._tasks = [
+            asyncio.create_task(self._run_worker(n)) for n in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers; claimed jobs are reclaimed after the visibility timeout."""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run_worker(self, worker_id: int) -> None:
+        """Claim and process batches until stopped."""
+        while self.running:
+            try:
+                jobs = await self._claim_jobs()
+                if not jobs:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                await self._throttle(len(jobs))
+                await self._process_jobs(jobs)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Moderation worker {worker_id} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim_jobs(self) -> List[Dict[str, Any]]:
+        """Atomically claim the next batch of queued jobs."""
+        result = await asyncio.to_thread(
+            lambda: self.db.rpc(
+                "claim_moderation_jobs",
+                {
+                    "p_limit": self.batch_size,
+                    "p_visibility_timeout_seconds": settings.MODERATION_QUEUE_VISIBILITY_TIMEOUT_SECONDS,
+                },
+            ).execute()
+        )
+        return result.data or []
+
+    async def _throttle(self, items: int) -> None:
+        """Reserve throughput for a batch, sleeping if the pool is ahead of rate."""
+        if self.max_items_per_second <= 0:
+            return
+
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_slot)
+        self._next_slot = start + items / self.max_items_per_second
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def _process_jobs(self, jobs: List[Dict[str, Any]]) -> None:
+        """Moderate a claimed batch and write results back in bulk."""
+        requests = [
+            ModerationRequest(
+                content=job["content"],
+                content_type=job["content_type"],
+                content_id=job.get("content_id"),
+                author_id=job.get("author_id"),
+            )
+            for job in jobs
+        ]
+
+        try:
+            results = await ModerationService().moderate_batch(requests)
+        except Exception as e:
+            print(f"Moderation batch error: {e}")
+            await self._fail_jobs(jobs, str(e))
+            return
+
+        # moderate_batch reports provider failures as system_error verdicts
+        # rather than raising; retry those jobs instead of completing them
+        errored = [job for job, result in zip(jobs, results) if is_system_error(result)]
+        if errored:
+            await self._fail_jobs(errored, "Moderation provider error")
+            kept = [
+                (job, result) for job, result in zip(jobs, results)
+                if not is_system_error(result)
+            ]
+            if not kept:
+                return
+            jobs = [job for job, _ in kept]
+            results = [result for _, result in kept]
+
+        completed_at = datetime.now(timezone.utc).isoformat()
+        updates = [
+            {
+                **job,
+                "status": "completed",
+                "result": result.model_dump(mode="json"),
+                "error_message": None,
+                "completed_at": completed_at,
+            }
+            for job, result in zip(jobs, results)
+        ]
+
+        flagged_rows = [
+            moderation_log_row(job["content_id"], job["content_type"], result)
+            for job, result in zip(jobs, results)
+            if job.get("content_id") and result.flagged
+        ]
+
+        await asyncio.to_thread(
+            lambda: self.db.table("moderation_jobs").upsert(updates).execute()
+        )
+        if flagged_rows:
+            await get_write_buffer("moderation_log").add_many(flagged_rows)
+
+        self.processed += len(jobs)
+        await self._notify_webhooks(jobs, results)
+
+    async def _fail_jobs(self, jobs: List[Dict[str, Any]], error: str) -> None:
+        """Requeue jobs for retry, or mark them failed after max attempts."""
+        updates = []
+        for job in jobs:
+            exhausted = job.get("attempts", 0) >= self.max_attempts
+            updates.append(
+                {
+                    **job,
+                    "status": "failed" if exhausted else "queued",
+                    "error_message": error,
+                }
+            )
+            if exhausted:
+                self.failed += 1
+
+        try:
+            await asyncio.to_thread(
+                lambda: self.db.table("moderation_jobs").upsert(updates).execute()
+            )
+        except Exception as e:
+            print(f"Error updating failed moderation jobs: {e}")
+
+    async def _notify_webhooks(
+        self,
+        jobs: List[Dict[str, Any]],
+        results: List[ModerationResponse],
+    ) -> None:
+        """POST completed results to each distinct webhook, one call per URL."""
+        by_url: Dict[str, List[Dict[str, Any]]] = {}
+        for job, result in zip(jobs, results):
+            if job.get("webhook_url"):
+                by_url.setdefault(job["webhook_url"], []).append(
+                    {
+                        "job_id": job["id"],
+                        "content_id": job.get("content_id"),
+                        "status": "completed",
+                        "result": result.model_dump(mode="json"),
+                    }
+                )
+
+        for url, payload in by_url.items():
+            try:
+                # Checked again here: the host may resolve differently now
+                await check_webhook_url(url)
+                await get_http_client().post(
+                    url,
+                    json={"jobs": payload},
+                    timeout=settings.MODERATION_WEBHOOK_TIMEOUT_SECONDS,
+                )
+            except Exception as e:
+                print(f"Moderation webhook error ({url}): {e}")
+
+
+_worker_pool: Optional[ModerationWorkerPool] = None
+
+
+def get_moderation_workers() -> Optional[ModerationWorkerPool]:
+    """Return the worker pool running in this process, if any."""
+    return _worker_pool
+
+
+async def start_moderation_workers(db: Client) -> None:
+    """Start the background moderation workers (called on startup)."""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = ModerationWorkerPool(db)
+        await _worker_pool.start()
+
+
+async def stop_moderation_workers() -> None:
+    """Stop the background moderation workers (called on shutdown)."""
+    global _worker_pool
+    if _worker_pool is not None:
+        await _worker_pool.stop()
+        _worker_pool = None
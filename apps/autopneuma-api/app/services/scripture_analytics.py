@@ -0,0 +1,421 @@
+"""
+Scripture query analytics.
+
+Requests are recorded to a local append-only event log without touching
+the request path: record() only appends to a bounded in-memory buffer
+(dropping events if it is full), and a background task writes buffered
+events as immutable, gzip-compressed columnar segments:
+
+    {SCRIPTURE_ANALYTICS_DIR}/events/{YYYY-MM-DD}/{HHMMSS}-{pid}-{seq}.json.gz
+
+A periodic rollup summarizes the last SCRIPTURE_ANALYTICS_WINDOW_DAYS of
+segments (popular queries, topics and referenced passages) into
+`rollups/latest.json`. Segment summaries are memoized since segments
+never change, so each rollup only reads new files. The rollup then warms
+the Scripture answer cache with popular questions that are not cached.
+
+One worker per host does the rollup (guarded by a lock file); every
+worker writes its own segments.
+
+    python -m app.services.scripture_analytics rollup
+"""
+
+import argparse
+import asyncio
+import fcntl
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.scripture import ScriptureContextResponse
+from app.services.scripture_cache import get_answer_cache, normalize_query
+from app.services.scripture_topics import classify
+
+
+SEGMENT_FORMAT = 1
+
+_COLUMNS = (
+    "ts",
+    "query",
+    "content_type",
+    "bible_version",
+    "has_context",
+    "source",
+    "stream",
+    "references",
+)
+
+
+def _events_dir() -> str:
+    return os.path.join(settings.SCRIPTURE_ANALYTICS_DIR, "events")
+
+
+def rollup_path() -> str:
+    """Path of the latest rollup."""
+    return os.path.join(settings.SCRIPTURE_ANALYTICS_DIR, "rollups", "latest.json")
+
+
+def write_segment(rows: List[Tuple], directory: str, name: str) -> str:
+    """Write events as one columnar segment; returns its path."""
+    columns = {column: [row[i] for row in rows] for i, column in enumerate(_COLUMNS)}
+    # Normalized here rather than when recording, off the request path
+    columns["query"] = [normalize_query(query) for query in columns["query"]]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump({"format": SEGMENT_FORMAT, "count": len(rows), "columns": columns}, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_segment(path: str) -> Dict[str, List[Any]]:
+    """Columns of a segment."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)["columns"]
+
+
+def summarize_segment(columns: Dict[str, List[Any]]) -> Dict[str, Counter]:
+    """Counts of one segment, mergeable across segments."""
+    summary = {
+        "queries": Counter(),
+        "passages": Counter(),
+        "sources": Counter(columns["source"]),
+        "versions": Counter(columns["bible_version"]),
+        "content_types": Counter(ct or "general" for ct in columns["content_type"]),
+    }
+    for query, content_type, version, has_context, references in zip(
+        columns["query"],
+        columns["content_type"],
+        columns["bible_version"],
+        columns["has_context"],
+        columns["references"],
+    ):
+        summary["queries"][(query, version, content_type or "", has_context)] += 1
+        summary["passages"].update(references)
+    return summary
+
+
+class ScriptureAnalytics:
+    """Buffered event recorder with periodic rollups and cache warming."""
+
+    def __init__(self):
+        self._pending: Deque[Tuple] = deque()
+        self._seq = 0
+        self._summaries: Dict[str, Dict[str, Counter]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.warmed = 0
+
+    def record(
+        self,
+        query: str,
+        content_type: Optional[str],
+        bible_version: str,
+        has_context: bool,
+        response: Optional[ScriptureContextResponse] = None,
+        stream: bool = False,
+    ) -> None:
+        """Queue one event. Never blocks; drops the event if the buffer is full."""
+        if len(self._pending) >= settings.SCRIPTURE_ANALYTICS_MAX_PENDING:
+            self.dropped += 1
+            return
+
+        source, references = "error", []
+        if response is not None:
+            source = "topic" if response.topic else "cache" if response.cached else "live"
+            references = [ref.format_reference() for ref in response.scripture_references]
+        self._pending.append(
+            (
+                int(time.time()),
+                query,
+                content_type,
+                bible_version.upper(),
+                has_context,
+                source,
+                stream,
+                references,
+            )
+        )
+        self.recorded += 1
+
+    async def start(self) -> None:
+        """Start the flush and rollup tasks."""
+        self._tasks = [
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._rollup_loop()),
+        ]
+
+    async def stop(self) -> None:
+        """Stop background tasks and write any buffered events."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write buffered events as a new segment."""
+        if not self._pending:
+            return
+        rows = [self._pending.popleft() for _ in range(len(self._pending))]
+        now = datetime.utcnow()
+        self._seq += 1
+        name = f"{now:%H%M%S}-{os.getpid()}-{self._seq}.json.gz"
+        directory = os.path.join(_events_dir(), f"{now:%Y-%m-%d}")
+        try:
+            await asyncio.to_thread(write_segment, rows, directory, name)
+            self.written += len(rows)
+        except Exception as e:
+            self.dropped += len(rows)
+            print(f"Error writing scripture analytics segment: {e}")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.SCRIPTURE_ANALYTICS_FLUSH_SECONDS)
+            await self.flush()
+
+    async def _rollup_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.SCRIPTURE_ANALYTICS_ROLLUP_SECONDS)
+            try:
+                rollup = await asyncio.to_thread(self.rollup_locked)
+                if rollup is not None and settings.SCRIPTURE_CACHE_WARMING_ENABLED:
+                    await self.warm_cache(rollup)
+            except Exception as e:
+                print(f"Scripture analytics rollup error: {e}")
+
+    def rollup_locked(self) -> Optional[Dict[str, Any]]:
+        """
+        Run the rollup unless another worker on this host is running it or
+        has just finished one.
+        """
+        os.makedirs(settings.SCRIPTURE_ANALYTICS_DIR, exist_ok=True)
+        lock_path = os.path.join(settings.SCRIPTURE_ANALYTICS_DIR, "rollup.lock")
+        with open(lock_path, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+
+            path = rollup_path()
+            if os.path.exists(path) and (
+                time.time() - os.path.getmtime(path)
+                < settings.SCRIPTURE_ANALYTICS_ROLLUP_SECONDS / 2
+            ):
+                return None
+            return self.rollup()
+
+    def rollup(self) -> Dict[str, Any]:
+        """Summarize recent segments into rollups/latest.json and return it."""
+        self._prune()
+        window = timedelta(days=settings.SCRIPTURE_ANALYTICS_WINDOW_DAYS - 1)
+        cutoff = f"{datetime.utcnow() - window:%Y-%m-%d}"
+
+        paths = []
+        events_dir = _events_dir()
+        if os.path.isdir(events_dir):
+            for day in sorted(os.listdir(events_dir)):
+                if day < cutoff:
+                    continue
+                day_dir = os.path.join(events_dir, day)
+                paths.extend(
+                    os.path.join(day_dir, name)
+                    for name in sorted(os.listdir(day_dir))
+                    if name.endswith(".json.gz")
+                )
+
+        totals: Dict[str, Counter] = {}
+        for path in paths:
+            if path not in self._summaries:
+                try:
+                    self._summaries[path] = summarize_segment(read_segment(path))
+                except Exception as e:
+                    print(f"Skipping unreadable analytics segment {path}: {e}")
+                    continue
+            for key, counter in self._summaries[path].items():
+                totals.setdefault(key, Counter()).update(counter)
+
+        # Forget summaries of segments that left the window
+        self._summaries = {path: self._summaries[path] for path in paths if path in self._summaries}
+
+        queries: Counter = Counter()
+        topics: Counter = Counter()
+        warm_candidates = []
+        for key, count in totals.get("queries", Counter()).most_common():
+            query, version, content_type, has_context = key
+            queries[query] += count
+            topic = classify(query)
+            topics[topic.slug if topic else "other"] += count
+            if not has_context:
+                warm_candidates.append({
+                    "query": query,
+                    "bible_version": version,
+                    "content_type": content_type or None,
+                    "count": count,
+                })
+
+        limit = settings.SCRIPTURE_ANALYTICS_TOP_N
+        rollup = {
+            "generated_at": datetime.utcnow().isoformat(),
+            "window_days": settings.SCRIPTURE_ANALYTICS_WINDOW_DAYS,
+            "segments": len(paths),
+            "events": sum(totals.get("sources", Counter()).values()),
+            "sources": dict(totals.get("sources", Counter())),
+            "versions": dict(totals.get("versions", Counter()).most_common()),
+            "content_types": dict(totals.get("content_types", Counter()).most_common()),
+            "topics": [{"topic": t, "count": c} for t, c in topics.most_common(limit)],
+            "queries": [{"query": q, "count": c} for q, c in queries.most_common(limit)],
+            "passages": [
+                {"reference": r, "count": c}
+                for r, c in totals.get("passages", Counter()).most_common(limit)
+            ],
+            "warm_candidates": warm_candidates[:limit],
+        }
+
+        path = rollup_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(rollup, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+        return rollup
+
+    def _prune(self) -> None:
+        """Delete day directories older than the retention period."""
+        events_dir = _events_dir()
+        if not os.path.isdir(events_dir):
+            return
+        retention = timedelta(days=settings.SCRIPTURE_ANALYTICS_RETENTION_DAYS)
+        cutoff = f"{datetime.utcnow() - retention:%Y-%m-%d}"
+        for day in os.listdir(events_dir):
+            if day < cutoff:
+                shutil.rmtree(os.path.join(events_dir, day), ignore_errors=True)
+
+    async def warm_cache(self, rollup: Dict[str, Any]) -> int:
+        """
+        Answer popular uncached questions so later askers hit the cache.
+
+        Only questions asked at least SCRIPTURE_CACHE_WARMING_MIN_COUNT
+        times without extra context are warmed, at most
+        SCRIPTURE_CACHE_WARMING_TOP_N per rollup, one at a time.
+        """
+        from app.services.scripture_assistant import ScriptureAssistant
+
+        cache = get_answer_cache()
+        if cache is None or not settings.ENABLE_SCRIPTURE_ASSISTANT:
+            return 0
+
+        warmed = 0
+        assistant = ScriptureAssistant()
+        for candidate in rollup["warm_candidates"]:
+            if warmed >= settings.SCRIPTURE_CACHE_WARMING_TOP_N:
+                break
+            if candidate["count"] < settings.SCRIPTURE_CACHE_WARMING_MIN_COUNT:
+                break
+            # Topical questions are already answered without the model
+            if classify(candidate["query"]) is not None:
+                continue
+
+            lookup = await cache.lookup(
+                candidate["query"], None, candidate["content_type"], candidate["bible_version"]
+            )
+            if lookup.response is not None:
+                continue
+
+            await assistant.get_scripture_context(
+                query=candidate["query"],
+                content_type=candidate["content_type"],
+                bible_version=candidate["bible_version"],
+            )
+            warmed += 1
+
+        self.warmed += warmed
+        return warmed
+
+    def stats(self) -> Dict[str, int]:
+        """Event counters for this process."""
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "warmed": self.warmed,
+        }
+
+
+_analytics: Optional[ScriptureAnalytics] = None
+
+
+def get_scripture_analytics() -> Optional[ScriptureAnalytics]:
+    """Return the analytics recorder running in this process, if any."""
+    return _analytics
+
+
+def read_rollup() -> Optional[Dict[str, Any]]:
+    """The latest rollup, or None if none has been written yet."""
+    path = rollup_path()
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def start_scripture_analytics() -> None:
+    """Start recording scripture analytics (called on startup)."""
+    global _analytics
+    if _analytics is None:
+        _analytics = ScriptureAnalytics()
+        await _analytics.start()
+
+
+async def stop_scripture_analytics() -> None:
+    """Stop recording and write buffered events (called on shutdown)."""
+    global _analytics
+    if _analytics is not None:
+        await _analytics.stop()
+        _analytics = None
+
+
+def record_scripture_query(
+    query: str,
+    content_type: Optional[str],
+    bible_version: str,
+    context: Optional[str],
+    response: Optional[ScriptureContextResponse] = None,
+    stream: bool = False,
+) -> None:
+    """Record a request if analytics are running; a no-op otherwise."""
+    if _analytics is not None:
+        _analytics.record(
+            query,
+            content_type,
+            bible_version,
+            bool(context),
+            response,
+            stream,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Scripture query analytics")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rollup", help="Summarize recent events and print the rollup")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "rollup":
+        rollup = ScriptureAnalytics().rollup()
+        print(json.dumps({k: v for k, v in rollup.items() if k != "warm_candidates"}, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
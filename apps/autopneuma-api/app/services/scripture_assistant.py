@@ -5,16 +5,87 @@ Provides biblical insights, cross-references, and study guidance
 tied to discussions, projects, and community questions.
 """
 
-from typing import List, Optional
-import openai
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 import json
 from app.core.config import settings
+from app.core.embeddings import embed_texts
+from app.core.json_stream import JsonEvent, JsonStreamParser
+from app.core.llm import get_llm_client
+from app.core.tokens import fit_to_budget
+from app.services.bible_books import book_id, book_name
+from app.services.bible_store import get_verse_store
+from app.services.scripture_cache import get_answer_cache
+from app.services.scripture_index import (
+    get_bm25_index,
+    get_cross_references,
+    key_reference,
+)
+from app.services.scripture_topics import classify, get_topic_answer
+from app.services.scripture_parser import (
+    ParsedReference,
+    canonicalize,
+    parse_references,
+    reference_key,
+)
+from app.services.vector_index import COMMUNITY_INDEX, VERSES_INDEX, get_vector_index
 from app.schemas.scripture import (
+    RelatedContent,
     ScriptureReference,
     ScriptureContextResponse,
 )
 
 
+@lru_cache(maxsize=64)
+def _system_prompt(bible_version: str, stored_text: bool) -> str:
+    """System prompt for a translation, built once and reused."""
+    if stored_text:
+        text_field = '""'
+    else:
+        text_field = f'"Exact scripture text in {bible_version}"'
+
+    return f"""You are a Scripture Context Assistant for Auto Pneuma, a Christian AI technology community. Your role is to provide biblical insights, relevant scripture references, and theological guidance on questions related to faith, technology, AI ethics, and Christian living.
+
+Core Theological Framework:
+- Bible-based Christian doctrine (Trinity, Gospel, Scripture authority, etc.)
+- Christ-centered interpretation and application
+- Emphasis on God's glory and human flourishing
+- Unity in essentials, freedom in non-essentials, love in all things
+
+When responding:
+1. Ground all insights in Scripture, not human philosophy
+2. Cite specific Bible passages with context
+3. Acknowledge where Scripture is clear vs. where believers may differ
+4. Focus on biblical principles that apply to modern technology
+5. Be pastoral and encouraging, not legalistic or condemning
+6. Point people to Jesus and the Gospel
+7. Avoid denominational bias on non-essential matters
+
+Bible version to cite: {bible_version}
+
+If candidate passages are provided, prefer citing those that are relevant; you may cite others when they fit better.
+
+Respond in this JSON format:
+{{
+  "summary": "1-2 sentence summary",
+  "biblical_principles": ["principle 1", "principle 2", ...],
+  "scripture_references": [
+    {{
+      "book": "Book name",
+      "chapter": number,
+      "verse_start": number,
+      "verse_end": number or null,
+      "text": {text_field},
+      "version": "{bible_version}"
+    }}
+  ],
+  "theological_insights": "2-3 paragraphs of theological reflection",
+  "practical_application": "2-3 paragraphs of practical guidance",
+  "further_study": ["Reference 1", "Reference 2", ...]
+}}"""
+
+
 class ScriptureAssistant:
     """
     AI-powered Scripture Context Assistant.
@@ -28,7 +99,7 @@ class ScriptureAssistant:
     """
 
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_client()
 
     async def get_scripture_context(
         self,
@@ -53,76 +124,332 @@ class ScriptureAssistant:
             return self._create_disabled_response(query)
 
         try:
-            # Build prompts
-            system_prompt = self._build_system_prompt(bible_version)
-            user_prompt = self._build_user_prompt(query, context, content_type)
-
-            # Call OpenAI
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
+            # Common topics are answered from precomputed answers
+            topical = await self._topical_answer(query, context, bible_version)
+            if topical is not None:
+                return topical
+
+            # Repeat questions are answered from the cache
+            cache = get_answer_cache()
+            lookup = None
+            if cache is not None:
+                lookup = await cache.lookup(query, context, content_type, bible_version)
+                if lookup.response is not None:
+                    return self._cached_response(lookup.response, query)
+
+            # Call the LLM with context fitted to its token budget
+            context = await fit_to_budget(context, settings.MAX_CONTEXT_LENGTH)
+            query_vector = await self._embed_query(query)
+            model, messages = self._build_request(
+                query, context, content_type, bible_version, query_vector
+            )
+            completion = await self.llm.chat_completion(
+                model=model,
+                messages=messages,
                 temperature=0.7,  # Balanced creativity and consistency
                 response_format={"type": "json_object"},
+                feature="scripture",
             )
 
             # Parse response
-            result = response.choices[0].message.content
-            return self._parse_scripture_response(result, query)
+            result = completion.content
+            response = self._parse_scripture_response(result, query, bible_version)
+            response.related_content = self._related_content(query_vector)
+            await self._store_answer(lookup, response)
+            return response
 
         except Exception as e:
             print(f"Scripture assistant error: {e}")
             return self._create_error_response(query, str(e))
 
-    def _build_system_prompt(self, bible_version: str) -> str:
-        """Build system prompt for Scripture assistant."""
-        return f"""You are a Scripture Context Assistant for Auto Pneuma, a Christian AI technology community. Your role is to provide biblical insights, relevant scripture references, and theological guidance on questions related to faith, technology, AI ethics, and Christian living.
+    async def stream_scripture_context(
+        self,
+        query: str,
+        context: Optional[str] = None,
+        content_type: Optional[str] = None,
+        bible_version: str = "ESV",
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream biblical context for a query as (event, data) pairs.
 
-Core Theological Framework:
-- Bible-based Christian doctrine (Trinity, Gospel, Scripture authority, etc.)
-- Christ-centered interpretation and application
-- Emphasis on God's glory and human flourishing
-- Unity in essentials, freedom in non-essentials, love in all things
+        Sections are emitted as soon as they parse out of the model output:
+        summary, biblical_principle (one per principle), scripture_reference
+        (one per reference, text filled from the verse store),
+        theological_insights, practical_application, further_study (one
+        per suggestion) and related_content. The stream ends with a done
+        event carrying the
+        complete ScriptureContextResponse, or an error event.
 
-When responding:
-1. Ground all insights in Scripture, not human philosophy
-2. Cite specific Bible passages with context
-3. Acknowledge where Scripture is clear vs. where believers may differ
-4. Focus on biblical principles that apply to modern technology
-5. Be pastoral and encouraging, not legalistic or condemning
-6. Point people to Jesus and the Gospel
-7. Avoid denominational bias on non-essential matters
+        Args:
+            query: The question or topic for biblical insight
+            context: Additional context (e.g., discussion content, project description)
+            content_type: Source type (discussion, prayer_request, project, general)
+            bible_version: Preferred Bible translation
+        """
+        if not settings.ENABLE_SCRIPTURE_ASSISTANT:
+            yield "done", self._create_disabled_response(query)
+            return
 
-Bible version to cite: {bible_version}
+        try:
+            topical = await self._topical_answer(query, context, bible_version)
+            if topical is not None:
+                for event in self._response_events(topical):
+                    yield event
+                yield "done", topical
+                return
+
+            cache = get_answer_cache()
+            lookup = None
+            if cache is not None:
+                lookup = await cache.lookup(query, context, content_type, bible_version)
+                if lookup.response is not None:
+                    response = self._cached_response(lookup.response, query)
+                    for event in self._response_events(response):
+                        yield event
+                    yield "done", response
+                    return
+
+            context = await fit_to_budget(context, settings.MAX_CONTEXT_LENGTH)
+            query_vector = await self._embed_query(query)
+            model, messages = self._build_request(
+                query, context, content_type, bible_version, query_vector
+            )
+            parser = JsonStreamParser()
+            chunks: List[str] = []
+            async for delta in self.llm.stream_chat_completion(
+                model=model,
+                messages=messages,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                feature="scripture_stream",
+            ):
+                chunks.append(delta)
+                for parsed in parser.feed(delta):
+                    event = self._stream_event(parsed, bible_version)
+                    if event is not None:
+                        yield event
+
+            response = self._parse_scripture_response(
+                "".join(chunks), query, bible_version
+            )
+            response.related_content = self._related_content(query_vector)
+            if response.related_content:
+                yield "related_content", [item.model_dump() for item in response.related_content]
+            await self._store_answer(lookup, response)
+            yield "done", response
 
-Respond in this JSON format:
-{{
-  "summary": "1-2 sentence summary",
-  "biblical_principles": ["principle 1", "principle 2", ...],
-  "scripture_references": [
-    {{
-      "book": "Book name",
-      "chapter": number,
-      "verse_start": number,
-      "verse_end": number or null,
-      "text": "Exact scripture text in {bible_version}",
-      "version": "{bible_version}"
-    }}
-  ],
-  "theological_insights": "2-3 paragraphs of theological reflection",
-  "practical_application": "2-3 paragraphs of practical guidance",
-  "further_study": ["Reference 1", "Reference 2", ...]
-}}"""
+        except Exception as e:
+            print(f"Scripture assistant stream error: {e}")
+            yield "error", {"detail": str(e)}
+
+    def _stream_event(
+        self, parsed: JsonEvent, bible_version: str
+    ) -> Optional[Tuple[str, Any]]:
+        """Map a parsed piece of model output to a stream event."""
+        if parsed.kind == "field" and parsed.key in (
+            "summary",
+            "theological_insights",
+            "practical_application",
+        ):
+            return parsed.key, parsed.value
+
+        if parsed.kind == "item" and parsed.key == "biblical_principles":
+            return "biblical_principle", parsed.value
+
+        if parsed.kind == "item" and parsed.key == "scripture_references":
+            ref = self._build_reference(parsed.value, bible_version)
+            return ("scripture_reference", ref) if ref is not None else None
+
+        if parsed.kind == "item" and parsed.key == "further_study":
+            return "further_study", canonicalize(parsed.value, strict=True) or parsed.value
+
+        return None
+
+    def _response_events(
+        self, response: ScriptureContextResponse
+    ) -> Iterator[Tuple[str, Any]]:
+        """Stream events for an already complete response."""
+        yield "summary", response.summary
+        for principle in response.biblical_principles:
+            yield "biblical_principle", principle
+        for ref in response.scripture_references:
+            yield "scripture_reference", ref
+        yield "theological_insights", response.theological_insights
+        yield "practical_application", response.practical_application
+        for item in response.further_study:
+            yield "further_study", item
+        if response.related_content:
+            yield "related_content", [item.model_dump() for item in response.related_content]
+
+    async def _topical_answer(
+        self, query: str, context: Optional[str], bible_version: str
+    ) -> Optional[ScriptureContextResponse]:
+        """Precomputed answer if the query is plainly about a curated topic."""
+        if not settings.SCRIPTURE_TOPICS_ENABLED:
+            return None
+
+        topic = classify(query, context)
+        if topic is None:
+            return None
+        answer = get_topic_answer(topic, bible_version)
+        if answer is None:
+            return None
+
+        query_vector = await self._embed_query(query)
+        return answer.model_copy(
+            update={
+                "query": query,
+                "topic": topic.slug,
+                "related_content": self._related_content(query_vector),
+                "timestamp": datetime.utcnow(),
+            }
+        )
+
+    def _cached_response(
+        self, response: ScriptureContextResponse, query: str
+    ) -> ScriptureContextResponse:
+        """Copy of a cached answer for the current request."""
+        return response.model_copy(
+            update={"query": query, "cached": True, "timestamp": datetime.utcnow()}
+        )
+
+    async def _store_answer(self, lookup: Any, response: ScriptureContextResponse) -> None:
+        """Cache substantive answers, never error responses."""
+        if lookup is not None and (
+            response.scripture_references or response.biblical_principles
+        ):
+            await get_answer_cache().store(lookup, response)
+
+    def _build_request(
+        self,
+        query: str,
+        context: Optional[str],
+        content_type: Optional[str],
+        bible_version: str,
+        query_vector: Optional[Any] = None,
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Choose the model and build the chat messages for a query.
+
+        When retrieval supplies candidate passages the model no longer has
+        to recall them, so SCRIPTURE_RETRIEVAL_MODEL (if set) is used.
+        """
+        candidates = self._retrieve_candidates(query, bible_version, query_vector)
+        model = settings.OPENAI_MODEL
+        if candidates and settings.SCRIPTURE_RETRIEVAL_MODEL:
+            model = settings.SCRIPTURE_RETRIEVAL_MODEL
+
+        messages = [
+            {"role": "system", "content": self._build_system_prompt(bible_version)},
+            {
+                "role": "user",
+                "content": self._build_user_prompt(
+                    query, context, content_type, bible_version, candidates
+                ),
+            },
+        ]
+        return model, messages
+
+    def _retrieve_candidates(
+        self, query: str, bible_version: str, query_vector: Optional[Any] = None
+    ) -> List[ParsedReference]:
+        """
+        Candidate passages from the offline indexes.
+
+        Combines BM25 and semantic (vector) matches for the query with the
+        strongest cross references of passages cited in the query and of
+        the best match.
+        """
+        if not settings.SCRIPTURE_RETRIEVAL_ENABLED:
+            return []
+
+        limit = settings.SCRIPTURE_RETRIEVAL_TOP_K
+        index = get_bm25_index()
+        graph = get_cross_references()
+        cited = parse_references(query)[:5]
+
+        matches = [ref for ref, _ in index.search(query, limit)] if index else []
+        semantic = self._semantic_passages(query_vector)
+        if semantic:
+            # Alternate lexical and semantic matches, best first
+            merged: Dict[ParsedReference, None] = {}
+            for i in range(max(len(matches), len(semantic))):
+                for ranked in (matches, semantic):
+                    if i < len(ranked):
+                        merged.setdefault(ranked[i], None)
+            matches = list(merged)
+
+        candidates: Dict[ParsedReference, None] = {}
+        if graph is not None:
+            for ref in cited + matches[:1]:
+                for related in graph.related(ref, settings.SCRIPTURE_RETRIEVAL_CROSSREFS):
+                    candidates.setdefault(related, None)
+        for ref in matches:
+            candidates.setdefault(ref, None)
+
+        for ref in cited:
+            candidates.pop(ref, None)
+        return list(candidates)[:limit]
+
+    async def _embed_query(self, query: str) -> Optional[Any]:
+        """Embedding of the query, or None when no vector index is loaded."""
+        if get_vector_index(VERSES_INDEX) is None and get_vector_index(COMMUNITY_INDEX) is None:
+            return None
+        try:
+            vectors = await embed_texts([query])
+            return vectors[0] if vectors is not None else None
+        except Exception as e:
+            print(f"Query embedding error: {e}")
+            return None
+
+    def _semantic_passages(self, query_vector: Optional[Any]) -> List[ParsedReference]:
+        """Verses closest to the query in the verse vector index."""
+        index = get_vector_index(VERSES_INDEX)
+        if index is None or query_vector is None:
+            return []
+        results = index.search(
+            query_vector,
+            settings.VECTOR_RELATED_PASSAGES,
+            min_score=settings.VECTOR_MIN_SCORE,
+        )[0]
+        return [key_reference(item["key"]) for item, _ in results]
+
+    def _related_content(self, query_vector: Optional[Any]) -> List[RelatedContent]:
+        """Community posts, blog posts and projects closest to the query."""
+        index = get_vector_index(COMMUNITY_INDEX)
+        if index is None or query_vector is None:
+            return []
+        results = index.search(
+            query_vector,
+            settings.VECTOR_RELATED_CONTENT,
+            min_score=settings.VECTOR_MIN_SCORE,
+        )[0]
+        return [
+            RelatedContent(
+                kind=item["kind"],
+                id=str(item["id"]),
+                title=item.get("title", ""),
+                slug=item.get("slug"),
+                score=round(score, 4),
+            )
+            for item, score in results
+        ]
+
+    def _build_system_prompt(self, bible_version: str) -> str:
+        """Build system prompt for Scripture assistant."""
+        # Verse text is filled from the local store when the translation is
+        # installed, so the model only needs to return the reference.
+        return _system_prompt(bible_version, get_verse_store(bible_version) is not None)
 
     def _build_user_prompt(
         self,
         query: str,
         context: Optional[str],
         content_type: Optional[str],
+        bible_version: str = "ESV",
+        candidates: Optional[List[ParsedReference]] = None,
     ) -> str:
-        """Build user prompt with query and context."""
+        """Build user prompt with query, context and retrieved passages."""
         prompt = f"Query: {query}\n"
 
         if content_type:
@@ -131,29 +458,54 @@ Respond in this JSON format:
         if context:
             prompt += f"\nAdditional context:\n{context}\n"
 
+        # Quote passages the user cited so the model works from the text
+        if get_verse_store(bible_version) is not None:
+            cited = self._format_passages(parse_references(query)[:5], bible_version)
+            if cited:
+                prompt += f"\nPassages cited in the query ({bible_version}):\n{cited}\n"
+
+        if candidates:
+            passages = self._format_passages(candidates, bible_version)
+            prompt += f"\nCandidate passages:\n{passages}\n"
+
         prompt += "\nPlease provide biblical insights, relevant scripture references, theological reflection, and practical application for this query."
 
         return prompt
 
+    def _format_passages(
+        self,
+        references: List[ParsedReference],
+        bible_version: str,
+        max_chars: int = 300,
+    ) -> str:
+        """One line per passage, with stored text when the translation is installed."""
+        lines = []
+        for parsed in references:
+            text = parsed.to_scripture_reference(bible_version).text
+            if len(text) > max_chars:
+                text = text[:max_chars].rsplit(" ", 1)[0] + "..."
+            lines.append(f"- {parsed.canonical()}: {text}" if text else f"- {parsed.canonical()}")
+        return "\n".join(lines)
+
     def _parse_scripture_response(
-        self, result: str, original_query: str
+        self, result: str, original_query: str, bible_version: str = "ESV"
     ) -> ScriptureContextResponse:
-        """Parse AI response into ScriptureContextResponse."""
+        """
+        Parse AI response into ScriptureContextResponse.
+
+        When the translation is installed in the local verse store, verse
+        text comes from the store rather than the model, and references
+        that do not exist in it are dropped.
+        """
         try:
             data = json.loads(result)
 
             # Parse scripture references
             scripture_refs = []
             for ref_data in data.get("scripture_references", []):
-                ref = ScriptureReference(
-                    book=ref_data["book"],
-                    chapter=ref_data["chapter"],
-                    verse_start=ref_data["verse_start"],
-                    verse_end=ref_data.get("verse_end"),
-                    text=ref_data["text"],
-                    version=ref_data.get("version", "ESV"),
-                )
-                scripture_refs.append(ref)
+                ref = self._build_reference(ref_data, bible_version)
+                if ref is not None:
+                    scripture_refs.append(ref)
 
             return ScriptureContextResponse(
                 query=original_query,
@@ -162,13 +514,59 @@ Respond in this JSON format:
                 scripture_references=scripture_refs,
                 theological_insights=data.get("theological_insights", ""),
                 practical_application=data.get("practical_application", ""),
-                further_study=data.get("further_study", []),
+                further_study=[
+                    canonicalize(item, strict=True) or item
+                    for item in data.get("further_study", [])
+                ],
             )
 
         except Exception as e:
             print(f"Error parsing scripture response: {e}")
             return self._create_error_response(original_query, str(e))
 
+    def _build_reference(
+        self, ref_data: Dict[str, Any], bible_version: str
+    ) -> Optional[ScriptureReference]:
+        """
+        Build a reference from model output, with stored verse text.
+
+        Returns None for references that do not exist in the installed
+        translation.
+        """
+        ref = ScriptureReference(
+            book=ref_data["book"],
+            chapter=ref_data["chapter"],
+            verse_start=ref_data["verse_start"],
+            verse_end=ref_data.get("verse_end"),
+            text=ref_data.get("text", ""),
+            version=ref_data.get("version", bible_version),
+        )
+        if not self._apply_stored_text(ref):
+            print(f"Dropping unknown scripture reference: {ref.format_reference()}")
+            return None
+        return ref
+
+    def _apply_stored_text(self, ref: ScriptureReference) -> bool:
+        """
+        Replace a reference's text with the stored verse text.
+
+        Returns False if the translation is installed but the passage does
+        not exist; otherwise the reference is kept (with the model's text
+        when the translation or book is not available locally).
+        """
+        store = get_verse_store(ref.version)
+        number = book_id(ref.book)
+        if store is None or number is None:
+            return True
+
+        text = store.get_range(number, ref.chapter, ref.verse_start, ref.verse_end)
+        if text is None:
+            return False
+
+        ref.book = book_name(number)
+        ref.text = text
+        return True
+
     def _create_disabled_response(self, query: str) -> ScriptureContextResponse:
         """Create response when scripture assistant is disabled."""
         return ScriptureContextResponse(
@@ -199,13 +597,9 @@ Respond in this JSON format:
 class ScriptureReferenceService:
     """
     Service for fetching and formatting scripture references.
-    Can be extended to integrate with Bible APIs for verse lookup.
+    Verse text is served from the local verse store (see bible_store).
     """
 
-    def __init__(self):
-        # Future: Integration with Bible API (e.g., ESV API, Bible.org API)
-        pass
-
     async def lookup_verse(
         self,
         book: str,
@@ -225,21 +619,49 @@ class ScriptureReferenceService:
             version: Bible translation
 
         Returns:
-            ScriptureReference with text, or None if not found
+            ScriptureReference with text, or None if not found or the
+            translation is not installed
         """
-        # TODO: Implement Bible API integration
-        # For now, return None and rely on AI to provide text
-        return None
+        store = get_verse_store(version)
+        number = book_id(book)
+        if store is None or number is None:
+            return None
+
+        text = store.get_range(number, chapter, verse_start, verse_end)
+        if text is None:
+            return None
+
+        return ScriptureReference(
+            book=book_name(number),
+            chapter=chapter,
+            verse_start=verse_start,
+            verse_end=verse_end,
+            text=text,
+            version=version.upper(),
+        )
 
     def format_reference_list(
         self, references: List[ScriptureReference]
     ) -> str:
-        """Format a list of scripture references for display."""
+        """
+        Format a list of scripture references for display.
+
+        Duplicate references (including differently abbreviated ones) are
+        shown once, and missing text is filled from the verse store.
+        """
         if not references:
             return "No scripture references provided."
 
-        formatted = []
+        unique = {}
         for ref in references:
+            unique.setdefault((reference_key(ref), ref.version.upper()), ref)
+
+        formatted = []
+        for ref in unique.values():
+            if not ref.text:
+                parsed = reference_key(ref)
+                if parsed.book:
+                    ref = parsed.to_scripture_reference(ref.version)
             formatted.append(
                 f"**{ref.format_reference()}** ({ref.version})\n\"{ref.text}\""
             )
@@ -0,0 +1,410 @@
+"""
+Answer cache for the Scripture Context Assistant.
+
+Community questions repeat heavily, so answers are cached by normalized
+query, Bible version and content type (plus a hash of any additional
+context). Lookups go through three tiers:
+
+1. Local LRU, then the shared Redis tier when configured (TieredCache)
+2. The persistent `scripture_answer_cache` table, which survives restarts
+3. Optionally, an embedding-similarity index that maps near-duplicate
+   questions ("What does the Bible say about AI bias?" vs "What does
+   scripture say about bias in AI?") to an existing answer
+
+Entries expire after SCRIPTURE_CACHE_TTL_SECONDS and can be invalidated
+explicitly, per query or all at once.
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.core.llm import get_llm_client
+from app.core.supabase import init_supabase_client
+from app.schemas.scripture import ScriptureContextResponse
+from app.services.scripture_parser import normalize_references
+
+try:
+    import numpy as np
+except ImportError:  # optional: speeds up similarity search
+    np = None
+
+
+# Bump when the assistant prompts change so old answers are not served
+SCRIPTURE_PROMPT_VERSION = "2"
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache keys.
+
+    Scripture references are canonicalized ("Jn 3:16" == "John 3:16"),
+    then case, punctuation and whitespace differences are removed.
+    """
+    text = normalize_references(unicodedata.normalize("NFKC", query))
+    text = re.sub(r"[^\w\s:-]", " ", text.casefold())
+    return " ".join(text.split())
+
+
+class SemanticIndex:
+    """
+    Bounded in-memory nearest-neighbour index over query embeddings.
+
+    Vectors are L2-normalized so similarity is a dot product. Entries are
+    partitioned (Bible version and content type) and only compared within
+    their partition. Uses NumPy when installed, plain Python otherwise.
+    """
+
+    def __init__(self, max_entries: int, threshold: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, Tuple[str, List[float]]]" = OrderedDict()
+        self._matrices: Dict[str, Tuple[List[str], Any]] = {}
+
+    @staticmethod
+    def normalize(vector: List[float]) -> List[float]:
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def add(self, key: str, partition: str, vector: List[float]) -> None:
+        """Index a normalized vector, evicting the oldest beyond max_entries."""
+        self._entries[key] = (partition, vector)
+        self._entries.move_to_end(key)
+        self._matrices.pop(partition, None)
+
+        while len(self._entries) > self.max_entries:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._matrices.pop(evicted, None)
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._matrices.pop(entry[0], None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._matrices.clear()
+
+    def search(self, partition: str, vector: List[float]) -> Optional[Tuple[str, float]]:
+        """Best (key, similarity) in the partition at or above the threshold."""
+        if np is not None:
+            if partition not in self._matrices:
+                keys = [k for k, (p, _) in self._entries.items() if p == partition]
+                matrix = np.array([self._entries[k][1] for k in keys], dtype=np.float32)
+                self._matrices[partition] = (keys, matrix)
+
+            keys, matrix = self._matrices[partition]
+            if not keys:
+                return None
+            scores = matrix @ np.asarray(vector, dtype=np.float32)
+            best = int(scores.argmax())
+            best_key, best_score = keys[best], float(scores[best])
+        else:
+            best_key, best_score = None, -1.0
+            for key, (p, candidate) in self._entries.items():
+                if p == partition:
+                    score = sum(a * b for a, b in zip(candidate, vector))
+                    if score > best_score:
+                        best_key, best_score = key, score
+
+        if best_key is None or best_score < self.threshold:
+            return None
+        return best_key, best_score
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheLookup:
+    """Result of a cache lookup, carried forward to store() on a miss."""
+
+    def __init__(
+        self,
+        key: str,
+        partition: str,
+        normalized_query: str,
+        response: Optional[ScriptureContextResponse] = None,
+        source: Optional[str] = None,
+        embedding: Optional[List[float]] = None,
+    ):
+        self.key = key
+        self.partition = partition
+        self.normalized_query = normalized_query
+        self.response = response
+        self.source = source
+        self.embedding = embedding
+
+
+class ScriptureAnswerCache:
+    """Tiered exact + semantic cache of assistant answers."""
+
+    def __init__(self):
+        self.ttl_seconds = settings.SCRIPTURE_CACHE_TTL_SECONDS
+        self.answers: TieredCache[ScriptureContextResponse] = TieredCache(
+            namespace="scripture",
+            max_entries=settings.SCRIPTURE_CACHE_MAX_ENTRIES,
+            ttl_seconds=self.ttl_seconds,
+            local_ttl_seconds=settings.SCRIPTURE_CACHE_LOCAL_TTL_SECONDS,
+            dumps=lambda response: response.model_dump_json(),
+            loads=ScriptureContextResponse.model_validate_json,
+        )
+        self.persistent = settings.SCRIPTURE_CACHE_PERSISTENT
+        self.semantic: Optional[SemanticIndex] = None
+        if settings.SCRIPTURE_CACHE_SEMANTIC_ENABLED:
+            self.semantic = SemanticIndex(
+                settings.SCRIPTURE_CACHE_SEMANTIC_MAX_ENTRIES,
+                settings.SCRIPTURE_CACHE_SIMILARITY_THRESHOLD,
+            )
+
+        self._semantic_loaded = False
+        self._semantic_lock = asyncio.Lock()
+        self._pending_writes: Set[asyncio.Task] = set()
+        self.hits = {"memory": 0, "persistent": 0, "semantic": 0}
+        self.misses = 0
+        self.errors = 0
+
+    def _key(
+        self,
+        normalized_query: str,
+        context: Optional[str],
+        content_type: Optional[str],
+        bible_version: str,
+    ) -> Tuple[str, str]:
+        """Cache key and semantic partition for a request."""
+        partition = f"{bible_version.upper()}:{content_type or 'general'}"
+        material = normalized_query
+        if context:
+            material += "\0" + " ".join(context.split())
+        digest = hashlib.sha256(material.encode("utf-8")).hexdigest()
+        key = ":".join(
+            [SCRIPTURE_PROMPT_VERSION, settings.OPENAI_MODEL, partition, digest]
+        )
+        return key, partition
+
+    async def lookup(
+        self,
+        query: str,
+        context: Optional[str],
+        content_type: Optional[str],
+        bible_version: str,
+    ) -> CacheLookup:
+        """
+        Find a cached answer for a request.
+
+        The returned CacheLookup has `response` set on a hit; on a miss,
+        pass it to store() along with the generated answer.
+        """
+        normalized = normalize_query(query)
+        key, partition = self._key(normalized, context, content_type, bible_version)
+        lookup = CacheLookup(key, partition, normalized)
+
+        response, source = await self._get(key)
+        if response is not None:
+            lookup.response, lookup.source = response, source
+            self.hits[source] += 1
+            return lookup
+
+        # Near-duplicate search only applies to plain questions
+        if self.semantic is not None and not context:
+            match = await self._semantic_match(lookup)
+            if match is not None:
+                response, _ = await self._get(match)
+                if response is not None:
+                    lookup.response, lookup.source = response, "semantic"
+                    self.hits["semantic"] += 1
+                    return lookup
+                self.semantic.remove(match)
+
+        self.misses += 1
+        return lookup
+
+    async def _get(
+        self, key: str
+    ) -> Tuple[Optional[ScriptureContextResponse], Optional[str]]:
+        """Exact lookup through the memory tiers, then the database."""
+        response = await self.answers.get(key)
+        if response is not None:
+            return response, "memory"
+
+        if not self.persistent:
+            return None, None
+
+        try:
+            result = await asyncio.to_thread(
+                lambda: init_supabase_client()
+                .table("scripture_answer_cache")
+                .select("response")
+                .eq("cache_key", key)
+                .gt("expires_at", datetime.now(timezone.utc).isoformat())
+                .limit(1)
+                .execute()
+            )
+        except Exception as e:
+            self.errors += 1
+            print(f"Scripture cache read error: {e}")
+            return None, None
+
+        if not result.data:
+            return None, None
+
+        response = ScriptureContextResponse.model_validate(result.data[0]["response"])
+        await self.answers.set(key, response)
+        return response, "persistent"
+
+    async def _semantic_match(self, lookup: CacheLookup) -> Optional[str]:
+        """Embed the query and return the key of a near-duplicate, if any."""
+        await self._load_semantic_index()
+        try:
+            vectors = await get_llm_client().embed(
+                [lookup.normalized_query],
+                model=settings.SCRIPTURE_CACHE_EMBEDDING_MODEL,
+                dimensions=settings.SCRIPTURE_CACHE_EMBEDDING_DIMENSIONS,
+                feature="scripture_cache",
+            )
+        except Exception as e:
+            self.errors += 1
+            print(f"Scripture cache embedding error: {e}")
+            return None
+
+        lookup.embedding = SemanticIndex.normalize(vectors[0])
+        match = self.semantic.search(lookup.partition, lookup.embedding)
+        return match[0] if match else None
+
+    async def _load_semantic_index(self) -> None:
+        """Seed the similarity index from persisted embeddings once."""
+        if self._semantic_loaded or not self.persistent:
+            return
+
+        async with self._semantic_lock:
+            if self._semantic_loaded:
+                return
+            self._semantic_loaded = True
+            try:
+                result = await asyncio.to_thread(
+                    lambda: init_supabase_client()
+                    .table("scripture_answer_cache")
+                    .select("cache_key, partition, embedding")
+                    .gt("expires_at", datetime.now(timezone.utc).isoformat())
+                    .not_.is_("embedding", "null")
+                    .order("created_at", desc=True)
+                    .limit(self.semantic.max_entries)
+                    .execute()
+                )
+            except Exception as e:
+                self.errors += 1
+                print(f"Scripture cache index load error: {e}")
+                return
+
+            for row in reversed(result.data or []):
+                self.semantic.add(row["cache_key"], row["partition"], row["embedding"])
+
+    async def store(
+        self,
+        lookup: CacheLookup,
+        response: ScriptureContextResponse,
+    ) -> None:
+        """Cache a freshly generated answer in every tier."""
+        await self.answers.set(lookup.key, response)
+
+        if self.semantic is not None and lookup.embedding is not None:
+            self.semantic.add(lookup.key, lookup.partition, lookup.embedding)
+
+        if self.persistent:
+            # Persist in the background; the caller already has its answer
+            task = asyncio.create_task(self._persist(lookup, response))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    async def _persist(
+        self,
+        lookup: CacheLookup,
+        response: ScriptureContextResponse,
+    ) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        row = {
+            "cache_key": lookup.key,
+            "partition": lookup.partition,
+            "normalized_query": lookup.normalized_query,
+            "response": response.model_dump(mode="json"),
+            "embedding": lookup.embedding,
+            "expires_at": expires_at.isoformat(),
+        }
+        try:
+            await asyncio.to_thread(
+                lambda: init_supabase_client()
+                .table("scripture_answer_cache")
+                .upsert(row)
+                .execute()
+            )
+        except Exception as e:
+            self.errors += 1
+            print(f"Scripture cache write error: {e}")
+
+    async def invalidate(
+        self,
+        query: Optional[str] = None,
+        context: Optional[str] = None,
+        content_type: Optional[str] = None,
+        bible_version: str = "ESV",
+    ) -> None:
+        """
+        Invalidate one cached answer, or every answer when `query` is None.
+
+        Other workers' local copies expire within
+        SCRIPTURE_CACHE_LOCAL_TTL_SECONDS.
+        """
+        if query is None:
+            key = None
+            await self.answers.clear()
+            if self.semantic is not None:
+                self.semantic.clear()
+        else:
+            key, _ = self._key(normalize_query(query), context, content_type, bible_version)
+            await self.answers.delete(key)
+            if self.semantic is not None:
+                self.semantic.remove(key)
+
+        if self.persistent:
+            await asyncio.to_thread(self._delete_rows, key)
+
+    def _delete_rows(self, key: Optional[str]) -> None:
+        """Delete one persisted answer, or all of them when key is None."""
+        rows = init_supabase_client().table("scripture_answer_cache").delete()
+        if key is None:
+            rows.neq("cache_key", "").execute()
+        else:
+            rows.eq("cache_key", key).execute()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for every tier."""
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": sum(self.hits.values()) / lookups if lookups else 0.0,
+            "tiers": self.answers.stats(),
+            "persistent": self.persistent,
+            "semantic_entries": len(self.semantic) if self.semantic is not None else None,
+        }
+
+
+_answer_cache: Optional[ScriptureAnswerCache] = None
+
+
+def get_answer_cache() -> Optional[ScriptureAnswerCache]:
+    """Return the process-wide answer cache, or None if disabled."""
+    global _answer_cache
+    if not settings.SCRIPTURE_CACHE_ENABLED:
+        return None
+
+    if _answer_cache is None:
+        _answer_cache = ScriptureAnswerCache()
+    return _answer_cache
@@ -0,0 +1,412 @@
+"""
+Offline retrieval indexes over scripture.
+
+Two read-only structures are built once at install time and
+memory-mapped at startup, alongside the verse stores in BIBLE_DATA_DIR:
+
+- `{VERSION}.bm25`: a BM25 inverted index over one translation's verses
+  (sorted term dictionary, per-term postings and per-verse lengths)
+- `crossrefs.bin`: a cross-reference graph, from verse to related
+  passages ordered by strength, built from a public-domain list such as
+  the OpenBible.info cross references (`From Verse<TAB>To Verse<TAB>Votes`
+  with OSIS references like `Gen.1.1` or `Prov.8.22-Prov.8.30`)
+
+Build with:
+
+    python -m app.services.scripture_index build-bm25 KJV
+    python -m app.services.scripture_index build-crossrefs cross_references.txt
+"""
+
+import argparse
+import heapq
+from array import array
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.bible_books import book_id
+from app.services.bible_store import VerseStore, store_path, verse_key
+from app.services.scripture_parser import ParsedReference
+
+
+BM25_MAGIC = b"APBM"
+XREF_MAGIC = b"APXR"
+FORMAT_VERSION = 1
+
+# magic, format, reserved, verse count, term count, avg length,
+# term table offset, term strings offset, postings offset
+_BM25_HEADER = struct.Struct("<4sHHIIfIII")
+_DOC = struct.Struct("<IHH")  # verse key, length, reserved
+_TERM = struct.Struct("<IHHII")  # string offset, length, reserved, df, postings offset
+_POSTING = struct.Struct("<IH")  # verse index, term frequency
+
+_XREF_HEADER = struct.Struct("<4sHHI")  # magic, format, reserved, edge count
+_EDGE = struct.Struct("<IIIi")  # from key, to start key, to end key, votes
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+STOPWORDS = frozenset(
+    """
+    a about after all also am an and any are as at be because been but by
+    can could did do does for from had has have he her him his how i if in
+    into is it its me my no nor not of on or our out own shall she should
+    so some such than that the their them then there these they this those
+    thus to too up upon us was we were what when where which while who whom
+    why will with would you your
+    thee thou thy thine ye unto hath hast doth dost art shalt wilt saith
+    said also even every let lo behold
+    """.split()
+)
+
+_SUFFIXES = ("eth", "est", "ing", "ed", "es", "s")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed and light stemming."""
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[: -len(suffix)]
+                break
+        tokens.append(word)
+    return tokens
+
+
+def key_reference(key: int, end_key: Optional[int] = None) -> ParsedReference:
+    """ParsedReference for a verse key (or same-chapter key range)."""
+    book, chapter, verse = key >> 16, (key >> 8) & 0xFF, key & 0xFF
+    verse_end = verse
+    if end_key is not None and end_key >> 8 == key >> 8:
+        verse_end = max(end_key & 0xFF, verse)
+    return ParsedReference(book, chapter, verse, verse_end)
+
+
+class BM25Index:
+    """Memory-mapped BM25 index over one translation's verses."""
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            fmt,
+            _,
+            self.doc_count,
+            self.term_count,
+            self.avg_length,
+            self._terms_offset,
+            self._strings_offset,
+            self._postings_offset,
+        ) = _BM25_HEADER.unpack_from(self._mm, 0)
+        if magic != BM25_MAGIC or fmt != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a BM25 index (format {FORMAT_VERSION}): {path}")
+
+        # Per-verse length normalization, computed once at load
+        docs = self._mm[_BM25_HEADER.size:_BM25_HEADER.size + self.doc_count * _DOC.size]
+        self._norms = array(
+            "f",
+            (
+                k1 * (1 - b + b * length / self.avg_length)
+                for _, length, _ in _DOC.iter_unpack(docs)
+            ),
+        )
+
+    def _term(self, i: int) -> Tuple[bytes, int, int]:
+        """(term, df, postings offset) of the i-th dictionary entry."""
+        str_offset, length, _, df, postings = _TERM.unpack_from(
+            self._mm, self._terms_offset + i * _TERM.size
+        )
+        start = self._strings_offset + str_offset
+        return self._mm[start:start + length], df, postings
+
+    def _lookup(self, term: str) -> Optional[Tuple[int, int]]:
+        """Binary search the dictionary for (df, postings offset)."""
+        target = term.encode("utf-8")
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, df, postings = self._term(mid)
+            if found < target:
+                lo = mid + 1
+            elif found > target:
+                hi = mid
+            else:
+                return df, postings
+        return None
+
+    def _doc(self, i: int) -> Tuple[int, int]:
+        key, length, _ = _DOC.unpack_from(self._mm, _BM25_HEADER.size + i * _DOC.size)
+        return key, length
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[ParsedReference, float]]:
+        """Top-k verses for a free-text query, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term, query_tf in Counter(tokenize(query)).items():
+            entry = self._lookup(term)
+            if entry is None:
+                continue
+            df, offset = entry
+            idf = math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+            start = self._postings_offset + offset
+            postings = self._mm[start:start + df * _POSTING.size]
+
+            weight = query_tf * idf * (self.k1 + 1)
+            norms = self._norms
+            for doc, tf in _POSTING.iter_unpack(postings):
+                scores[doc] += weight * tf / (tf + norms[doc])
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(key_reference(self._doc(doc)[0]), score) for doc, score in best]
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+class CrossReferenceGraph:
+    """Memory-mapped verse-to-passage cross references."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, _, self.edge_count = _XREF_HEADER.unpack_from(self._mm, 0)
+        if magic != XREF_MAGIC or fmt != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a cross-reference graph (format {FORMAT_VERSION}): {path}")
+
+    def _edge(self, i: int) -> Tuple[int, int, int, int]:
+        return _EDGE.unpack_from(self._mm, _XREF_HEADER.size + i * _EDGE.size)
+
+    def related(self, ref: ParsedReference, limit: int = 5) -> List[ParsedReference]:
+        """Strongest cross references from any verse in `ref`."""
+        start_key = verse_key(ref.book, ref.chapter, ref.verse_start)
+        end_key = verse_key(ref.book, ref.chapter, min(ref.verse_end, 255))
+
+        lo, hi = 0, self.edge_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._edge(mid)[0] < start_key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        edges = []
+        i = lo
+        while i < self.edge_count:
+            from_key, to_start, to_end, votes = self._edge(i)
+            if from_key > end_key:
+                break
+            edges.append((votes, to_start, to_end))
+            i += 1
+
+        related: Dict[ParsedReference, None] = {}
+        for _, to_start, to_end in sorted(edges, reverse=True):
+            target = key_reference(to_start, to_end)
+            if target.book != ref.book or target.chapter != ref.chapter:
+                related.setdefault(target, None)
+            if len(related) >= limit:
+                break
+        return list(related)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+def build_bm25(store: VerseStore, path: str) -> int:
+    """
+    Build a BM25 index over every verse in a store.
+
+    Returns:
+        Number of distinct terms indexed
+    """
+    docs: List[Tuple[int, int]] = []
+    postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+    for i, (key, text) in enumerate(store.items()):
+        tokens = tokenize(text)
+        docs.append((key, min(len(tokens), 0xFFFF)))
+        for term, tf in Counter(tokens).items():
+            postings[term].append((i, min(tf, 0xFFFF)))
+
+    terms = sorted(postings, key=lambda t: t.encode("utf-8"))
+    avg_length = sum(length for _, length in docs) / max(len(docs), 1)
+
+    terms_offset = _BM25_HEADER.size + len(docs) * _DOC.size
+    strings_offset = terms_offset + len(terms) * _TERM.size
+    strings = b"".join(t.encode("utf-8") for t in terms)
+    postings_offset = strings_offset + len(strings)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(
+            _BM25_HEADER.pack(
+                BM25_MAGIC, FORMAT_VERSION, 0, len(docs), len(terms), avg_length,
+                terms_offset, strings_offset, postings_offset,
+            )
+        )
+        for key, length in docs:
+            f.write(_DOC.pack(key, length, 0))
+
+        str_offset = post_offset = 0
+        for term in terms:
+            encoded = term.encode("utf-8")
+            f.write(_TERM.pack(str_offset, len(encoded), 0, len(postings[term]), post_offset))
+            str_offset += len(encoded)
+            post_offset += len(postings[term]) * _POSTING.size
+
+        f.write(strings)
+        for term in terms:
+            for doc, tf in postings[term]:
+                f.write(_POSTING.pack(doc, tf))
+
+    os.replace(tmp_path, path)
+    return len(terms)
+
+
+def parse_osis(ref: str) -> Optional[Tuple[int, int]]:
+    """Parse `Gen.1.1` or `Prov.8.22-Prov.8.30` into (start key, end key)."""
+    keys = []
+    for part in ref.strip().split("-")[:2]:
+        pieces = part.split(".")
+        if len(pieces) != 3 or not pieces[1].isdigit() or not pieces[2].isdigit():
+            return None
+        book = book_id(pieces[0])
+        if book is None:
+            return None
+        keys.append(verse_key(book, int(pieces[1]), int(pieces[2])))
+    return (keys[0], keys[-1]) if keys else None
+
+
+def read_cross_references(path: str) -> Iterable[Tuple[int, int, int, int]]:
+    """Read `From Verse<TAB>To Verse<TAB>Votes` lines into edges."""
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 2 or line.startswith("#"):
+                continue
+            source, target = parse_osis(fields[0]), parse_osis(fields[1])
+            if source is None or target is None:
+                continue
+            votes = int(fields[2]) if len(fields) > 2 and fields[2].lstrip("-").isdigit() else 0
+            yield source[0], target[0], target[1], votes
+
+
+def build_cross_references(
+    edges: Iterable[Tuple[int, int, int, int]],
+    path: str,
+    min_votes: int = 0,
+) -> int:
+    """
+    Compile cross-reference edges into a graph file.
+
+    Returns:
+        Number of edges written
+    """
+    kept = sorted(edge for edge in edges if edge[3] >= min_votes)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_XREF_HEADER.pack(XREF_MAGIC, FORMAT_VERSION, 0, len(kept)))
+        for edge in kept:
+            f.write(_EDGE.pack(*edge))
+
+    os.replace(tmp_path, path)
+    return len(kept)
+
+
+def bm25_path(version: str) -> str:
+    """Path of the BM25 index for a translation."""
+    return os.path.join(settings.BIBLE_DATA_DIR, f"{version.upper()}.bm25")
+
+
+def cross_references_path() -> str:
+    """Path of the cross-reference graph."""
+    return os.path.join(settings.BIBLE_DATA_DIR, "crossrefs.bin")
+
+
+_bm25_indexes: Dict[str, Optional[BM25Index]] = {}
+_cross_references: Dict[str, Optional[CrossReferenceGraph]] = {}
+
+
+def get_bm25_index(version: Optional[str] = None) -> Optional[BM25Index]:
+    """Return the BM25 index (SCRIPTURE_INDEX_VERSION by default), or None."""
+    version = (version or settings.SCRIPTURE_INDEX_VERSION).upper()
+    if version not in _bm25_indexes:
+        _bm25_indexes[version] = _open(BM25Index, bm25_path(version))
+    return _bm25_indexes[version]
+
+
+def get_cross_references() -> Optional[CrossReferenceGraph]:
+    """Return the cross-reference graph, or None if not installed."""
+    if "graph" not in _cross_references:
+        _cross_references["graph"] = _open(CrossReferenceGraph, cross_references_path())
+    return _cross_references["graph"]
+
+
+def _open(cls, path: str):
+    if not os.path.exists(path):
+        return None
+    try:
+        return cls(path)
+    except Exception as e:
+        print(f"Error opening scripture index {path}: {e}")
+        return None
+
+
+def close_scripture_indexes() -> None:
+    """Close all open indexes (called on shutdown)."""
+    for index in list(_bm25_indexes.values()) + list(_cross_references.values()):
+        if index is not None:
+            index.close()
+    _bm25_indexes.clear()
+    _cross_references.clear()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build offline scripture indexes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bm25 = commands.add_parser("build-bm25", help="Index an installed verse store")
+    bm25.add_argument("version", help="Translation code, e.g. KJV")
+
+    xrefs = commands.add_parser("build-crossrefs", help="Compile a cross-reference list")
+    xrefs.add_argument("source", help="TSV file: from verse, to verse, votes")
+    xrefs.add_argument("--min-votes", type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build-bm25":
+        store = VerseStore(store_path(args.version))
+        count = build_bm25(store, bm25_path(args.version))
+        store.close()
+        print(f"Indexed {count} terms to {bm25_path(args.version)}")
+    elif args.command == "build-crossrefs":
+        count = build_cross_references(
+            read_cross_references(args.source),
+            cross_references_path(),
+            min_votes=args.min_votes,
+        )
+        print(f"Wrote {count} cross references to {cross_references_path()}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,254 @@
+"""
+Scripture reference parser and canonicalizer.
+
+Finds references such as "1 Cor 12:4-7", "John 3:16,18", "Ps 23",
+"Rom 3:23; 6:23" or "Gen 1-2" in free text and turns them into canonical
+(book, chapter, verse range) segments. Book names and aliases are
+compiled once into a single trie-shaped regex, so a scan is one linear
+pass over the text and suitable for whole posts and discussions.
+
+A reference spanning chapters is split into one segment per chapter.
+A segment running to the end of its chapter uses END_OF_CHAPTER as its
+verse_end, which verse store range lookups truncate at the last verse.
+"""
+
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from app.schemas.scripture import ScriptureReference
+from app.services.bible_books import book_aliases, book_id, book_name
+from app.services.bible_store import get_verse_store
+
+
+END_OF_CHAPTER = 255
+MAX_CHAPTER = 150
+MAX_VERSE = 176
+
+# Obadiah, Philemon, 2 John, 3 John, Jude: "Jude 3" means verse 3
+SINGLE_CHAPTER_BOOKS = {31, 57, 63, 64, 65}
+
+
+class ParsedReference(NamedTuple):
+    """A canonical reference to a verse range within one chapter."""
+
+    book: int
+    chapter: int
+    verse_start: int
+    verse_end: int
+
+    @property
+    def whole_chapter(self) -> bool:
+        return self.verse_start == 1 and self.verse_end == END_OF_CHAPTER
+
+    def canonical(self) -> str:
+        """Canonical display form, e.g. '1 Corinthians 12:4-7' or 'Psalms 23'."""
+        name = book_name(self.book)
+        if self.whole_chapter:
+            return f"{name} {self.chapter}"
+        if self.verse_end == self.verse_start:
+            return f"{name} {self.chapter}:{self.verse_start}"
+        if self.verse_end == END_OF_CHAPTER:
+            return f"{name} {self.chapter}:{self.verse_start}-end"
+        return f"{name} {self.chapter}:{self.verse_start}-{self.verse_end}"
+
+    def to_scripture_reference(self, version: str, text: str = "") -> ScriptureReference:
+        """
+        Convert to a ScriptureReference, filling text from the verse store.
+
+        Open-ended ranges are closed using the store's verse count when
+        the translation is installed; otherwise verse_end is left unset.
+        """
+        verse_end: Optional[int] = self.verse_end
+        store = get_verse_store(version)
+
+        if store is not None:
+            if verse_end == END_OF_CHAPTER:
+                verse_end = store.verse_count(self.book, self.chapter) or None
+            text = store.get_range(
+                self.book, self.chapter, self.verse_start, self.verse_end
+            ) or text
+        elif verse_end == END_OF_CHAPTER:
+            verse_end = None
+
+        if verse_end == self.verse_start:
+            verse_end = None
+
+        return ScriptureReference(
+            book=book_name(self.book),
+            chapter=self.chapter,
+            verse_start=self.verse_start,
+            verse_end=verse_end,
+            text=text,
+            version=version.upper(),
+        )
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Build a regex alternation sharing common prefixes."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        optional = "" in node
+        branches = []
+        for char in sorted(c for c in node if c):
+            token = r"\s+" if char == " " else re.escape(char)
+            branches.append(token + emit(node[char]))
+
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if optional else body
+
+    return emit(trie)
+
+
+_NUMBER_RANGE = r"\d{1,3}(?::\d{1,3})?(?:\s*[-–—]\s*\d{1,3}(?::\d{1,3})?)?"
+
+# A list item must not be the number of a following book ("John 3:16, 2 Cor 5:17")
+_LIST_ITEM = rf"\s*[,;]\s*{_NUMBER_RANGE}(?![A-Za-z]|\s*[A-Z])"
+
+_REFERENCE_RE = re.compile(
+    rf"(?<![\w])(?P<book>{_trie_pattern(list(book_aliases()))})\.?\s*"
+    rf"(?P<tail>{_NUMBER_RANGE}(?:{_LIST_ITEM})*)(?![\d:])",
+    re.IGNORECASE,
+)
+
+_PART_RE = re.compile(
+    r"(?P<start_a>\d+)(?::(?P<start_b>\d+))?"
+    r"(?:\s*[-–—]\s*(?P<end_a>\d+)(?::(?P<end_b>\d+))?)?"
+)
+
+
+def _chapter_segments(
+    book: int,
+    chapter: int,
+    verse: int,
+    end_chapter: int,
+    end_verse: int,
+) -> Iterator[ParsedReference]:
+    """Split chapter:verse - end_chapter:end_verse into per-chapter segments."""
+    if end_chapter < chapter or (end_chapter == chapter and end_verse < verse):
+        end_chapter, end_verse = chapter, verse
+
+    for c in range(chapter, min(end_chapter, MAX_CHAPTER) + 1):
+        start = verse if c == chapter else 1
+        end = end_verse if c == end_chapter else END_OF_CHAPTER
+        if start <= MAX_VERSE and c >= 1 and start >= 1:
+            yield ParsedReference(book, c, start, min(end, END_OF_CHAPTER))
+
+
+def _parse_tail(book: int, tail: str) -> Iterator[ParsedReference]:
+    """Parse the chapter/verse part following a book name."""
+    chapter = 1 if book in SINGLE_CHAPTER_BOOKS else 0
+    verse_context = book in SINGLE_CHAPTER_BOOKS
+    separator = ","
+
+    for raw in re.split(r"\s*([,;])\s*", tail):
+        if raw in (",", ";"):
+            separator = raw
+            continue
+
+        part = _PART_RE.fullmatch(raw)
+        if part is None:
+            continue
+
+        a = int(part["start_a"])
+        b = int(part["start_b"]) if part["start_b"] else None
+        end_a = int(part["end_a"]) if part["end_a"] else None
+        end_b = int(part["end_b"]) if part["end_b"] else None
+
+        if b is not None:
+            # chapter:verse[-verse | -chapter:verse]
+            chapter, verse, verse_context = a, b, True
+            if end_b is not None:
+                yield from _chapter_segments(book, chapter, verse, end_a, end_b)
+            else:
+                yield from _chapter_segments(book, chapter, verse, chapter, end_a or verse)
+        elif (verse_context and separator == ",") or book in SINGLE_CHAPTER_BOOKS:
+            # verse[-verse] in the current chapter
+            if end_b is not None:
+                yield from _chapter_segments(book, chapter, a, end_a, end_b)
+            else:
+                yield from _chapter_segments(book, chapter, a, chapter, end_a or a)
+        else:
+            # whole chapter[-chapter], or chapter-chapter:verse
+            chapter, verse_context = a, False
+            if end_b is not None:
+                yield from _chapter_segments(book, a, 1, end_a, end_b)
+                chapter, verse_context = end_a, True
+            else:
+                yield from _chapter_segments(book, a, 1, end_a or a, END_OF_CHAPTER)
+                chapter = end_a or a
+
+        separator = ","
+
+
+def iter_references(text: str) -> Iterator[ParsedReference]:
+    """
+    Stream every reference found in `text`, in order of appearance.
+
+    Two-letter abbreviations must be capitalized ("Is 53:5", not
+    "is 5") to avoid matching ordinary words.
+    """
+    for match in _REFERENCE_RE.finditer(text):
+        name = match["book"]
+        letters = name.lstrip("0123456789 ")
+        if len(letters) <= 2 and letters[:1].islower():
+            continue
+
+        book = book_id(name)
+        if book is not None:
+            yield from _parse_tail(book, match["tail"])
+
+
+def parse_references(text: str, unique: bool = True) -> List[ParsedReference]:
+    """All references in `text`, optionally de-duplicated (order kept)."""
+    if not unique:
+        return list(iter_references(text))
+    return list(dict.fromkeys(iter_references(text)))
+
+
+def parse_reference(text: str) -> Optional[ParsedReference]:
+    """The first reference in `text`, or None."""
+    return next(iter_references(text), None)
+
+
+def canonicalize(text: str, strict: bool = False) -> Optional[str]:
+    """
+    Canonical form of every reference in `text`, joined with '; '.
+
+    Returns None if no reference is found, or with `strict` if `text` is
+    anything other than a single reference. Useful as a stable key, e.g.
+    "1 cor 12:4-7" and "I Corinthians 12:4–7" both give
+    "1 Corinthians 12:4-7".
+    """
+    if strict:
+        match = _REFERENCE_RE.fullmatch(text.strip().rstrip("."))
+        references = parse_references(match.group(0)) if match else []
+    else:
+        references = parse_references(text)
+
+    if not references:
+        return None
+    return "; ".join(ref.canonical() for ref in references)
+
+
+def normalize_references(text: str) -> str:
+    """Rewrite every reference in `text` into its canonical form."""
+
+    def replace(match: "re.Match[str]") -> str:
+        return canonicalize(match.group(0)) or match.group(0)
+
+    return _REFERENCE_RE.sub(replace, text)
+
+
+def reference_key(ref: ScriptureReference) -> ParsedReference:
+    """Canonical key for a ScriptureReference (book aliases resolved)."""
+    book = book_id(ref.book) or 0
+    verse_end = ref.verse_end if ref.verse_end and ref.verse_end > ref.verse_start else ref.verse_start
+    return ParsedReference(book, ref.chapter, ref.verse_start, verse_end)
@@ -0,0 +1,327 @@
+"""
+Precomputed answers for common Scripture topics.
+
+Many questions are variations of a few recurring topics (stewardship, AI
+ethics, prayer, ...). For a curated topic list, answers are generated
+offline for each translation in SCRIPTURE_TOPIC_VERSIONS and stored as
+JSON under SCRIPTURE_TOPICS_DIR:
+
+    {VERSION}/{topic}.json    ScriptureContextResponse payload
+    {VERSION}/manifest.json   fingerprint of the request behind each answer
+
+At request time a keyword classifier decides whether a query is plainly
+about one topic; if so the stored answer is served instantly, otherwise
+the assistant generates one live.
+
+Each answer's fingerprint covers the model, prompt version and the exact
+messages sent, so regeneration only calls the model for topics whose
+prompt, query or retrieved passages changed:
+
+    python -m app.services.scripture_topics generate
+    python -m app.services.scripture_topics generate --version KJV --topic prayer --force
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.llm import close_llm_client
+from app.schemas.scripture import ScriptureContextResponse
+from app.services.scripture_cache import SCRIPTURE_PROMPT_VERSION
+from app.services.scripture_index import tokenize
+from app.services.scripture_parser import parse_references
+
+
+class Topic(NamedTuple):
+    """A curated topic with the question its answer is generated for."""
+
+    slug: str
+    query: str
+    keywords: Tuple[str, ...]
+
+
+TOPICS: Tuple[Topic, ...] = (
+    Topic(
+        "stewardship",
+        "What does the Bible teach about stewardship of technology, talents and resources?",
+        ("steward", "stewardship", "resource", "talent", "entrust", "manage"),
+    ),
+    Topic(
+        "ai-ethics",
+        "How should Christians approach the ethics of artificial intelligence?",
+        ("ai", "artificial", "intelligence", "ethic", "ethical", "machine", "learning", "algorithm"),
+    ),
+    Topic(
+        "prayer",
+        "What does Scripture teach about prayer?",
+        ("prayer", "pray", "prayed", "intercession", "intercede"),
+    ),
+    Topic(
+        "unity-in-diversity",
+        "What does the Bible say about unity in diversity within the body of Christ?",
+        ("unity", "diversity", "divers", "united", "body", "member", "differ", "difference"),
+    ),
+    Topic(
+        "work-and-vocation",
+        "What does the Bible say about work and vocation?",
+        ("work", "vocation", "calling", "career", "job", "labor", "labour"),
+    ),
+    Topic(
+        "truth-and-honesty",
+        "What does Scripture teach about truthfulness and honesty?",
+        ("truth", "truthful", "truthfulness", "honest", "honesty", "lie", "lying", "deception", "deceive"),
+    ),
+    Topic(
+        "justice-and-fairness",
+        "What does the Bible teach about justice and fairness?",
+        ("justice", "just", "fair", "fairness", "bias", "equity", "oppression", "partiality"),
+    ),
+    Topic(
+        "rest-and-sabbath",
+        "What does the Bible teach about rest and the Sabbath?",
+        ("rest", "sabbath", "burnout", "overwork", "weary"),
+    ),
+    Topic(
+        "wisdom-and-discernment",
+        "How does Scripture describe wisdom and discernment?",
+        ("wisdom", "wise", "discernment", "discern", "understanding", "decision"),
+    ),
+    Topic(
+        "suffering-and-hope",
+        "What hope does the Bible offer in suffering?",
+        ("suffering", "suffer", "hope", "pain", "grief", "trial", "hardship"),
+    ),
+    Topic(
+        "bearing-burdens",
+        "What does Scripture say about bearing one another's burdens in community?",
+        ("burden", "bear", "community", "support", "care", "fellowship"),
+    ),
+    Topic(
+        "creativity",
+        "What does the Bible say about creativity and building things?",
+        ("creativity", "creative", "create", "craft", "craftsmanship", "build", "design", "maker"),
+    ),
+)
+
+# Words that frame a question without narrowing its topic
+_FILLER = frozenset(
+    tokenize(
+        """
+        bible biblical scripture scriptural god christian christians jesus
+        christ faith teach teaches say says think view perspective approach
+        believer believers church verse verses passage passages mean meaning
+        regarding concerning help understand know tell explain
+        """
+    )
+)
+
+_TOPIC_INDEX: Dict[str, List[str]] = {}
+for _topic in TOPICS:
+    for _keyword in tokenize(" ".join(_topic.keywords)):
+        _TOPIC_INDEX.setdefault(_keyword, [])
+        if _topic.slug not in _TOPIC_INDEX[_keyword]:
+            _TOPIC_INDEX[_keyword].append(_topic.slug)
+
+_TOPICS_BY_SLUG: Dict[str, Topic] = {topic.slug: topic for topic in TOPICS}
+
+
+def classify(query: str, context: Optional[str] = None) -> Optional[Topic]:
+    """
+    Return the topic a query is plainly about, or None.
+
+    A query matches when the share of its content words covered by one
+    topic's keywords reaches SCRIPTURE_TOPIC_MIN_COVERAGE and no other
+    topic covers as much. Queries with extra context or citing specific
+    passages are too specific for a general answer.
+    """
+    if context or parse_references(query):
+        return None
+
+    words = [word for word in tokenize(query) if word not in _FILLER]
+    if not words:
+        return None
+
+    hits: Dict[str, int] = {}
+    for word in words:
+        for slug in _TOPIC_INDEX.get(word, ()):
+            hits[slug] = hits.get(slug, 0) + 1
+    if not hits:
+        return None
+
+    ranked = sorted(hits.items(), key=lambda item: item[1], reverse=True)
+    slug, count = ranked[0]
+    if len(ranked) > 1 and ranked[1][1] == count:
+        return None
+    if count / len(words) < settings.SCRIPTURE_TOPIC_MIN_COVERAGE:
+        return None
+    return _TOPICS_BY_SLUG[slug]
+
+
+def fingerprint(model: str, messages: List[Dict[str, str]]) -> str:
+    """Hash of everything that determines a generated answer."""
+    payload = json.dumps(
+        [SCRIPTURE_PROMPT_VERSION, model, messages], sort_keys=True
+    ).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _version_dir(version: str) -> str:
+    return os.path.join(settings.SCRIPTURE_TOPICS_DIR, version.upper())
+
+
+def _read_manifest(version: str) -> Dict[str, Dict[str, str]]:
+    path = os.path.join(_version_dir(version), "manifest.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+_answers: Dict[str, Dict[str, ScriptureContextResponse]] = {}
+
+
+def get_topic_answer(topic: Topic, version: str) -> Optional[ScriptureContextResponse]:
+    """
+    Stored answer for a topic and translation, or None.
+
+    A translation's answers are read once and kept in memory.
+    """
+    version = version.upper()
+    if version not in _answers:
+        answers: Dict[str, ScriptureContextResponse] = {}
+        manifest = _read_manifest(version) if version in settings.SCRIPTURE_TOPIC_VERSIONS else {}
+        for slug in manifest:
+            path = os.path.join(_version_dir(version), f"{slug}.json")
+            try:
+                with open(path, encoding="utf-8") as f:
+                    answers[slug] = ScriptureContextResponse.model_validate_json(f.read())
+            except Exception as e:
+                print(f"Error loading topic answer {path}: {e}")
+        _answers[version] = answers
+    return _answers[version].get(topic.slug)
+
+
+def clear_topic_answers() -> None:
+    """Forget loaded answers so the next lookup rereads them."""
+    _answers.clear()
+
+
+async def generate(
+    versions: List[str],
+    slugs: Optional[List[str]] = None,
+    force: bool = False,
+) -> Dict[str, int]:
+    """
+    Generate answers whose fingerprint changed.
+
+    Answers for topics removed from TOPICS are deleted. Returns counts of
+    generated, unchanged and failed answers.
+    """
+    from app.services.scripture_assistant import ScriptureAssistant
+
+    assistant = ScriptureAssistant()
+    counts = {"generated": 0, "unchanged": 0, "failed": 0}
+    topics = [topic for topic in TOPICS if not slugs or topic.slug in slugs]
+
+    for version in versions:
+        version = version.upper()
+        directory = _version_dir(version)
+        manifest = _read_manifest(version)
+
+        for topic in topics:
+            query_vector = await assistant._embed_query(topic.query)
+            model, messages = assistant._build_request(
+                topic.query, None, None, version, query_vector
+            )
+            digest = fingerprint(model, messages)
+            entry = manifest.get(topic.slug)
+            if entry and entry["fingerprint"] == digest and not force:
+                counts["unchanged"] += 1
+                continue
+
+            completion = await assistant.llm.chat_completion(
+                model=model,
+                messages=messages,
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                feature="scripture_topics",
+            )
+            response = assistant._parse_scripture_response(
+                completion.content, topic.query, version
+            )
+            if not (response.scripture_references or response.biblical_principles):
+                print(f"Skipping {version}/{topic.slug}: empty answer")
+                counts["failed"] += 1
+                continue
+
+            _write_json(
+                os.path.join(directory, f"{topic.slug}.json"),
+                response.model_dump(mode="json", exclude={"related_content"}),
+            )
+            manifest[topic.slug] = {
+                "fingerprint": digest,
+                "generated_at": datetime.utcnow().isoformat(),
+            }
+            # Save after each answer so an interrupted run keeps its progress
+            _write_json(os.path.join(directory, "manifest.json"), manifest)
+            counts["generated"] += 1
+            print(f"Generated {version}/{topic.slug}")
+
+        for slug in [slug for slug in manifest if slug not in _TOPICS_BY_SLUG]:
+            manifest.pop(slug)
+            path = os.path.join(directory, f"{slug}.json")
+            if os.path.exists(path):
+                os.remove(path)
+            _write_json(os.path.join(directory, "manifest.json"), manifest)
+            print(f"Removed {version}/{slug}")
+
+    await close_llm_client()
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute answers for common topics")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Generate new or changed answers")
+    gen.add_argument("--version", action="append", help="Translation (default: SCRIPTURE_TOPIC_VERSIONS)")
+    gen.add_argument("--topic", action="append", choices=sorted(_TOPICS_BY_SLUG))
+    gen.add_argument("--force", action="store_true", help="Regenerate unchanged answers")
+
+    commands.add_parser("list", help="Show topics and stored answers")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        counts = asyncio.run(
+            generate(args.version or settings.SCRIPTURE_TOPIC_VERSIONS, args.topic, args.force)
+        )
+        print(
+            f"{counts['generated']} generated, {counts['unchanged']} unchanged, "
+            f"{counts['failed']} failed"
+        )
+    elif args.command == "list":
+        for version in settings.SCRIPTURE_TOPIC_VERSIONS:
+            manifest = _read_manifest(version)
+            for topic in TOPICS:
+                entry = manifest.get(topic.slug)
+                status = entry["generated_at"] if entry else "missing"
+                print(f"{version}\t{topic.slug}\t{status}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
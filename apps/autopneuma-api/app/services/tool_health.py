@@ -0,0 +1,237 @@
+"""
+Health tracking and circuit breakers for community tool endpoints.
+
+Every call to a tool endpoint is recorded in a rolling window (the last
+TOOL_HEALTH_WINDOW calls within TOOL_HEALTH_WINDOW_SECONDS) per endpoint
+URL. An endpoint's breaker opens when:
+
+- TOOL_BREAKER_CONSECUTIVE_FAILURES calls in a row fail, or
+- with at least TOOL_BREAKER_MIN_CALLS in the window, the error rate
+  reaches TOOL_BREAKER_ERROR_RATE or the p95 latency reaches
+  TOOL_BREAKER_MAX_P95_SECONDS
+
+While it is open, executions fail fast instead of waiting out the tool's
+timeout. After TOOL_BREAKER_RESET_SECONDS the breaker is half-open and a
+background probe (a lightweight GET) checks the endpoint. Any response
+below 500 closes the breaker; a failure keeps it open for another period.
+Caller traffic is never used as the trial.
+
+Only server errors, timeouts and connection failures count against an
+endpoint; 4xx responses and schema mismatches mean the endpoint is up.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker
+from app.core.config import settings
+from app.core.http import get_http_client
+
+
+class ToolUnavailableError(ValueError):
+    """Raised when a tool endpoint's circuit is open."""
+
+
+def counts_as_failure(error: BaseException) -> bool:
+    """Whether an error from a tool call says the endpoint is unhealthy."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class EndpointHealth:
+    """Rolling call outcomes and circuit breaker for one endpoint."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.breaker = CircuitBreaker(
+            endpoint,
+            failure_threshold=settings.TOOL_BREAKER_CONSECUTIVE_FAILURES,
+            reset_seconds=settings.TOOL_BREAKER_RESET_SECONDS,
+        )
+        # (monotonic time, latency seconds, ok)
+        self._calls: Deque[Tuple[float, float, bool]] = deque(maxlen=settings.TOOL_HEALTH_WINDOW)
+        self.probes = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a caller may use the endpoint now (closed breaker only)."""
+        if self.breaker.state == CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Record a call outcome and trip the breaker if the window is unhealthy."""
+        self._calls.append((time.monotonic(), latency, ok))
+        if ok:
+            # A late success while open does not close it; probes do that
+            if self.breaker.state == CLOSED:
+                self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+        if self.breaker.state != CLOSED:
+            return
+        window = self._window()
+        if len(window) < settings.TOOL_BREAKER_MIN_CALLS:
+            return
+        error_rate = sum(1 for _, _, ok in window if not ok) / len(window)
+        p95 = _percentile([latency for _, latency, _ in window], 0.95)
+        if (
+            error_rate >= settings.TOOL_BREAKER_ERROR_RATE
+            or p95 >= settings.TOOL_BREAKER_MAX_P95_SECONDS
+        ):
+            print(
+                f"Opening circuit for {self.endpoint}: "
+                f"error rate {error_rate:.0%}, p95 {p95:.1f}s"
+            )
+            self.breaker.trip()
+
+    def _window(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - settings.TOOL_HEALTH_WINDOW_SECONDS
+        return [call for call in self._calls if call[0] >= cutoff]
+
+    async def probe(self) -> bool:
+        """
+        Check a half-open endpoint and close or reopen its breaker.
+
+        Returns:
+            Whether the endpoint answered
+        """
+        if not self.breaker.allow():
+            return False
+        self.probes += 1
+        try:
+            response = await get_http_client().get(
+                self.endpoint, timeout=settings.TOOL_PROBE_TIMEOUT_SECONDS
+            )
+            healthy = response.status_code < 500
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            healthy = False
+
+        if healthy:
+            self.breaker.record_success()
+            # Start afresh so old failures do not trip it again
+            self._calls.clear()
+        else:
+            self.breaker.record_failure()
+        return healthy
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state plus rolling error rate and latency percentiles."""
+        window = self._window()
+        latencies = [latency for _, latency, _ in window]
+        return {
+            **self.breaker.stats(),
+            "window_calls": len(window),
+            "error_rate": (
+                round(sum(1 for _, _, ok in window if not ok) / len(window), 3)
+                if window else None
+            ),
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+            "rejected": self.rejected,
+            "probes": self.probes,
+        }
+
+
+class ToolHealthMonitor:
+    """Per-endpoint health, plus the background task that probes open breakers."""
+
+    def __init__(self):
+        self._endpoints: Dict[str, EndpointHealth] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def endpoint(self, url: str) -> EndpointHealth:
+        """Health record for an endpoint URL, created on first use."""
+        if url not in self._endpoints:
+            self._endpoints[url] = EndpointHealth(url)
+        return self._endpoints[url]
+
+    def get(self, url: str) -> Optional[EndpointHealth]:
+        """Health record for an endpoint URL if it has been called."""
+        return self._endpoints.get(url)
+
+    async def probe_due(self) -> int:
+        """Probe every endpoint whose breaker is half-open; returns how many."""
+        due = [
+            health for health in self._endpoints.values()
+            if health.breaker.state == HALF_OPEN
+        ]
+        await asyncio.gather(*(health.probe() for health in due))
+        return len(due)
+
+    async def _probe_loop(self) -> None:
+        """Probe half-open endpoints until stopped."""
+        while True:
+            try:
+                await self.probe_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Tool probe error: {e}")
+            await asyncio.sleep(settings.TOOL_PROBE_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """Start probing open breakers."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self) -> None:
+        """Stop probing."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Endpoint counts by breaker state, and details of unhealthy ones."""
+        states: Dict[str, int] = {}
+        unhealthy = []
+        for url, health in self._endpoints.items():
+            stats = health.stats()
+            states[stats["state"]] = states.get(stats["state"], 0) + 1
+            if stats["state"] != CLOSED:
+                unhealthy.append({"endpoint": url, **stats})
+        return {
+            "endpoints": len(self._endpoints),
+            "states": states,
+            "unhealthy": unhealthy,
+            "probing": self._task is not None,
+        }
+
+
+_monitor: Optional[ToolHealthMonitor] = None
+
+
+def get_tool_health_monitor() -> ToolHealthMonitor:
+    """Return the process-wide tool health monitor, creating it on first use."""
+    global _monitor
+    if _monitor is None:
+        _monitor = ToolHealthMonitor()
+    return _monitor
+
+
+async def start_tool_health_probes() -> None:
+    """Start probing open breakers (called on startup)."""
+    get_tool_health_monitor().start()
+
+
+async def stop_tool_health_probes() -> None:
+    """Stop probing (called on shutdown)."""
+    if _monitor is not None:
+        await _monitor.stop()
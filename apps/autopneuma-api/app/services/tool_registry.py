@@ -0,0 +1,280 @@
+"""
+In-memory registry of community tool configurations.
+
+Executing a tool needs its endpoint, status, rate limit and timeout,
+which change rarely. The registry keeps validated `RegisteredTool`
+objects in a TTL cache so the execute path reads no configuration from
+the database while the cache is warm. Ids that do not exist are cached
+too (for a shorter time) so repeated calls with a bad id stay cheap.
+
+Entries are invalidated:
+
+- directly, when a tool is registered through this process
+- through a change feed: `community_tools.config_version` and
+  `config_updated_at` are bumped by a trigger only when configuration
+  columns change (not when execution metrics are updated), and a
+  background task polls for rows changed since its last look every
+  TOOL_REGISTRY_SYNC_SECONDS. Approvals and suspensions made in any
+  worker or directly in the database are picked up this way.
+
+Compiled input/output schema validators are kept per tool and
+config_version (see `validators`), bounded like the tool entries. Listing
+pages are cached here as well, for TOOL_LIST_CACHE_TTL_SECONDS, and
+dropped whenever any tool is invalidated.
+
+Cached tools carry the execution metrics from when they were loaded, so
+endpoints that show metrics read the row directly.
+"""
+
+import asyncio
+import math
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from supabase import Client
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.json_schema import compile_schema
+from app.schemas.community_tools import RegisteredTool
+
+
+# Cached in place of a tool for ids that do not exist
+_NOT_FOUND = object()
+
+ToolLoader = Callable[[str], Awaitable[Optional[RegisteredTool]]]
+
+
+class ToolValidators(NamedTuple):
+    """Compiled input/output schema validators for one tool version."""
+
+    config_version: int
+    input: Optional[Any]
+    output: Optional[Any]
+
+
+class ToolRegistry:
+    """TTL cache of tool configurations with change-feed invalidation."""
+
+    def __init__(self):
+        self._tools: TTLCache[Any] = TTLCache(
+            max_entries=settings.TOOL_REGISTRY_MAX_ENTRIES,
+            ttl_seconds=settings.TOOL_REGISTRY_TTL_SECONDS,
+        )
+        # Listing pages (see CommunityToolsService.list_tools)
+        self.listings: TTLCache[Dict[str, Any]] = TTLCache(
+            max_entries=settings.TOOL_LIST_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.TOOL_LIST_CACHE_TTL_SECONDS,
+        )
+        # Keyed by config_version so they never go stale; only LRU-bounded
+        self._validators: TTLCache[ToolValidators] = TTLCache(
+            max_entries=settings.TOOL_REGISTRY_MAX_ENTRIES,
+            ttl_seconds=math.inf,
+        )
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Change-feed watermark: (config_updated_at, id) of the last row seen
+        self._synced_to: Optional[Tuple[str, str]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.invalidations = 0
+
+    async def get(self, tool_id: str, load: ToolLoader) -> Optional[RegisteredTool]:
+        """
+        Cached tool for an id, loading it on a miss.
+
+        Concurrent misses for the same id share one load.
+
+        Args:
+            tool_id: Tool ID
+            load: Coroutine function fetching a tool, or None if it does
+                not exist
+
+        Returns:
+            The tool, or None if no tool has this id
+        """
+        cached = self._tools.get(tool_id)
+        if cached is _NOT_FOUND:
+            return None
+        if cached is not None:
+            return cached
+
+        if tool_id in self._loading:
+            pending = self._loading[tool_id]
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request doing the load went away; load it ourselves
+                return await self.get(tool_id, load)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[tool_id] = future
+        try:
+            tool = await load(tool_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it so a failure nobody waited for is not logged
+            future.exception()
+            raise
+        else:
+            if tool is None:
+                self._tools.set(
+                    tool_id, _NOT_FOUND, ttl_seconds=settings.TOOL_REGISTRY_NEGATIVE_TTL_SECONDS
+                )
+            else:
+                self._tools.set(tool_id, tool)
+            future.set_result(tool)
+            return tool
+        finally:
+            self._loading.pop(tool_id, None)
+
+    def validators(self, tool: RegisteredTool) -> ToolValidators:
+        """
+        Compiled schema validators for a tool.
+
+        Compiled once per config_version, so they survive the tool's own
+        cache entry expiring and are rebuilt only when its schemas can
+        have changed. A validator is None when jsonschema is not installed
+        or the schema is invalid.
+        """
+        cached = self._validators.get(tool.id)
+        if cached is None or cached.config_version != tool.config_version:
+            cached = ToolValidators(
+                tool.config_version,
+                compile_schema(tool.input_schema),
+                compile_schema(tool.output_schema),
+            )
+            self._validators.set(tool.id, cached)
+        return cached
+
+    def put(self, tool: RegisteredTool) -> None:
+        """Cache a tool that was just written (e.g. registered)."""
+        self._tools.set(tool.id, tool)
+        self.listings.clear()
+
+    def invalidate(self, tool_id: str) -> None:
+        """Drop a tool, and listings that may include it, so they reload."""
+        self._tools.delete(tool_id)
+        self._validators.delete(tool_id)
+        self.listings.clear()
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every cached tool and listing."""
+        self._tools.clear()
+        self._validators.clear()
+        self.listings.clear()
+
+    async def sync(self, db: Client) -> int:
+        """
+        Invalidate tools whose configuration changed since the last sync.
+
+        The feed is read in (config_updated_at, id) order from a watermark
+        on both columns, TOOL_REGISTRY_SYNC_BATCH rows at a time, so a bulk
+        update giving many rows the same timestamp is still paged through.
+        The first sync only records where the feed currently ends.
+
+        Returns:
+            Number of tools invalidated
+        """
+        if self._synced_to is None:
+            query = self._feed_query(db)
+            query.params = query.params.set("order", "config_updated_at.desc,id.desc")
+            result = await asyncio.to_thread(lambda: query.limit(1).execute())
+            rows = result.data or []
+            self._synced_to = (
+                (rows[0]["config_updated_at"], rows[0]["id"])
+                if rows else ("1970-01-01T00:00:00+00:00", "")
+            )
+            return 0
+
+        invalidated = 0
+        while True:
+            synced_at, synced_id = self._synced_to
+            query = self._feed_query(db)
+            query.params = query.params.set("order", "config_updated_at.asc,id.asc")
+            query.params = query.params.set(
+                "or",
+                f'(config_updated_at.gt."{synced_at}",'
+                f'and(config_updated_at.eq."{synced_at}",id.gt."{synced_id}"))'
+                if synced_id else f'(config_updated_at.gte."{synced_at}")',
+            )
+            batch = settings.TOOL_REGISTRY_SYNC_BATCH
+            result = await asyncio.to_thread(lambda: query.limit(batch).execute())
+            rows = result.data or []
+            for row in rows:
+                self.invalidate(row["id"])
+            invalidated += len(rows)
+            if rows:
+                self._synced_to = (rows[-1]["config_updated_at"], rows[-1]["id"])
+            if len(rows) < batch:
+                return invalidated
+
+    def _feed_query(self, db: Client) -> Any:
+        """
+        Base query for the configuration change feed.
+
+        The pinned postgrest client (0.13) has no or_() and sends each
+        .order() as its own parameter, so callers set the two-column sort
+        and keyset filter as single parameters.
+        """
+        return db.table("community_tools").select("id, config_updated_at")
+
+    async def _sync_loop(self, db: Client) -> None:
+        """Poll the change feed until stopped."""
+        while True:
+            try:
+                await self.sync(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Without the feed, entries still expire after their TTL
+                print(f"Tool registry sync error: {e}")
+            await asyncio.sleep(settings.TOOL_REGISTRY_SYNC_SECONDS)
+
+    def start(self, db: Client) -> None:
+        """Start polling the change feed."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop(db))
+
+    async def stop(self) -> None:
+        """Stop polling the change feed."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and change-feed position."""
+        return {
+            **self._tools.stats(),
+            "listings": self.listings.stats(),
+            "invalidations": self.invalidations,
+            "synced_at": self._synced_to[0] if self._synced_to else None,
+            "syncing": self._task is not None,
+        }
+
+
+_registry: Optional[ToolRegistry] = None
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Return the process-wide tool registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        _registry = ToolRegistry()
+    return _registry
+
+
+async def start_tool_registry_sync(db: Client) -> None:
+    """Start the change-feed poller (called on startup)."""
+    if settings.TOOL_REGISTRY_SYNC_SECONDS > 0:
+        get_tool_registry().start(db)
+
+
+async def stop_tool_registry_sync() -> None:
+    """Stop the change-feed poller (called on shutdown)."""
+    if _registry is not None:
+        await _registry.stop()
@@ -0,0 +1,386 @@
+"""
+Local vector indexes for semantic search.
+
+Embeddings are computed offline with the local embedder
+(app.core.embeddings) and stored per index under VECTOR_INDEX_DIR:
+
+    {name}/vectors.npy     float32 (n, d), L2-normalized
+    {name}/items.json      embedder name and one metadata object per row
+    {name}/centroids.npy   IVF list centroids (nlist, d)     [optional]
+    {name}/offsets.npy     IVF list boundaries (nlist + 1,)  [optional]
+
+Arrays are loaded with `mmap_mode="r"`, so the OS pages vectors in on
+demand and shares them between worker processes. Small indexes are
+searched exhaustively; larger ones are built with an inverted-file (IVF)
+layout where rows are grouped by nearest centroid and a query scans only
+the `nprobe` closest lists, each a contiguous slice of the mapped array.
+
+Two indexes are used by the Scripture assistant:
+
+- `verses`: every verse of SCRIPTURE_INDEX_VERSION
+- `community`: approved posts, published blog posts and approved projects
+
+Build with:
+
+    python -m app.services.vector_index build-verses KJV
+    python -m app.services.vector_index build-community
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.embeddings import get_embedder
+from app.services.bible_store import VerseStore, store_path
+
+try:
+    import numpy as np
+except ImportError:  # optional: vector search is disabled without it
+    np = None
+
+
+VERSES_INDEX = "verses"
+COMMUNITY_INDEX = "community"
+
+# Below this many vectors an exhaustive scan is as fast as IVF
+IVF_MIN_VECTORS = 20000
+
+_EMBED_BATCH = 256
+
+
+class VectorIndex:
+    """Memory-mapped flat or IVF index of normalized vectors."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "items.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.embedder = meta["embedder"]
+        self.items: List[Dict[str, Any]] = meta["items"]
+
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        if len(self.items) != self.vectors.shape[0]:
+            raise ValueError(f"Vector index {path} has mismatched items")
+
+        self.centroids = None
+        self.offsets = None
+        if os.path.exists(os.path.join(path, "centroids.npy")):
+            self.centroids = np.load(os.path.join(path, "centroids.npy"))
+            self.offsets = np.load(os.path.join(path, "offsets.npy"))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def search(
+        self,
+        queries: "np.ndarray",
+        k: int,
+        nprobe: Optional[int] = None,
+        min_score: float = -1.0,
+    ) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """
+        Top-k items by cosine similarity for a batch of query vectors.
+
+        Args:
+            queries: (batch, d) normalized query vectors
+            k: Results per query
+            nprobe: IVF lists to scan (VECTOR_INDEX_NPROBE by default)
+            min_score: Drop results scoring below this
+
+        Returns:
+            One list of (item, score) pairs per query, best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.centroids is None:
+            rows, scores = _top_k(queries @ self.vectors.T, k)
+            rows = [rows[i] for i in range(len(queries))]
+            scores = [scores[i] for i in range(len(queries))]
+        else:
+            rows, scores = self._search_ivf(queries, k, nprobe or settings.VECTOR_INDEX_NPROBE)
+
+        return [
+            [
+                (self.items[int(row)], float(score))
+                for row, score in zip(query_rows, query_scores)
+                if score >= min_score
+            ]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
+
+    def _search_ivf(
+        self, queries: "np.ndarray", k: int, nprobe: int
+    ) -> Tuple[List["np.ndarray"], List["np.ndarray"]]:
+        """Scan the nprobe closest lists of each query."""
+        nprobe = min(nprobe, len(self.centroids))
+        probes, _ = _top_k(queries @ self.centroids.T, nprobe)
+
+        rows, scores = [], []
+        for query, lists in zip(queries, probes):
+            candidates = np.concatenate(
+                [np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists]
+            )
+            if len(candidates) == 0:
+                rows.append(candidates)
+                scores.append(np.zeros(0, dtype=np.float32))
+                continue
+            # Lists are contiguous, so this gathers a few slices of the map
+            candidate_scores = self.vectors[candidates] @ query
+            best, best_scores = _top_k(candidate_scores[None, :], k)
+            rows.append(candidates[best[0]])
+            scores.append(best_scores[0])
+        return rows, scores
+
+    def close(self) -> None:
+        """Release the memory-mapped vectors."""
+        mm = getattr(self.vectors, "_mmap", None)
+        self.vectors = None
+        if mm is not None:
+            mm.close()
+
+
+def _top_k(scores: "np.ndarray", k: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Row-wise indices and values of the k largest scores, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.zeros((scores.shape[0], 0))
+        return empty.astype(np.int64), empty
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return (
+        np.take_along_axis(part, order, axis=1),
+        np.take_along_axis(part_scores, order, axis=1),
+    )
+
+
+def _kmeans(vectors: "np.ndarray", nlist: int, iterations: int = 10) -> "np.ndarray":
+    """Spherical k-means on a sample of the vectors; returns centroids."""
+    rng = np.random.default_rng(0)
+    sample_size = min(len(vectors), nlist * 64)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Keep the previous centroid for lists that received no vectors
+        sums[empty] = centroids[empty]
+        norms[empty] = 1.0
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+def _assign(vectors: "np.ndarray", centroids: "np.ndarray", chunk: int = 8192) -> "np.ndarray":
+    """Nearest centroid of every vector, in chunks to bound memory."""
+    return np.concatenate([
+        np.argmax(vectors[i:i + chunk] @ centroids.T, axis=1)
+        for i in range(0, len(vectors), chunk)
+    ])
+
+
+def build_index(
+    vectors: "np.ndarray",
+    items: List[Dict[str, Any]],
+    path: str,
+    embedder: str,
+    nlist: Optional[int] = None,
+) -> int:
+    """
+    Write an index directory.
+
+    Args:
+        vectors: (n, d) normalized vectors
+        items: Metadata per row
+        path: Output directory
+        embedder: Name of the embedder the vectors came from
+        nlist: IVF lists; 0 for a flat index, None to choose from the size
+
+    Returns:
+        Number of vectors written
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if nlist is None:
+        nlist = settings.VECTOR_INDEX_NLIST
+        if nlist == 0 and len(vectors) >= IVF_MIN_VECTORS:
+            nlist = int(np.sqrt(len(vectors)))
+    nlist = min(nlist, len(vectors))
+
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    if nlist > 0:
+        centroids = _kmeans(vectors, nlist)
+        assignment = _assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        vectors = vectors[order]
+        items = [items[i] for i in order]
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assignment, minlength=nlist))
+        np.save(os.path.join(tmp_path, "centroids.npy"), centroids)
+        np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+
+    np.save(os.path.join(tmp_path, "vectors.npy"), vectors)
+    with open(os.path.join(tmp_path, "items.json"), "w", encoding="utf-8") as f:
+        json.dump({"embedder": embedder, "items": items}, f)
+
+    # Swap directories; running processes keep their mapping of the old files
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return len(vectors)
+
+
+def _embed_all(texts: List[str]) -> "np.ndarray":
+    embedder = get_embedder()
+    batches = []
+    for i in range(0, len(texts), _EMBED_BATCH):
+        batches.append(embedder.embed(texts[i:i + _EMBED_BATCH]))
+        print(f"Embedded {min(i + _EMBED_BATCH, len(texts))}/{len(texts)}", end="\r")
+    print()
+    if not batches:
+        return np.zeros((0, embedder.dimensions), dtype=np.float32)
+    return np.concatenate(batches)
+
+
+def build_verses_index(store: VerseStore, path: str) -> int:
+    """Embed every verse of a store; items are {"kind": "verse", "key": ...}."""
+    keys, texts = [], []
+    for key, text in store.items():
+        keys.append(key)
+        texts.append(text)
+    items = [{"kind": "verse", "key": key} for key in keys]
+    return build_index(_embed_all(texts), items, path, get_embedder().name)
+
+
+# Table, item kind, key columns, text columns and visibility filter per source
+_COMMUNITY_SOURCES = (
+    ("posts", "post", ("id",), ("title", "content"), ("moderation_status", "approved")),
+    ("blog_posts", "blog_post", ("id", "slug"), ("title", "excerpt", "content"), ("is_published", True)),
+    ("projects", "project", ("id", "slug"), ("title", "description", "spiritual_application"), ("is_approved", True)),
+)
+
+
+def fetch_community_content(db, page_size: int = 1000) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Texts and item metadata for all publicly visible community content."""
+    texts, items = [], []
+    for table, kind, keys, columns, (column, value) in _COMMUNITY_SOURCES:
+        select = ",".join(keys + columns)
+        start = 0
+        while True:
+            rows = (
+                db.table(table)
+                .select(select)
+                .eq(column, value)
+                .order("created_at")
+                .range(start, start + page_size)  # end is exclusive
+                .execute()
+            ).data
+            for row in rows:
+                text = "\n".join(str(row[c]) for c in columns if row.get(c))
+                texts.append(text[:4000])
+                item = {"kind": kind, "id": row["id"], "title": row.get("title", "")}
+                if row.get("slug"):
+                    item["slug"] = row["slug"]
+                items.append(item)
+            # The server may cap page sizes, so only an empty page ends it
+            if not rows:
+                break
+            start += len(rows)
+    return texts, items
+
+
+def build_community_index(db, path: str) -> int:
+    """Embed posts, blog posts and projects from the database."""
+    texts, items = fetch_community_content(db)
+    return build_index(_embed_all(texts), items, path, get_embedder().name)
+
+
+def index_path(name: str) -> str:
+    """Directory of a named index."""
+    return os.path.join(settings.VECTOR_INDEX_DIR, name)
+
+
+_indexes: Dict[str, Optional[VectorIndex]] = {}
+
+
+def vector_search_available() -> bool:
+    """Whether vector search can run (NumPy is installed)."""
+    return np is not None
+
+
+def get_vector_index(name: str) -> Optional[VectorIndex]:
+    """
+    Return a named index, or None if unavailable.
+
+    An index is unavailable when NumPy is missing, it has not been built,
+    or it was built with a different embedder than the one configured
+    (its vectors would not be comparable with query embeddings).
+    """
+    if np is None or not settings.VECTOR_SEARCH_ENABLED:
+        return None
+
+    if name not in _indexes:
+        path = index_path(name)
+        index = None
+        if os.path.exists(os.path.join(path, "items.json")):
+            try:
+                index = VectorIndex(path)
+                expected = get_embedder().name
+                if index.embedder != expected:
+                    print(f"Vector index {name} was built with {index.embedder}, not {expected}; rebuild it")
+                    index.close()
+                    index = None
+            except Exception as e:
+                print(f"Error opening vector index {path}: {e}")
+                index = None
+        _indexes[name] = index
+    return _indexes[name]
+
+
+def close_vector_indexes() -> None:
+    """Close all open indexes (called on shutdown)."""
+    for index in _indexes.values():
+        if index is not None:
+            index.close()
+    _indexes.clear()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build local vector indexes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verses = commands.add_parser("build-verses", help="Embed an installed verse store")
+    verses.add_argument("version", nargs="?", help="Translation code (default: SCRIPTURE_INDEX_VERSION)")
+
+    commands.add_parser("build-community", help="Embed posts, blog posts and projects")
+
+    args = parser.parse_args(argv)
+
+    if np is None:
+        parser.error("numpy is required to build vector indexes")
+
+    if args.command == "build-verses":
+        store = VerseStore(store_path(args.version or settings.SCRIPTURE_INDEX_VERSION))
+        count = build_verses_index(store, index_path(VERSES_INDEX))
+        store.close()
+        print(f"Indexed {count} verses to {index_path(VERSES_INDEX)}")
+    elif args.command == "build-community":
+        from app.core.supabase import init_supabase_client
+
+        count = build_community_index(init_supabase_client(), index_path(COMMUNITY_INDEX))
+        print(f"Indexed {count} items to {index_path(COMMUNITY_INDEX)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
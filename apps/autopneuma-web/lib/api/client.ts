@@ -107,12 +107,16 @@ export const communityToolsApi = {
     status?: string
     page?: number
     per_page?: number
+    cursor?: string
+    view?: 'full' | 'summary'
   }) {
     const searchParams = new URLSearchParams()
     if (params?.category) searchParams.append('category', params.category)
     if (params?.status) searchParams.append('status', params.status)
     if (params?.page) searchParams.append('page', params.page.toString())
     if (params?.per_page) searchParams.append('per_page', params.per_page.toString())
+    if (params?.cursor) searchParams.append('cursor', params.cursor)
+    if (params?.view) searchParams.append('view', params.view)
 
     const query = searchParams.toString()
     const endpoint = query ? `/tools/list?${query}` : '/tools/list'
@@ -242,9 +246,27 @@ export interface CommunityToolResponse {
   timestamp: string
 }
 
+export type ToolSummary = Pick<
+  RegisteredTool,
+  | 'id'
+  | 'creator_id'
+  | 'project_id'
+  | 'tool_name'
+  | 'description'
+  | 'category'
+  | 'status'
+  | 'rate_limit'
+  | 'total_executions'
+  | 'success_rate'
+  | 'average_execution_time_ms'
+  | 'created_at'
+>
+
 export interface ToolListResponse {
-  tools: RegisteredTool[]
-  total: number
+  tools: RegisteredTool[] | ToolSummary[]
+  total: number | null
+  total_estimated: boolean
   page: number
   per_page: number
+  next_cursor: string | null
 }
@@ -27,6 +27,7 @@ CREATE TABLE community_tools (
   authentication_method VARCHAR(20) DEFAULT 'api_key' CHECK (authentication_method IN ('api_key', 'oauth', 'none')),
   input_schema JSONB NOT NULL,  -- JSON Schema for inputs
   output_schema JSONB NOT NULL, -- JSON Schema for outputs
+  timeout_seconds FLOAT DEFAULT 30.0 CHECK (timeout_seconds > 0 AND timeout_seconds <= 120), -- Per-call timeout
 
   -- Rate Limiting
   rate_limit INTEGER DEFAULT 100, -- Requests per hour per user
@@ -40,11 +41,18 @@ CREATE TABLE community_tools (
   approved_by UUID REFERENCES profiles(id),
   approved_at TIMESTAMP WITH TIME ZONE,
 
-  -- Performance Metrics
+  -- Performance Metrics (maintained by record_tool_execution_metrics trigger)
   total_executions INTEGER DEFAULT 0,
+  successful_executions INTEGER DEFAULT 0,
+  total_execution_time_ms FLOAT DEFAULT 0.0,
   success_rate FLOAT DEFAULT 1.0 CHECK (success_rate >= 0 AND success_rate <= 1),
   average_execution_time_ms FLOAT DEFAULT 0.0,
 
+  -- Configuration version (bumped by bump_community_tools_config_version,
+  -- not by metric updates; API workers poll it to invalidate cached tools)
+  config_version INTEGER DEFAULT 1,
+  config_updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
   -- Timestamps
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
@@ -52,6 +60,9 @@ CREATE TABLE community_tools (
 
 -- Index for faster lookups
 CREATE INDEX idx_community_tools_status ON community_tools(status);
+CREATE INDEX idx_community_tools_listing ON community_tools(status, category, created_at DESC, id DESC);
+CREATE INDEX idx_community_tools_listing_all ON community_tools(status, created_at DESC, id DESC);
+CREATE INDEX idx_community_tools_config_updated ON community_tools(config_updated_at, id);
 CREATE INDEX idx_community_tools_category ON community_tools(category);
 CREATE INDEX idx_community_tools_creator ON community_tools(creator_id);
 CREATE INDEX idx_community_tools_project ON community_tools(project_id);
@@ -183,6 +194,201 @@ CREATE TRIGGER update_community_tools_timestamp
   FOR EACH ROW
   EXECUTE FUNCTION update_community_tools_updated_at();
 
+-- Bump community_tools.config_version when configuration changes.
+-- Metric updates from record_tool_execution_metrics leave it alone, so
+-- cached tool configurations are only invalidated by real changes.
+CREATE OR REPLACE FUNCTION bump_community_tools_config_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF (NEW.tool_name, NEW.description, NEW.category, NEW.api_endpoint,
+      NEW.authentication_method, NEW.input_schema, NEW.output_schema,
+      NEW.timeout_seconds, NEW.rate_limit, NEW.spiritual_application,
+      NEW.requires_approval, NEW.status, NEW.approved_by, NEW.approved_at)
+     IS DISTINCT FROM
+     (OLD.tool_name, OLD.description, OLD.category, OLD.api_endpoint,
+      OLD.authentication_method, OLD.input_schema, OLD.output_schema,
+      OLD.timeout_seconds, OLD.rate_limit, OLD.spiritual_application,
+      OLD.requires_approval, OLD.status, OLD.approved_by, OLD.approved_at)
+  THEN
+    NEW.config_version = OLD.config_version + 1;
+    NEW.config_updated_at = NOW();
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER bump_community_tools_config_version
+  BEFORE UPDATE ON community_tools
+  FOR EACH ROW
+  EXECUTE FUNCTION bump_community_tools_config_version();
+
+-- Maintain community_tools performance metrics from tool_executions.
+-- Runs once per INSERT statement, so a buffered multi-row insert costs one
+-- UPDATE per tool. Counters are incremented in place, so concurrent
+-- executions never lose updates.
+CREATE OR REPLACE FUNCTION record_tool_execution_metrics()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE community_tools AS t
+  SET
+    total_executions = t.total_executions + agg.executions,
+    successful_executions = t.successful_executions + agg.successes,
+    total_execution_time_ms = t.total_execution_time_ms + agg.execution_time_ms,
+    success_rate = (t.successful_executions + agg.successes)::FLOAT
+      / (t.total_executions + agg.executions),
+    average_execution_time_ms = (t.total_execution_time_ms + agg.execution_time_ms)
+      / (t.total_executions + agg.executions)
+  FROM (
+    SELECT
+      tool_id,
+      COUNT(*) AS executions,
+      COUNT(*) FILTER (WHERE success) AS successes,
+      SUM(execution_time_ms) AS execution_time_ms
+    FROM new_executions
+    GROUP BY tool_id
+  ) AS agg
+  WHERE t.id = agg.tool_id;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger for tool_executions
+CREATE TRIGGER record_tool_execution_metrics
+  AFTER INSERT ON tool_executions
+  REFERENCING NEW TABLE AS new_executions
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION record_tool_execution_metrics();
+
+-- ============================================================================
+-- MODERATION JOB QUEUE
+-- ============================================================================
+
+-- Durable queue for asynchronous (submit-and-poll) moderation.
+-- Background API workers claim jobs with claim_moderation_jobs().
+CREATE TABLE moderation_jobs (
+  id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+
+  -- Content to moderate
+  content TEXT NOT NULL,
+  content_type VARCHAR(50) NOT NULL,
+  content_id TEXT,
+  author_id TEXT,
+
+  -- Optional callback when the job completes
+  webhook_url TEXT,
+
+  -- Processing state
+  status VARCHAR(20) DEFAULT 'queued' CHECK (status IN ('queued', 'processing', 'completed', 'failed')),
+  attempts INTEGER DEFAULT 0,
+  result JSONB,
+  error_message TEXT,
+
+  -- Timestamps
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  started_at TIMESTAMP WITH TIME ZONE,
+  completed_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Index for claiming the oldest queued jobs
+CREATE INDEX idx_moderation_jobs_queue ON moderation_jobs(status, created_at);
+
+-- Only the service role (API workers) touches the queue
+ALTER TABLE moderation_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Atomically claim up to p_limit jobs. Jobs stuck in 'processing' longer
+-- than p_visibility_timeout_seconds (e.g. a worker crashed) are reclaimed.
+CREATE OR REPLACE FUNCTION claim_moderation_jobs(
+  p_limit INTEGER,
+  p_visibility_timeout_seconds INTEGER DEFAULT 300
+)
+RETURNS SETOF moderation_jobs AS $$
+  UPDATE moderation_jobs
+  SET status = 'processing', started_at = NOW(), attempts = attempts + 1
+  WHERE id IN (
+    SELECT id FROM moderation_jobs
+    WHERE status = 'queued'
+       OR (status = 'processing'
+           AND started_at < NOW() - make_interval(secs => p_visibility_timeout_seconds))
+    ORDER BY created_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING *;
+$$ LANGUAGE sql;
+
+-- Queue depth and lag for monitoring
+CREATE OR REPLACE FUNCTION moderation_queue_stats()
+RETURNS TABLE (
+  queued BIGINT,
+  processing BIGINT,
+  oldest_queued_at TIMESTAMP WITH TIME ZONE
+) AS $$
+  SELECT
+    COUNT(*) FILTER (WHERE status = 'queued'),
+    COUNT(*) FILTER (WHERE status = 'processing'),
+    MIN(created_at) FILTER (WHERE status = 'queued')
+  FROM moderation_jobs
+  WHERE status IN ('queued', 'processing');
+$$ LANGUAGE sql STABLE;
+
+-- ============================================================================
+-- SCRIPTURE ANSWER CACHE
+-- ============================================================================
+
+-- Persistent tier of the Scripture Context Assistant answer cache.
+-- cache_key encodes prompt version, model, Bible version, content type and
+-- a hash of the normalized query; embedding is set when near-duplicate
+-- lookup is enabled.
+CREATE TABLE scripture_answer_cache (
+  cache_key TEXT PRIMARY KEY,
+  partition TEXT NOT NULL,
+  normalized_query TEXT NOT NULL,
+  response JSONB NOT NULL,
+  embedding REAL[],
+
+  -- Timestamps
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Index for purging expired answers
+CREATE INDEX idx_scripture_answer_cache_expires ON scripture_answer_cache(expires_at);
+
+-- Only the service role (API) reads and writes the cache
+ALTER TABLE scripture_answer_cache ENABLE ROW LEVEL SECURITY;
+
+-- ============================================================================
+-- LLM USAGE
+-- ============================================================================
+
+-- One row per LLM call, written in batches by the API.
+-- Token counts of streamed completions are estimated locally (estimated = TRUE).
+CREATE TABLE llm_usage (
+  id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+  feature VARCHAR(50) NOT NULL,
+  model VARCHAR(100) NOT NULL,
+
+  -- Spend
+  prompt_tokens INTEGER NOT NULL DEFAULT 0,
+  completion_tokens INTEGER NOT NULL DEFAULT 0,
+  estimated BOOLEAN DEFAULT FALSE,
+
+  -- Latency
+  latency_ms INTEGER NOT NULL DEFAULT 0,
+  queue_ms INTEGER NOT NULL DEFAULT 0,
+  error BOOLEAN DEFAULT FALSE,
+
+  -- Timestamps
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Index for spend and latency reports per feature over time
+CREATE INDEX idx_llm_usage_feature ON llm_usage(feature, created_at DESC);
+
+-- Only the service role (API) writes usage
+ALTER TABLE llm_usage ENABLE ROW LEVEL SECURITY;
+
 -- ============================================================================
 -- SAMPLE DATA FOR DEVELOPMENT (Optional)
 -- ============================================================================